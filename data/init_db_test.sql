@@ -12,6 +12,16 @@ CREATE TABLE tests.user (
     sign_up_date DATE 
 );
 
+-- Normalized key of an address: case, surrounding and repeated spaces are ignored
+CREATE OR REPLACE FUNCTION tests.address_key(city TEXT, postal_code TEXT, street_name TEXT, street_number TEXT)
+RETURNS TEXT AS $$
+    SELECT lower(
+        regexp_replace(btrim(city), '\s+', ' ', 'g') || '|' || btrim(postal_code) || '|'
+        || regexp_replace(btrim(street_name), '\s+', ' ', 'g') || '|'
+        || coalesce(regexp_replace(btrim(street_number), '\s+', ' ', 'g'), '')
+    );
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
 -- Table address
 DROP TABLE IF EXISTS tests.address CASCADE;
 CREATE TABLE tests.address (
@@ -19,8 +29,11 @@ CREATE TABLE tests.address (
     city VARCHAR(20) NOT NULL,
     postal_code VARCHAR(5) NOT NULL,
     street_name VARCHAR(50) NOT NULL,
-    street_number VARCHAR(10) NOT NULL
+    street_number VARCHAR(10) NOT NULL,
+    address_key TEXT GENERATED ALWAYS AS (tests.address_key(city, postal_code, street_name, street_number)) STORED
 );
+-- One row per address: checkouts of the same address share it (AddressDAO.upsert_address).
+CREATE UNIQUE INDEX idx_address_key ON tests.address (address_key);
 
 
 -- Table customer
@@ -60,6 +73,9 @@ CREATE TABLE tests.item (
     stock INT NOT NULL,
     availability BOOLEAN NOT NULL
 );
+CREATE UNIQUE INDEX idx_item_name ON tests.item (lower(name));
+-- Available items of a type, cheapest first (configuration of discounted bundles)
+CREATE INDEX idx_item_type_price ON tests.item (item_type, price) WHERE availability;
 
 -- Table bundle
 DROP TABLE IF EXISTS tests.bundle CASCADE;
@@ -69,8 +85,13 @@ CREATE TABLE tests.bundle (
     description VARCHAR(300),
     bundle_type VARCHAR(20) NOT NULL,
     price FLOAT, 
-    discount FLOAT 
+    discount FLOAT,
+    -- Sorted item IDs or item types (see composition_fingerprint in bundleDAO.py)
+    composition_fingerprint TEXT
 );
+-- Names are unique whatever their case, and so are compositions
+CREATE UNIQUE INDEX idx_bundle_name ON tests.bundle (lower(name));
+CREATE UNIQUE INDEX idx_bundle_composition ON tests.bundle (composition_fingerprint);
 
 -- Table bundle_required_item
 DROP TABLE IF EXISTS tests.bundle_required_item CASCADE;
@@ -125,4 +146,151 @@ CREATE TABLE tests.order_item (
     id_item INT REFERENCES tests.item(id_item) ON DELETE CASCADE,
     quantity INT DEFAULT 1,
     CONSTRAINT unique_order_item UNIQUE (id_order, id_item)
-);
\ No newline at end of file
+);
+
+-- Table order_bundle (bundles sold in each order, whose items are also in order_item)
+DROP TABLE IF EXISTS tests.order_bundle CASCADE;
+CREATE TABLE tests.order_bundle (
+    id_order INT REFERENCES tests.order(id_order) ON DELETE CASCADE,
+    id_bundle INT REFERENCES tests.bundle(id_bundle) ON DELETE CASCADE,
+    quantity INT NOT NULL DEFAULT 1,
+    price FLOAT NOT NULL,
+    PRIMARY KEY (id_order, id_bundle)
+);
+
+-- Indexes of the sales analytics
+CREATE INDEX idx_order_sales_date ON tests.order (order_date) WHERE status <> 'pending';
+CREATE INDEX idx_order_item_item ON tests.order_item (id_item);
+CREATE INDEX idx_order_bundle_bundle ON tests.order_bundle (id_bundle);
+
+-- Index of the listings of the orders by status (orders waiting for a driver)
+CREATE INDEX idx_order_status ON tests.order (status);
+
+
+-- Dashboard counters, maintained by triggers in the same transaction as the writes
+-- (orders per status, active drivers), so that the dashboard is a single read of small tables.
+DROP TABLE IF EXISTS tests.dashboard_counter CASCADE;
+CREATE TABLE tests.dashboard_counter (
+    counter VARCHAR(40) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+-- Orders sold (not pending) and revenue per day
+DROP TABLE IF EXISTS tests.daily_sales CASCADE;
+CREATE TABLE tests.daily_sales (
+    day DATE PRIMARY KEY,
+    orders INT NOT NULL DEFAULT 0,
+    revenue FLOAT NOT NULL DEFAULT 0
+);
+
+-- Deliveries in progress per driver (a driver is active while this is positive)
+DROP TABLE IF EXISTS tests.driver_load CASCADE;
+CREATE TABLE tests.driver_load (
+    id_driver INT PRIMARY KEY,
+    deliveries_in_progress INT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION tests.bump_counter(counter_name VARCHAR, delta BIGINT) RETURNS VOID AS $$
+    INSERT INTO tests.dashboard_counter (counter, value) VALUES (counter_name, delta)
+    ON CONFLICT (counter) DO UPDATE SET value = tests.dashboard_counter.value + EXCLUDED.value;
+$$ LANGUAGE SQL;
+
+CREATE OR REPLACE FUNCTION tests.bump_daily_sales(sale_day DATE, delta_orders INT, delta_revenue FLOAT) RETURNS VOID AS $$
+    INSERT INTO tests.daily_sales (day, orders, revenue) VALUES (sale_day, delta_orders, delta_revenue)
+    ON CONFLICT (day) DO UPDATE SET orders = tests.daily_sales.orders + EXCLUDED.orders,
+                                    revenue = tests.daily_sales.revenue + EXCLUDED.revenue;
+$$ LANGUAGE SQL;
+
+CREATE OR REPLACE FUNCTION tests.bump_driver_load(driver INT, delta INT) RETURNS VOID AS $$
+DECLARE
+    new_load INT;
+BEGIN
+    INSERT INTO tests.driver_load (id_driver, deliveries_in_progress) VALUES (driver, delta)
+    ON CONFLICT (id_driver) DO UPDATE SET deliveries_in_progress = tests.driver_load.deliveries_in_progress + EXCLUDED.deliveries_in_progress
+    RETURNING deliveries_in_progress INTO new_load;
+
+    IF delta > 0 AND new_load = delta THEN
+        PERFORM tests.bump_counter('active_drivers', 1);
+    ELSIF delta < 0 AND new_load = 0 THEN
+        PERFORM tests.bump_counter('active_drivers', -1);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tests.track_order_counters() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM tests.bump_counter('orders_' || OLD.status, -1);
+        IF OLD.status <> 'pending' THEN
+            PERFORM tests.bump_daily_sales(OLD.order_date::date, -1, -COALESCE(OLD.price, 0));
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM tests.bump_counter('orders_' || NEW.status, 1);
+        IF NEW.status <> 'pending' THEN
+            PERFORM tests.bump_daily_sales(NEW.order_date::date, 1, COALESCE(NEW.price, 0));
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER order_counters
+AFTER INSERT OR DELETE OR UPDATE OF status, price, order_date ON tests.order
+FOR EACH ROW EXECUTE FUNCTION tests.track_order_counters();
+
+CREATE OR REPLACE FUNCTION tests.track_driver_load() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'in_progress' AND OLD.id_driver IS NOT NULL THEN
+        PERFORM tests.bump_driver_load(OLD.id_driver, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'in_progress' AND NEW.id_driver IS NOT NULL THEN
+        PERFORM tests.bump_driver_load(NEW.id_driver, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER delivery_driver_load
+AFTER INSERT OR DELETE OR UPDATE OF status, id_driver ON tests.delivery
+FOR EACH ROW EXECUTE FUNCTION tests.track_driver_load();
+
+
+-- Version of the menu, bumped on every write to the items and bundles (cache key of the serialized menu).
+-- Updates that leave the listed values (stock included) unchanged do not bump it.
+DROP TABLE IF EXISTS tests.menu_version CASCADE;
+CREATE TABLE tests.menu_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1
+);
+INSERT INTO tests.menu_version DEFAULT VALUES;
+
+CREATE OR REPLACE FUNCTION tests.bump_menu_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE tests.menu_version SET version = version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER item_menu_version
+AFTER INSERT OR DELETE OR TRUNCATE ON tests.item
+FOR EACH STATEMENT EXECUTE FUNCTION tests.bump_menu_version();
+
+CREATE TRIGGER item_update_menu_version
+AFTER UPDATE OF name, item_type, price, description, stock, availability ON tests.item
+FOR EACH ROW
+WHEN ((OLD.name, OLD.item_type, OLD.price, OLD.description, OLD.stock, OLD.availability)
+    IS DISTINCT FROM (NEW.name, NEW.item_type, NEW.price, NEW.description, NEW.stock, NEW.availability))
+EXECUTE FUNCTION tests.bump_menu_version();
+
+CREATE TRIGGER bundle_menu_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tests.bundle
+FOR EACH STATEMENT EXECUTE FUNCTION tests.bump_menu_version();
+
+CREATE TRIGGER bundle_item_menu_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tests.bundle_item
+FOR EACH STATEMENT EXECUTE FUNCTION tests.bump_menu_version();
+
+CREATE TRIGGER bundle_required_item_menu_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tests.bundle_required_item
+FOR EACH STATEMENT EXECUTE FUNCTION tests.bump_menu_version();
@@ -77,6 +77,18 @@ INSERT INTO tests.bundle_item (id_bundle, id_item) VALUES
 (2, 10),
 (2, 11);
 
+UPDATE tests.bundle b SET composition_fingerprint = 'predefined:' || (
+    SELECT string_agg(bi.id_item::text, ',' ORDER BY bi.id_item) FROM tests.bundle_item bi WHERE bi.id_bundle = b.id_bundle
+)
+WHERE b.bundle_type = 'predefined';
+
+UPDATE tests.bundle b SET composition_fingerprint = 'discount:' || (
+    SELECT string_agg(lower(r.item_type), ',' ORDER BY lower(r.item_type) COLLATE "C")
+    FROM tests.bundle_required_item r, generate_series(1, r.quantity_required)
+    WHERE r.id_bundle = b.id_bundle
+)
+WHERE b.bundle_type = 'discount';
+
 INSERT INTO tests.order (id_user, status, price, id_address, order_date) VALUES
 (1, 'delivered', 13.5, 1, '2024-10-01 12:30:00'),
 (2, 'in_progress', 31, 2, '2024-10-06 18:45:00'),
@@ -109,6 +121,10 @@ INSERT INTO tests.order_item (id_order, id_item) VALUES
 (5, 11),
 (5, 6);
 
+INSERT INTO tests.order_bundle (id_order, id_bundle, quantity, price) VALUES
+(1, 1, 1, 13.5),
+(5, 2, 1, 15.5);
+
 
 SELECT setval('tests.user_id_user_seq', (SELECT MAX(id_user) FROM tests.user));
 SELECT setval('tests.address_id_address_seq', (SELECT MAX(id_address) FROM tests.address));
@@ -1,28 +1,89 @@
-import uvicorn
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
+from starlette.exceptions import HTTPException
+
+from src.App.init_app import container
+from src.DAO.identity_map import identity_scope
+from src.DAO.query_limits import QueryCancelledError
 
+from .cancellation import CancelQueriesOnDisconnect, query_aware_http_exception_handler, query_cancelled_handler
+from .responses import FastJSONResponse
+from .routers.AnalyticsController import analytics_router
 from .routers.AuthController import auth_router
+from .routers.ExportController import export_router
 from .routers.MenuBundleController import menu_bundle_router
 from .routers.MenuItemController import menu_item_router
 from .routers.OrderController import order_router
 from .routers.UserController import user_router
 
 
-def run_app():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker after the fork: every process warms up and drains its own pool.
+    container.db_connector.open_pool()
+    yield
+    await run_in_threadpool(container.db_connector.close_pool)
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the application. Uvicorn calls this factory in each worker process.
+    """
     app = FastAPI(
         title="UB'EJR Eats",
         description="Admin API for menu management, consulting orders and creating driver and admin accounts",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan,
     )
 
+    @app.middleware("http")
+    async def open_identity_scope(request: Request, call_next):
+        # Each request gets its own identity map, so an entity is loaded at most once per request.
+        with identity_scope():
+            return await call_next(request)
+
+    # Queries still running when the client disconnects are cancelled; timeouts are answered with a 504.
+    app.add_middleware(CancelQueriesOnDisconnect)
+    app.add_exception_handler(QueryCancelledError, query_cancelled_handler)
+    app.add_exception_handler(HTTPException, query_aware_http_exception_handler)
+
     app.include_router(auth_router)
     app.include_router(menu_item_router)
     app.include_router(menu_bundle_router)
     app.include_router(order_router)
     app.include_router(user_router)
+    app.include_router(export_router)
+    app.include_router(analytics_router)
 
     @app.get("/", include_in_schema=False)
     async def redirect_to_docs():
         return RedirectResponse(url="/docs")
 
-    uvicorn.run(app, port=5000, host="0.0.0.0")
+    return app
+
+
+def server_options() -> dict:
+    """
+    Reads the settings of the server from the environment (see .env.sample).
+    """
+    return {
+        "host": os.environ.get("APP_HOST", "0.0.0.0"),
+        "port": int(os.environ.get("APP_PORT", 5000)),
+        "workers": int(os.environ.get("APP_WORKERS", 1)),
+        "backlog": int(os.environ.get("APP_BACKLOG", 2048)),
+        "timeout_keep_alive": int(os.environ.get("APP_KEEP_ALIVE", 5)),
+        "timeout_graceful_shutdown": int(os.environ.get("APP_GRACEFUL_TIMEOUT", 30)),
+        # uvloop and httptools are used when installed (uvicorn[standard]), asyncio and h11 otherwise.
+        "loop": "auto",
+        "http": "auto",
+    }
+
+
+def run_app():
+    import uvicorn
+
+    uvicorn.run("src.App.API:create_app", factory=True, **server_options())
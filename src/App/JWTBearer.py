@@ -2,7 +2,7 @@ from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import DecodeError, ExpiredSignatureError
 
-from .init_app import jwt_service
+from .init_app import container
 
 
 class JWTBearer(HTTPBearer):
@@ -17,7 +17,8 @@ class JWTBearer(HTTPBearer):
         if not credentials.scheme == "Bearer":
             raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
         try:
-            jwt_service.validate_user_jwt(credentials.credentials)
+            # Kept for get_current_user, so that the token is only verified once per request.
+            request.state.jwt_claims = container.jwt_service.verify_jwt(credentials.credentials)
         except ExpiredSignatureError as e:
             raise HTTPException(status_code=403, detail="Expired token") from e
         except DecodeError as e:
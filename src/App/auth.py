@@ -1,27 +1,31 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
 
 from src.Model.abstract_user import AbstractUser
 from src.Model.admin import Admin
 
-from .init_app import admin_user_service, jwt_service
+from .init_app import container
 from .JWTBearer import JWTBearer
 
 
 def get_user_dao_from_service():
-    return admin_user_service.user_dao
+    return container.admin_user_service.user_dao
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(JWTBearer())) -> AbstractUser:
+def get_current_user(
+    request: Request, credentials: HTTPAuthorizationCredentials = Depends(JWTBearer())
+) -> AbstractUser:
     """
-    A dependency that decodes the token and returns the full user object
-    (Admin, Customer, or Driver) from the database.
+    A dependency that returns the full user object (Admin, Customer, or Driver) from the database,
+    using the claims of the token verified by JWTBearer.
     """
     try:
-        token = credentials.credentials
-        user_id = int(jwt_service.validate_user_jwt(token))
+        claims = getattr(request.state, "jwt_claims", None)
+        if claims is None:
+            claims = container.jwt_service.verify_jwt(credentials.credentials)
+        user_id = int(claims["user_id"])
 
-        user = admin_user_service.user_dao.find_user_by_id(user_id)
+        user = container.admin_user_service.user_dao.find_user_by_id(user_id)
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
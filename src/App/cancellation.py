@@ -0,0 +1,89 @@
+import anyio
+from fastapi import Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+
+from src.DAO.query_limits import QueryCancelledError, QueryTimeoutError, cancellation_scope
+
+
+class CancelQueriesOnDisconnect:
+    """
+    ASGI middleware cancelling the database queries of a request when its client disconnects, so
+    that an abandoned request stops using the database instead of running until its statement timeout.
+
+    The request body is read upfront: the only message left to wait for is then the disconnection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    async def _read_request(receive) -> list:
+        messages = [await receive()]
+        while messages[-1]["type"] == "http.request" and messages[-1].get("more_body", False):
+            messages.append(await receive())
+        return messages
+
+    @staticmethod
+    async def _wait_for_disconnect(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages = await self._read_request(receive)
+        client_gone = messages[-1]["type"] == "http.disconnect"
+        disconnected = anyio.Event()
+        responded = False
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send_and_track(message):
+            nonlocal responded
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+            await send(message)
+
+        with cancellation_scope() as queries:
+
+            async def watch():
+                if not client_gone:
+                    await self._wait_for_disconnect(receive)
+                disconnected.set()
+                # Once the response is sent, the server reports a disconnection too: nothing is left to cancel.
+                if not responded:
+                    await run_in_threadpool(queries.cancel)
+
+            async with anyio.create_task_group() as tasks:
+                tasks.start_soon(watch)
+                try:
+                    await self.app(scope, replay, send_and_track)
+                finally:
+                    tasks.cancel_scope.cancel()
+
+
+async def query_cancelled_handler(request: Request, exc: QueryCancelledError) -> JSONResponse:
+    if isinstance(exc, QueryTimeoutError):
+        return JSONResponse(status_code=504, content={"detail": "The database took too long to answer."})
+    # Nobody reads this response: the client is gone (499 is the status nginx logs in that case).
+    return JSONResponse(status_code=499, content={"detail": "Client closed the request."})
+
+
+async def query_aware_http_exception_handler(request: Request, exc: HTTPException):
+    """
+    The routers turn any error into an HTTPException (400/500): a query timeout or cancellation
+    wrapped that way still gets its own response.
+    """
+    for cause in (exc.__cause__, exc.__context__):
+        if isinstance(cause, QueryCancelledError):
+            return await query_cancelled_handler(request, cause)
+    return await http_exception_handler(request, exc)
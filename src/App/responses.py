@@ -0,0 +1,49 @@
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from src.Service.admin_menu_service import MenuPayload
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized in a single pass by pydantic-core, which natively handles models,
+    dates and nested lists.
+
+    Returned directly by an endpoint, it also skips FastAPI's response-model validation and
+    jsonable_encoder conversion: use it for large lists of models that were already validated
+    (or built from trusted rows) by the DAOs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Tells whether the client already has this version of the resource (weak comparison of If-None-Match).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in client_tags
+
+
+def menu_response(request: Request, payload: MenuPayload) -> Response:
+    """
+    Answers a menu request from its precomputed payload: 304 Not Modified if the client already has
+    this version of the menu, otherwise the JSON, gzipped when the client accepts it.
+    """
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request, payload.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzipped_body, media_type="application/json", headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.App.auth import admin_required
+from src.App.init_app import container
+
+analytics_router = APIRouter(prefix="/analytics", tags=["Sales analytics"], dependencies=[Depends(admin_required)])
+
+
+def get_analytics_service():
+    return container.analytics_service
+
+
+@analytics_router.get("/dashboard", status_code=status.HTTP_200_OK)
+def get_dashboard(service=Depends(get_analytics_service)):
+    """
+    Live counters of the dashboard, cheap enough to be polled every few seconds.
+    """
+    try:
+        return service.dashboard()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@analytics_router.get("/revenue", status_code=status.HTTP_200_OK)
+def get_revenue(
+    bucket: Literal["day", "week", "month"] = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service=Depends(get_analytics_service),
+):
+    """
+    Number of orders and revenue per day, week or month (last 30 days by default).
+    """
+    try:
+        return service.revenue(since, until, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@analytics_router.get("/top-items", status_code=status.HTTP_200_OK)
+def get_top_items(
+    limit: int = 10,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service=Depends(get_analytics_service),
+):
+    """
+    Best-selling items by revenue (last 30 days by default).
+    """
+    try:
+        return service.top_items(since, until, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@analytics_router.get("/top-bundles", status_code=status.HTTP_200_OK)
+def get_top_bundles(
+    limit: int = 10,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service=Depends(get_analytics_service),
+):
+    """
+    Best-selling bundles by revenue (last 30 days by default).
+    """
+    try:
+        return service.top_bundles(since, until, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
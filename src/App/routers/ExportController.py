@@ -0,0 +1,81 @@
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from src.App.auth import admin_required
+from src.App.init_app import container
+from src.Service.export_service import ExportFormat, ExportService
+
+export_router = APIRouter(prefix="/exports", tags=["Exports"], dependencies=[Depends(admin_required)])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def get_export_service():
+    return container.export_service
+
+
+def check_date_range(since: Optional[date], until: Optional[date]):
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be before 'until'")
+
+
+def stream_export(request: Request, chunks: Iterator[str], name: str, export_format: ExportFormat) -> StreamingResponse:
+    """
+    Sends the rows as they are produced, gzipped on the fly when the client accepts it.
+    The generator runs in the threadpool, so a long export does not block the other requests.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{export_format}"', "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = ExportService.gzip(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        chunks, status_code=status.HTTP_200_OK, media_type=MEDIA_TYPES[export_format], headers=headers
+    )
+
+
+@export_router.get("/orders")
+def export_orders(
+    request: Request,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service=Depends(get_export_service),
+):
+    """
+    Exports the orders placed between 'since' (included) and 'until' (excluded), one row per order.
+    """
+    check_date_range(since, until)
+    return stream_export(request, service.export_orders(export_format, since, until), "orders", export_format)
+
+
+@export_router.get("/deliveries")
+def export_deliveries(
+    request: Request,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service=Depends(get_export_service),
+):
+    """
+    Exports the deliveries completed between 'since' (included) and 'until' (excluded), one row per delivery.
+    """
+    check_date_range(since, until)
+    return stream_export(request, service.export_deliveries(export_format, since, until), "deliveries", export_format)
+
+
+@export_router.get("/users")
+def export_users(
+    request: Request,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    service=Depends(get_export_service),
+):
+    """
+    Exports the users who signed up between 'since' (included) and 'until' (excluded), one row per user.
+    """
+    check_date_range(since, until)
+    return stream_export(request, service.export_users(export_format, since, until), "users", export_format)
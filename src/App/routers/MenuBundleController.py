@@ -1,9 +1,10 @@
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, Path, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Path, HTTPException, Query, Request, status
 
 from src.App.auth import admin_required
-from src.App.init_app import admin_menu_service
+from src.App.init_app import container
+from src.App.responses import menu_response
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.one_item_bundle import OneItemBundle
 from src.Model.predefined_bundle import PredefinedBundle
@@ -15,15 +16,15 @@ menu_bundle_router = APIRouter(tags=["Menu Bundle management"], dependencies=[De
 
 
 def get_service():
-    return admin_menu_service
+    return container.admin_menu_service
 
 
 def get_item_dao():
-    return admin_menu_service.item_dao
+    return container.admin_menu_service.item_dao
 
 
 def get_bundle_dao():
-    return admin_menu_service.bundle_dao
+    return container.admin_menu_service.bundle_dao
 
 
 def handle_service_error(e: Exception):
@@ -45,9 +46,12 @@ def get_bundle(id_bundle: int, dao=Depends(get_bundle_dao)):
 
 
 @menu_bundle_router.get("/bundles", response_model=List[AnyBundle])
-def list_bundles(service=Depends(get_service)):
+def list_bundles(request: Request, service=Depends(get_service)):
+    """
+    Lists the bundles. Supports If-None-Match: an unchanged menu is answered with 304 Not Modified.
+    """
     try:
-        return service.list_bundles()
+        return menu_response(request, service.get_menu_payload("bundles"))
     except Exception as e:
         handle_service_error(e)
 
@@ -1,11 +1,13 @@
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
 
 from src.App.auth import admin_required
-from src.App.init_app import admin_menu_service
+from src.App.init_app import container
+from src.App.responses import menu_response
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.item import Item
+from src.Model.item_batch import BatchRowResult, ItemBatch
 from src.Model.one_item_bundle import OneItemBundle
 from src.Model.predefined_bundle import PredefinedBundle
 
@@ -16,11 +18,11 @@ menu_item_router = APIRouter(tags=["Menu Item management"], dependencies=[Depend
 
 
 def get_service():
-    return admin_menu_service
+    return container.admin_menu_service
 
 
 def get_item_dao():
-    return admin_menu_service.item_dao
+    return container.admin_menu_service.item_dao
 
 
 def handle_service_error(e: Exception):
@@ -33,6 +35,17 @@ def handle_service_error(e: Exception):
     raise HTTPException(status_code=500, detail="Internal Server Error") from e
 
 
+@menu_item_router.get("/items/types/{item_type}", response_model=List[Item])
+def list_items_of_type(item_type: str, service=Depends(get_service)):
+    """
+    Lists the available items of a type, cheapest first.
+    """
+    try:
+        return service.get_items_by_type([item_type])[item_type]
+    except Exception as e:
+        handle_service_error(e)
+
+
 @menu_item_router.get("/items/{id_item}")
 def get_item(id_item: int, dao=Depends(get_item_dao)):
     item = dao.find_item_by_id(id_item)
@@ -42,9 +55,12 @@ def get_item(id_item: int, dao=Depends(get_item_dao)):
 
 
 @menu_item_router.get("/items", response_model=List[Item])
-def list_items(service=Depends(get_service)):
+def list_items(request: Request, service=Depends(get_service)):
+    """
+    Lists the items. Supports If-None-Match: an unchanged menu is answered with 304 Not Modified.
+    """
     try:
-        return service.list_items()
+        return menu_response(request, service.get_menu_payload("items"))
     except Exception as e:
         handle_service_error(e)
 
@@ -73,6 +89,18 @@ def create_item(
         handle_service_error(e)
 
 
+@menu_item_router.post("/items/batch", response_model=List[BatchRowResult])
+def apply_item_batch(batch: ItemBatch, service=Depends(get_service)):
+    """
+    Creates, updates and restocks many items in one transaction. Invalid rows are skipped: the
+    response tells, for each row, whether it was applied or why not.
+    """
+    try:
+        return service.apply_item_batch(batch)
+    except Exception as e:
+        handle_service_error(e)
+
+
 @menu_item_router.put("/items/{id_item}")
 def update_item(
     id_item: int = Path(),
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from src.App.auth import admin_required
-from src.App.init_app import admin_order_service
+from src.App.init_app import container
+from src.App.responses import FastJSONResponse
 
 order_router = APIRouter(prefix="/orders", tags=["Consulting orders"], dependencies=[Depends(admin_required)])
 
 
 def get_admin_order_service():
-    return admin_order_service
+    return container.admin_order_service
 
 
 def get_order_dao():
-    return admin_order_service.order_dao
+    return container.admin_order_service.order_dao
 
 
 @order_router.get("/{id_order}", status_code=status.HTTP_200_OK)
@@ -57,7 +58,7 @@ def get_pending_orders(admin_service=Depends(get_admin_order_service)):
                 }
             formatted.append(formatted_order)
 
-        return formatted
+        return FastJSONResponse(formatted)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while fetching orders: {e}") from e
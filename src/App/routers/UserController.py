@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from src.App.auth import admin_required
-from src.App.init_app import admin_user_service, password_service
+from src.App.init_app import container
 from src.Model.APIUser import APIUser
 
 if TYPE_CHECKING:
@@ -13,7 +13,7 @@ user_router = APIRouter(prefix="/users", tags=["Users"])
 
 
 def get_admin_user_service():
-    return admin_user_service
+    return container.admin_user_service
 
 
 def handle_service_error(e: Exception):
@@ -43,7 +43,7 @@ def create_admin_user(
     Performs validation on the username and password
     """
     try:
-        password_service.check_password_strength(password=password)
+        container.password_service.check_password_strength(password=password)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
@@ -67,7 +67,7 @@ def create_driver_user(
     This route requires an existing Admin to be authenticated.
     """
     try:
-        password_service.check_password_strength(password=password)
+        container.password_service.check_password_strength(password=password)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
@@ -151,9 +151,7 @@ class AddressCheckoutView:
             return
 
         try:
-            created_order = self.order_service.create_order(self.session.user_id, final_address_obj.id_address)
-            for bundle in self.cart:
-                self.order_service.add_bundle_to_order(created_order.id_order, bundle)
+            created_order = self.order_service.checkout(self.session.user_id, final_address_obj.id_address, self.cart)
 
             print(f"\n🎉 Order #{created_order.id_order} confirmed!")
 
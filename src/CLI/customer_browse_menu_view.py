@@ -155,11 +155,12 @@ class BrowseMenuView:
             composition=[],
         )
 
-        if self.all_items is None:
-            self.all_items = self.item_service.list_items()
+        items_by_type: Dict[str, List["Item"]] = self.item_service.get_items_by_type(
+            user_bundle.required_item_types
+        )
 
         for required_type in user_bundle.required_item_types:
-            available_items: List["Item"] = [i for i in self.all_items if i.item_type == required_type]
+            available_items: List["Item"] = items_by_type[required_type]
 
             if not available_items:
                 print(f"[ERROR] No items available for type: {required_type}. Bundle cancelled.")
@@ -67,7 +67,6 @@ class DriverMainView(AbstractView):
 
     def _assign_delivery(self):
         driver_service = self.services.get("driver")
-        order_service = self.services.get("order")
         order_ids = []
         while True:
             print("Validate your delivery with V")
@@ -81,7 +80,7 @@ class DriverMainView(AbstractView):
             else:
                 try:
                     order_id = int(choice)
-                    if order_service.find_order_by_id(order_id) in driver_service.list_pending_orders():
+                    if order_id in [o.id_order for o in driver_service.list_pending_orders()]:
                         if order_id not in order_ids:
                             order_ids.append(order_id)
                             print(f"Order ID {order_id} added.")
@@ -1,10 +1,21 @@
+import logging
 import os
-from typing import Literal, Optional, Union
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Tuple, Union
+from uuid import uuid4
 
 import psycopg2
+import psycopg2.errors
+import psycopg2.pool
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
 
+from .query_limits import QueryCancelledError, QueryTimeoutError, current_canceller, current_statement_timeout
+from .replica_routing import Endpoint, ReplicaSet, is_write, record_write, replica_allowed
+from .statement_cache import StatementCache
+
 
 class DBConnector:
     """
@@ -12,7 +23,29 @@ class DBConnector:
 
     This class provides a simplified interface for connecting to and executing SQL queries
     on a PostgreSQL database. It supports both environment-based and custom configuration.
+
+    Read replicas (POSTGRES_REPLICAS="host:port,host:port") share the database, user, password and
+    schema of the primary. The SELECT queries of the DAO methods marked @read_only are spread over
+    them; everything else, every read of a unit of work that has already written, and the reads that follow
+    a write of the same context by less than `replica_pinned_after_write` seconds, goes to the primary.
+
+    Every query is stopped server-side after POSTGRES_STATEMENT_TIMEOUT seconds (30 by default, 0 for
+    no limit), or after the timeout given to sql_query or set by a statement_timeout block, and then
+    raises QueryTimeoutError. Queries run in a cancellation_scope are cancelled along with it.
     """
+
+    fetch_size: int = 1000
+    pool_min: int = 1
+    pool_max: int = 10
+    prepare_threshold: int = 5
+    prepared_per_connection: int = 100
+    statement_timeout: float = 30.0
+    _pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+    _pool_slots: Optional[threading.BoundedSemaphore] = None
+    replica_connect_timeout: int = 3
+    replica_retry_after: float = 30.0
+    replica_pinned_after_write: float = 5.0
+
     def __init__(self, config=None, test=False):
         if config is not None:
             self.host = config["host"]
@@ -21,6 +54,12 @@ class DBConnector:
             self.user = config["user"]
             self.password = config["password"]
             self.schema = config["schema"]
+            self.fetch_size = int(config.get("fetch_size", self.fetch_size))
+            self.pool_min = int(config.get("pool_min", self.pool_min))
+            self.pool_max = int(config.get("pool_max", self.pool_max))
+            self.prepare_threshold = int(config.get("prepare_threshold", self.prepare_threshold))
+            self.statement_timeout = float(config.get("statement_timeout", self.statement_timeout))
+            replicas = config.get("replicas", "")
         else:
             load_dotenv()
             self.host = os.environ["POSTGRES_HOST"]
@@ -32,34 +71,291 @@ class DBConnector:
                 self.schema = os.environ["POSTGRES_SCHEMA_TEST"]
             else:
                 self.schema = os.environ["POSTGRES_SCHEMA"]
+            self.fetch_size = int(os.environ.get("POSTGRES_FETCH_SIZE", self.fetch_size))
+            self.pool_min = int(os.environ.get("POSTGRES_POOL_MIN", self.pool_min))
+            self.pool_max = int(os.environ.get("POSTGRES_POOL_MAX", self.pool_max))
+            self.prepare_threshold = int(os.environ.get("POSTGRES_PREPARE_THRESHOLD", self.prepare_threshold))
+            self.statement_timeout = float(os.environ.get("POSTGRES_STATEMENT_TIMEOUT", self.statement_timeout))
+            replicas = os.environ.get("POSTGRES_REPLICAS", "")
+        self.statements = StatementCache(self.prepare_threshold, self.prepared_per_connection)
+        if isinstance(replicas, str):
+            replicas = ReplicaSet.parse(replicas, self.port)
+        self.replicas = ReplicaSet(replicas, self.replica_retry_after) if replicas else None
+        self._replica_pools: Dict[Endpoint, Tuple[psycopg2.pool.AbstractConnectionPool, threading.Semaphore]] = {}
+
+    def _connection_parameters(self, replica: Optional[Endpoint] = None) -> dict:
+        options = f"-c search_path={self.schema}"
+        if self.statement_timeout:
+            options += f" -c statement_timeout={int(self.statement_timeout * 1000)}"
+        parameters = {
+            "host": self.host,
+            "port": self.port,
+            "database": self.database,
+            "user": self.user,
+            "password": self.password,
+            "options": options,
+            "cursor_factory": RealDictCursor,
+        }
+        if replica is not None:
+            # A replica that does not answer is given up quickly: the read then goes to the primary.
+            parameters.update(host=replica[0], port=replica[1], connect_timeout=self.replica_connect_timeout)
+        return parameters
+
+    def _connect(self, replica: Optional[Endpoint] = None):
+        return psycopg2.connect(**self._connection_parameters(replica))
+
+    def open_pool(self) -> None:
+        """
+        Opens a pool of POSTGRES_POOL_MIN to POSTGRES_POOL_MAX connections reused by sql_query.
+
+        The pool belongs to the current process: each server worker opens its own after being forked,
+        which also warms it up with its first POSTGRES_POOL_MIN connections. Queries run at least
+        POSTGRES_PREPARE_THRESHOLD times are prepared once per pooled connection (see StatementCache).
+        Without a pool, every query opens and closes its own connection.
+
+        Each replica gets a pool of up to POSTGRES_POOL_MAX connections too, opened on demand so that
+        a replica that is down does not prevent the worker from starting.
+        """
+        if self._pool is not None:
+            return
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            self.pool_min, self.pool_max, **self._connection_parameters()
+        )
+        # Threads wait for a free connection instead of getting a PoolError when the pool is exhausted.
+        self._pool_slots = threading.BoundedSemaphore(self.pool_max)
+        for replica in self.replicas.endpoints if self.replicas else ():
+            self._replica_pools[replica] = (
+                psycopg2.pool.ThreadedConnectionPool(0, self.pool_max, **self._connection_parameters(replica)),
+                threading.BoundedSemaphore(self.pool_max),
+            )
+
+    def statement_stats(self) -> dict:
+        """
+        Statistics of the prepared statements of the pool: number of connections and statements
+        prepared, executions by name (hits), preparations, evictions and queries that could not be prepared.
+        """
+        return self.statements.stats()
+
+    def close_pool(self, timeout: float = 10.0) -> None:
+        """
+        Drains the pool: waits up to `timeout` seconds for the borrowed connections to be given back,
+        then closes all its connections. Queries issued meanwhile use their own connection.
+        """
+        if self._pool is None:
+            return
+        pools = [(self._pool, self._pool_slots), *self._replica_pools.values()]
+        self._pool = self._pool_slots = None
+        self._replica_pools = {}
+        deadline = time.monotonic() + timeout
+        for pool, slots in pools:
+            for _ in range(self.pool_max):
+                if not slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                    break
+            pool.closeall()
+
+    @contextmanager
+    def _connection(self, replica: Optional[Endpoint] = None):
+        """
+        Lends a connection (to the primary, or to `replica`) for one transaction, committed on success
+        and rolled back on error: taken from the pool when it is open, otherwise opened and closed
+        around the transaction.
+        """
+        canceller = current_canceller()
+        pool, slots = self._replica_pools.get(replica, (None, None)) if replica else (self._pool, self._pool_slots)
+        if pool is None:
+            connection = self._connect(replica)
+            try:
+                if canceller is not None:
+                    canceller.track(connection)
+                with connection as transaction:
+                    yield transaction
+            finally:
+                if canceller is not None:
+                    canceller.untrack(connection)
+                connection.close()
+            return
+
+        slots.acquire()
+        try:
+            connection = pool.getconn()
+            try:
+                if canceller is not None:
+                    canceller.track(connection)
+                with connection as transaction:
+                    self.statements.attach(transaction)
+                    yield transaction
+            finally:
+                if canceller is not None and canceller.untrack(connection):
+                    connection.close()
+                try:
+                    pool.putconn(connection, close=bool(connection.closed))
+                except psycopg2.pool.PoolError:
+                    # The pool was closed before the end of the transaction.
+                    connection.close()
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _print_error(e: Exception) -> None:
+        print("ERROR")
+        print(f"PostgreSQL Error Code: {getattr(e, 'pgcode', 'N/A')}")
+        diag = getattr(e, "diag", None)
+        print(f"PostgreSQL Constraint: {diag.constraint_name if diag else 'N/A'}")
+        print(e)
+
+    def _replica_for(self, query: str, read_only_query: bool = False) -> Optional[Endpoint]:
+        """Picks the replica that serves a query, or None if it must run on the primary."""
+        if is_write(query):
+            record_write()
+            return None
+        if self.replicas is None or not replica_allowed(query, read_only_query, self.replica_pinned_after_write):
+            return None
+        return self.replicas.choose()
+
+    def _replica_failed(self, replica: Endpoint, e: Exception) -> None:
+        self.replicas.mark_down(replica)
+        logging.warning(f"Replica {replica[0]}:{replica[1]} unavailable, reading from the primary: {e}")
+
+    @staticmethod
+    def _replica_unavailable(e: Exception) -> bool:
+        # A cancelled query (statement timeout) would fail on the primary as well.
+        return isinstance(e, psycopg2.OperationalError) and not isinstance(e, psycopg2.errors.QueryCanceled)
+
+    def _timeout_for(self, timeout: Optional[float]) -> Optional[float]:
+        """Timeout to set on the transaction, or None when the one of the connection applies."""
+        timeout = current_statement_timeout() if timeout is None else timeout
+        return None if timeout is None or timeout == self.statement_timeout else timeout
+
+    @staticmethod
+    def _set_timeout(cursor, timeout: Optional[float]) -> None:
+        if timeout is not None:
+            # Only for the current transaction: pooled connections get back the default afterwards.
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+
+    def _cancellation_error(self, timeout: Optional[float]) -> QueryCancelledError:
+        canceller = current_canceller()
+        if canceller is not None and canceller.cancelled:
+            return QueryCancelledError("The query was cancelled: the client disconnected.")
+        return QueryTimeoutError(self.statement_timeout if timeout is None else timeout)
+
+    def _run(self, query: str, data, return_type, replica: Optional[Endpoint] = None, timeout: Optional[float] = None):
+        try:
+            with self._connection(replica) as connection:
+                with connection.cursor() as cursor:
+                    self._set_timeout(cursor, timeout)
+                    self.statements.execute(connection, cursor, query, data)
+                    if return_type == "one":
+                        return cursor.fetchone()
+                    if return_type == "all":
+                        return cursor.fetchall()
+        except psycopg2.errors.QueryCanceled as e:
+            raise self._cancellation_error(timeout) from e
 
     def sql_query(
         self,
         query: str,
         data: Optional[Union[tuple, list, dict]] = None,
         return_type: Union[Literal["one"], Literal["all"], None] = "one",
+        timeout: Optional[float] = None,
     ):
+        """
+        Runs a query in its own transaction. `timeout` (in seconds) overrides the statement timeout
+        for this query; QueryTimeoutError is raised when it is exceeded.
+        """
+        timeout = self._timeout_for(timeout)
         try:
-            with psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                options=f"-c search_path={self.schema}",
-                cursor_factory=RealDictCursor,
-            ) as connection:
+            replica = self._replica_for(query)
+            if replica is not None:
+                try:
+                    return self._run(query, data, return_type, replica, timeout)
+                except Exception as e:
+                    # Reads are safe to retry: a replica that is down or drops the connection is skipped.
+                    if not self._replica_unavailable(e):
+                        raise
+                    self._replica_failed(replica, e)
+            return self._run(query, data, return_type, timeout=timeout)
+        except Exception as e:
+            self._print_error(e)
+            raise e
+
+    @contextmanager
+    def transaction(self, timeout: Optional[float] = None) -> Iterator[Callable]:
+        """
+        Runs several queries in one transaction on the primary: committed when the block exits
+        normally, rolled back if it raises. Yields a function running one query, with the arguments
+        of sql_query (without `timeout`, which applies to each query of the transaction).
+        """
+        timeout = self._timeout_for(timeout)
+        record_write()
+        try:
+            with self._connection() as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(query, data)
-                    if return_type == "one":
-                        return cursor.fetchone()
-                    if return_type == "all":
-                        return cursor.fetchall()
+                    self._set_timeout(cursor, timeout)
+
+                    def query(query: str, data=None, return_type: Optional[Literal["one", "all"]] = "one"):
+                        self.statements.execute(connection, cursor, query, data)
+                        if return_type == "one":
+                            return cursor.fetchone()
+                        if return_type == "all":
+                            return cursor.fetchall()
+
+                    yield query
+        except psycopg2.errors.QueryCanceled as e:
+            self._print_error(e)
+            raise self._cancellation_error(timeout) from e
+        except psycopg2.Error as e:
+            self._print_error(e)
+            raise e
+
+    def stream_query(
+        self,
+        query: str,
+        data: Optional[Union[tuple, list, dict]] = None,
+        fetch_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[List[dict]]:
+        """
+        Executes a query on a named (server-side) cursor and yields its rows in chunks, so that
+        tables of any size can be scanned in constant memory.
+
+        Only `fetch_size` rows (POSTGRES_FETCH_SIZE, 1000 by default) are transferred per round trip.
+        The stream uses its own connection, outside the pool, which stays open until the generator
+        is exhausted or closed. Scans are read-only: they are served by a replica when there is one.
+        The statement timeout (or `timeout`) applies to each round trip.
+        """
+        fetch_size = fetch_size or self.fetch_size
+        timeout = self._timeout_for(timeout)
+        canceller = current_canceller()
+        replica = self._replica_for(query, read_only_query=True)
+        try:
+            connection = self._connect(replica)
+        except psycopg2.OperationalError as e:
+            if replica is None:
+                self._print_error(e)
+                raise e
+            self._replica_failed(replica, e)
+            connection = self._connect()
+        try:
+            if canceller is not None:
+                canceller.track(connection)
+            if timeout is not None:
+                with connection.cursor() as cursor:
+                    self._set_timeout(cursor, timeout)
+            with connection.cursor(name=f"stream_{uuid4().hex}") as cursor:
+                cursor.itersize = fetch_size
+                cursor.execute(query, data)
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    yield rows
+        except psycopg2.errors.QueryCanceled as e:
+            self._print_error(e)
+            raise self._cancellation_error(timeout) from e
         except Exception as e:
-            print("ERROR")
-            print(f"PostgreSQL Error Code: {getattr(e, 'pgcode', 'N/A')}")
-            print(
-                f"PostgreSQL Constraint: {getattr(e, 'diag', 'N/A').constraint_name if hasattr(e, 'diag') and e.diag else 'N/A'}"
-            )
-            print(e)
+            self._print_error(e)
             raise e
+        finally:
+            if canceller is not None:
+                canceller.untrack(connection)
+            connection.close()
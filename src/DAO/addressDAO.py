@@ -1,9 +1,14 @@
 import logging
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from src.DAO.batch_loader import load_batched
 from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import forget, lookup, lookup_many, materialize
+from src.DAO.query_limits import LISTING_TIMEOUT, LOOKUP_TIMEOUT, QueryCancelledError, statement_timeout
+from src.DAO.replica_routing import read_only
+from src.DAO.trusted_rows import build
 from src.Model.address import Address
 
 
@@ -12,6 +17,28 @@ class AddressDAO(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @staticmethod
+    def _build_address(raw_address: dict) -> Address:
+        # postal_code is stored as VARCHAR(5) but modelled as an int; address_key is derived from the other columns.
+        values = {**raw_address, "postal_code": int(raw_address["postal_code"])}
+        values.pop("address_key", None)
+        return build(Address, **values)
+
+    @staticmethod
+    def _key_components(city: str, postal_code, street_name: str, street_number=None) -> dict:
+        # Passed as text, like the columns of the address_key() function.
+        return {
+            "city": city,
+            "postal_code": str(postal_code),
+            "street_name": street_name,
+            "street_number": None if street_number is None else str(street_number),
+        }
+
+    @classmethod
+    def _address_from_row(cls, raw_address: dict) -> Address:
+        return materialize("address", raw_address["id_address"], lambda: cls._build_address(raw_address))
+
+    @read_only
     def find_address_by_id(self, id_address: int) -> Optional[Address]:
         """Find an address by its ID.
 
@@ -21,6 +48,12 @@ class AddressDAO(BaseModel):
         Returns:
             Address object if found, None otherwise.
         """
+        address = lookup("address", id_address)
+        if address is not None:
+            return address
+        if load_batched("address", id_address, self.find_addresses_by_ids):
+            return lookup("address", id_address)
+
         try:
             raw_address = self.db_connector.sql_query(
                 "SELECT * FROM address WHERE id_address = %(id_address)s", {"id_address": id_address}, "one"
@@ -28,11 +61,42 @@ class AddressDAO(BaseModel):
             if raw_address is None:
                 return None
 
-            return Address(**raw_address)
+            return self._address_from_row(raw_address)
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch address {id_address}: {e}")
             return None
 
+    @read_only
+    def find_addresses_by_ids(self, id_addresses: List[int]) -> List[Address]:
+        """Find several addresses with a single query.
+
+        Args:
+            id_addresses: The IDs of the addresses to find.
+
+        Returns:
+            List of the addresses found, in no particular order (empty on failure).
+        """
+        mapped_addresses, id_addresses = lookup_many("address", id_addresses)
+        if not id_addresses:
+            return list(mapped_addresses.values())
+
+        try:
+            raw_addresses = self.db_connector.sql_query(
+                "SELECT * FROM address WHERE id_address = ANY(%(id_addresses)s::int[])",
+                {"id_addresses": id_addresses},
+                "all",
+            )
+            return list(mapped_addresses.values()) + [self._address_from_row(address) for address in raw_addresses]
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch addresses {id_addresses}: {e}")
+            return []
+
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
     def find_all_addresses(self) -> List[Address]:
         """Returns a list of all Address objects from the database.
 
@@ -41,11 +105,36 @@ class AddressDAO(BaseModel):
         """
         try:
             raw_addresses = self.db_connector.sql_query("SELECT * FROM address", {}, "all")
-            return [Address(**address) for address in raw_addresses]
+            return [self._address_from_row(address) for address in raw_addresses]
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch all addresses: {e}")
             return []
 
+    def iter_addresses(self, fetch_size: Optional[int] = None) -> Iterator[Address]:
+        """Stream all addresses from a server-side cursor, in constant memory.
+
+        Args:
+            fetch_size: Number of rows fetched per round trip (defaults to the connector's).
+
+        Yields:
+            Address objects, ordered by ID. They are not kept in the identity map.
+
+        Raises:
+            Exception: If the query fails (logged first), so that a truncated stream is never taken for a complete one.
+        """
+        try:
+            for raw_addresses in self.db_connector.stream_query(
+                "SELECT * FROM address ORDER BY id_address", {}, fetch_size
+            ):
+                yield from [self._build_address(raw_address) for raw_address in raw_addresses]
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to stream addresses: {e}")
+            raise
+
     def add_address(self, address: Address) -> Optional[Address]:
         """Add a new address to the database.
 
@@ -70,7 +159,9 @@ class AddressDAO(BaseModel):
                 },
                 "one",
             )
-            return Address(**raw_created_address)
+            return self._address_from_row(raw_created_address)
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add address: {e}")
             return None
@@ -84,6 +175,7 @@ class AddressDAO(BaseModel):
         Returns:
             bool: True if update succeeded, False otherwise.
         """
+        forget("address", address.id_address)
         try:
             res = self.db_connector.sql_query(
                 """
@@ -105,6 +197,8 @@ class AddressDAO(BaseModel):
                 "one",
             )
             return res is not None
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to update address {address.id_address}: {e}")
             return False
@@ -118,6 +212,7 @@ class AddressDAO(BaseModel):
         Returns:
             bool: True if the deletion succeeded, False otherwise.
         """
+        forget("address", id_address)
         try:
             res = self.db_connector.sql_query(
                 "DELETE FROM address WHERE id_address = %(id_address)s RETURNING id_address;",
@@ -125,42 +220,98 @@ class AddressDAO(BaseModel):
                 "one",
             )
             return res is not None
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to delete address {id_address}: {e}")
             return False
 
+    @read_only
+    @statement_timeout(LOOKUP_TIMEOUT)
     def find_address_by_components(
         self, city: str, postal_code: int, street_name: str, street_number: Optional[str] = None
     ) -> Optional[Address]:
-        """
-        Finds an address by its exact components.
-        Handles null street numbers correctly.
+        """Find an address by its components, through the unique index on the normalized address key.
+
+        Case and extra spaces are ignored, so that "rue  de la Paix" finds "Rue de la Paix".
+
+        Args:
+            city: City of the address.
+            postal_code: Postal code of the address.
+            street_name: Name of the street.
+            street_number: Street number, if any.
+
+        Returns:
+            Optional[Address]: The matching address, or None if there is none.
         """
         try:
-            query = """
-                     SELECT * FROM address
-                     WHERE city = %(city)s
-                     AND postal_code = %(postal_code)s
-                     AND street_name = %(street_name)s
-                 """
-            params = {
-                "city": city,
-                "postal_code": str(postal_code),
-                "street_name": street_name,
-            }
-
-            if street_number:
-                query += " AND street_number = %(street_number)s"
-                params["street_number"] = street_number
-            else:
-                query += " AND street_number IS NULL"
-
-            raw_address = self.db_connector.sql_query(query, params, "one")
+            raw_address = self.db_connector.sql_query(
+                """
+                SELECT * FROM address
+                WHERE address_key = address_key(%(city)s, %(postal_code)s, %(street_name)s, %(street_number)s)
+                """,
+                self._key_components(city, postal_code, street_name, street_number),
+                "one",
+            )
 
             if raw_address is None:
                 return None
-            return Address(**raw_address)
+            return self._address_from_row(raw_address)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to find address by components: {e}")
             return None
+
+    def upsert_address(self, address: Address) -> Optional[Address]:
+        """Return the stored address with the same normalized key, inserting it first if there is none.
+
+        A single statement: concurrent checkouts of the same new address cannot create duplicates,
+        the unique index on address_key makes all but one insertion a no-op.
+
+        Args:
+            address: The Address object to find or add.
+
+        Returns:
+            Address: The stored address with its ID, or None if failed.
+        """
+        components = self._key_components(address.city, address.postal_code, address.street_name, address.street_number)
+        try:
+            raw_address = self.db_connector.sql_query(
+                """
+                WITH inserted AS (
+                    INSERT INTO address (city, postal_code, street_name, street_number)
+                    VALUES (%(city)s, %(postal_code)s, %(street_name)s, %(street_number)s)
+                    ON CONFLICT (address_key) DO NOTHING
+                    RETURNING *
+                )
+                SELECT * FROM inserted
+                UNION ALL
+                SELECT * FROM address
+                WHERE address_key = address_key(%(city)s, %(postal_code)s, %(street_name)s, %(street_number)s)
+                LIMIT 1
+                """,
+                components,
+                "one",
+            )
+            if raw_address is None:
+                # The conflicting row was committed by a concurrent transaction after this statement
+                # started: it is visible to the next one. Read from the primary (this method is not
+                # @read_only), since a replica may not have received that row yet.
+                raw_address = self.db_connector.sql_query(
+                    """
+                    SELECT * FROM address
+                    WHERE address_key = address_key(%(city)s, %(postal_code)s, %(street_name)s, %(street_number)s)
+                    """,
+                    components,
+                    "one",
+                )
+            if raw_address is None:
+                return None
+            return self._address_from_row(raw_address)
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to upsert address: {e}")
+            return None
@@ -0,0 +1,171 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from .DBConnector import DBConnector
+from .query_limits import REPORT_TIMEOUT, QueryCancelledError, statement_timeout
+from .replica_routing import read_only
+
+# Orders still in the cart are not sales. The partial index idx_order_sales_date covers this filter.
+_SOLD_ORDERS = """
+    o.status <> 'pending'
+    AND o.order_date >= %(since)s
+    AND o.order_date < %(until)s
+"""
+
+
+class AnalyticsDAO:
+    """
+    Sales aggregates computed by the database, so that their cost depends on the reported
+    period and not on the whole order history.
+    """
+
+    db_connector: DBConnector
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+
+    @read_only
+    @statement_timeout(REPORT_TIMEOUT)
+    def revenue_by_period(self, since: datetime, until: datetime, bucket: str = "day") -> List[dict]:
+        """Number of orders and revenue per period.
+
+        Args:
+            since: Start of the reported period (included).
+            until: End of the reported period (excluded).
+            bucket: Length of the periods: "day", "week" or "month".
+
+        Returns:
+            List[dict]: One {"period", "orders", "revenue"} row per period with sales, in chronological order
+            (empty on failure).
+        """
+        try:
+            return self.db_connector.sql_query(
+                f"""
+                SELECT date_trunc(%(bucket)s, o.order_date) AS period,
+                       COUNT(*) AS orders,
+                       COALESCE(SUM(o.price), 0) AS revenue
+                FROM "order" o
+                WHERE {_SOLD_ORDERS}
+                GROUP BY period
+                ORDER BY period
+                """,
+                {"bucket": bucket, "since": since, "until": until},
+                "all",
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to compute the revenue per {bucket}: {e}")
+            return []
+
+    @read_only
+    @statement_timeout(REPORT_TIMEOUT)
+    def top_items(self, since: datetime, until: datetime, limit: int = 10) -> List[dict]:
+        """Best-selling items of a period.
+
+        Order lines do not store prices, so the revenue of an item is computed at its current price.
+
+        Args:
+            since: Start of the reported period (included).
+            until: End of the reported period (excluded).
+            limit: Maximum number of items returned.
+
+        Returns:
+            List[dict]: {"id_item", "name", "item_type", "quantity", "revenue"} rows, by decreasing revenue
+            (empty on failure).
+        """
+        try:
+            return self.db_connector.sql_query(
+                f"""
+                SELECT i.id_item, i.name, i.item_type,
+                       SUM(oi.quantity) AS quantity,
+                       SUM(oi.quantity * i.price) AS revenue
+                FROM "order" o
+                JOIN order_item oi ON oi.id_order = o.id_order
+                JOIN item i ON i.id_item = oi.id_item
+                WHERE {_SOLD_ORDERS}
+                GROUP BY i.id_item
+                ORDER BY revenue DESC, i.id_item
+                LIMIT %(limit)s
+                """,
+                {"since": since, "until": until, "limit": limit},
+                "all",
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to compute the top items: {e}")
+            return []
+
+    @read_only
+    @statement_timeout(REPORT_TIMEOUT)
+    def top_bundles(self, since: datetime, until: datetime, limit: int = 10) -> List[dict]:
+        """Best-selling bundles of a period, at the price they were sold at.
+
+        Args:
+            since: Start of the reported period (included).
+            until: End of the reported period (excluded).
+            limit: Maximum number of bundles returned.
+
+        Returns:
+            List[dict]: {"id_bundle", "name", "bundle_type", "quantity", "revenue"} rows, by decreasing revenue
+            (empty on failure).
+        """
+        try:
+            return self.db_connector.sql_query(
+                f"""
+                SELECT b.id_bundle, b.name, b.bundle_type,
+                       SUM(ob.quantity) AS quantity,
+                       SUM(ob.price) AS revenue
+                FROM "order" o
+                JOIN order_bundle ob ON ob.id_order = o.id_order
+                JOIN bundle b ON b.id_bundle = ob.id_bundle
+                WHERE {_SOLD_ORDERS}
+                GROUP BY b.id_bundle
+                ORDER BY revenue DESC, b.id_bundle
+                LIMIT %(limit)s
+                """,
+                {"since": since, "until": until, "limit": limit},
+                "all",
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to compute the top bundles: {e}")
+            return []
+
+    @read_only
+    @statement_timeout(REPORT_TIMEOUT)
+    def dashboard_counters(self) -> Optional[dict]:
+        """Live counters of the admin dashboard.
+
+        They are maintained by triggers in the same transaction as the writes to "order" and delivery
+        (see dashboard_counter and daily_sales), so this is a single read of a few indexed rows.
+
+        Returns:
+            Optional[dict]: The number of orders per status ("pending_orders", "validated_orders",
+            "in_progress_orders", "delivered_orders"), "active_drivers" (drivers with a delivery in
+            progress), and "orders_today" and "revenue_today" (orders sold today). None on failure.
+        """
+        try:
+            return self.db_connector.sql_query(
+                """
+                SELECT
+                    COALESCE(MAX(c.value) FILTER (WHERE c.counter = 'orders_pending'), 0) AS pending_orders,
+                    COALESCE(MAX(c.value) FILTER (WHERE c.counter = 'orders_validated'), 0) AS validated_orders,
+                    COALESCE(MAX(c.value) FILTER (WHERE c.counter = 'orders_in_progress'), 0) AS in_progress_orders,
+                    COALESCE(MAX(c.value) FILTER (WHERE c.counter = 'orders_delivered'), 0) AS delivered_orders,
+                    COALESCE(MAX(c.value) FILTER (WHERE c.counter = 'active_drivers'), 0) AS active_drivers,
+                    COALESCE((SELECT s.orders FROM daily_sales s WHERE s.day = CURRENT_DATE), 0) AS orders_today,
+                    COALESCE((SELECT s.revenue FROM daily_sales s WHERE s.day = CURRENT_DATE), 0) AS revenue_today
+                FROM dashboard_counter c
+                """,
+                None,
+                "one",
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to read the dashboard counters: {e}")
+            return None
@@ -0,0 +1,38 @@
+from typing import Any, Callable, Hashable, Iterable, List
+
+from src.DAO.identity_map import current_identity_map
+
+
+def defer(kind: str, keys: Iterable[Hashable]) -> None:
+    """
+    Announces keys that are about to be loaded one by one in the current scope.
+    The next load of this kind resolves all of them with a single set-based query.
+    Does nothing outside of an identity scope.
+    """
+    identity_map = current_identity_map()
+    if identity_map is None:
+        return
+    pending = identity_map.pending.setdefault(kind, set())
+    pending.update(key for key in keys if key is not None and identity_map.get(kind, key) is None)
+
+
+def load_batched(kind: str, key: Hashable, fetch_many: Callable[[List[Hashable]], Any]) -> bool:
+    """
+    Loads a key together with every deferred key of its kind through one call to `fetch_many`,
+    which must map each entity it finds in the identity map.
+
+    Returns:
+        bool: True if the batch was fetched (the entity, if it exists, is now mapped). False when
+        there is nothing to batch with, in which case the caller runs its usual single-key query.
+    """
+    identity_map = current_identity_map()
+    if identity_map is None:
+        return False
+
+    pending = identity_map.pending.pop(kind, set())
+    pending.discard(key)
+    if not pending:
+        return False
+
+    fetch_many([key, *pending])
+    return True
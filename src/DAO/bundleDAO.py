@@ -1,20 +1,40 @@
 import logging
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, ConfigDict
 
 from src.DAO.DBConnector import DBConnector
 from src.DAO.itemDAO import ItemDAO
+from src.DAO.query_limits import LISTING_TIMEOUT, QueryCancelledError, statement_timeout
+from src.DAO.replica_routing import read_only
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.predefined_bundle import PredefinedBundle
 
 
+def composition_fingerprint(bundle_type: Literal["predefined", "discount"], components: List[Union[int, str]]) -> str:
+    """
+    Canonical form of the composition of a bundle, stored in bundle.composition_fingerprint (unique):
+    the sorted item IDs of a predefined bundle, or the sorted lower-cased item types of a discounted one.
+    """
+    if bundle_type == "discount":
+        components = [component.lower() for component in components]
+    return f"{bundle_type}:" + ",".join(str(component) for component in sorted(components))
+
+
+def _bundle_fingerprint(bundle: Union[PredefinedBundle, DiscountedBundle]) -> str:
+    if isinstance(bundle, PredefinedBundle):
+        item_ids = [item.id_item if hasattr(item, "id_item") else item for item in bundle.composition]
+        return composition_fingerprint("predefined", item_ids)
+    return composition_fingerprint("discount", bundle.required_item_types)
+
+
 class BundleDAO(BaseModel):
     db_connector: DBConnector
     item_dao: ItemDAO
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @read_only
     def _load_required_item_types(self, bundle_id: int) -> List[str]:
         raw_types = self.db_connector.sql_query(
             """
@@ -51,6 +71,7 @@ class BundleDAO(BaseModel):
                 None,
             )
 
+    @read_only
     def find_bundle_by_id(self, bundle_id: int) -> Optional[Union[PredefinedBundle, DiscountedBundle]]:
         try:
             raw_bundle = self.db_connector.sql_query(
@@ -107,10 +128,14 @@ class BundleDAO(BaseModel):
             else:
                 return None
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch bundle {bundle_id}: {e}")
             return None
 
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
     def find_all_bundles(self) -> List[Union[PredefinedBundle, DiscountedBundle]]:
         try:
             raw_bundles = self.db_connector.sql_query("SELECT id_bundle FROM bundle", {}, "all")
@@ -122,19 +147,61 @@ class BundleDAO(BaseModel):
                     bundles.append(bundle)
 
             return bundles
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch all bundles: {e}")
             return []
 
+    @read_only
+    def find_bundle_id_by_name(self, name: str) -> Optional[int]:
+        """Returns the ID of the bundle with this name, whatever its case (probes the unique index on lower(name))."""
+        try:
+            raw_bundle = self.db_connector.sql_query(
+                "SELECT id_bundle FROM bundle WHERE lower(name) = lower(%(name)s)", {"name": name}, "one"
+            )
+            return raw_bundle["id_bundle"] if raw_bundle else None
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to find bundle named {name}: {e}")
+            return None
+
+    @read_only
+    def find_bundle_id_by_composition(
+        self, bundle_type: Literal["predefined", "discount"], components: List[Union[int, str]]
+    ) -> Optional[int]:
+        """
+        Returns the ID of the bundle of this type with the same composition (item IDs or item types,
+        in any order), through the unique index on the composition fingerprint.
+        """
+        try:
+            raw_bundle = self.db_connector.sql_query(
+                "SELECT id_bundle FROM bundle WHERE composition_fingerprint = %(fingerprint)s",
+                {"fingerprint": composition_fingerprint(bundle_type, components)},
+                "one",
+            )
+            return raw_bundle["id_bundle"] if raw_bundle else None
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to find bundle by composition: {e}")
+            return None
+
     def add_predefined_bundle(self, bundle: PredefinedBundle) -> Optional[PredefinedBundle]:
         try:
             raw_created_bundle = self.db_connector.sql_query(
                 """
-                INSERT INTO bundle (name, description, bundle_type, price, discount)
-                VALUES (%(name)s, %(description)s, 'predefined', %(price)s, NULL)
+                INSERT INTO bundle (name, description, bundle_type, price, discount, composition_fingerprint)
+                VALUES (%(name)s, %(description)s, 'predefined', %(price)s, NULL, %(fingerprint)s)
                 RETURNING *;
                 """,
-                {"name": bundle.name, "description": getattr(bundle, "description", None), "price": bundle.price},
+                {
+                    "name": bundle.name,
+                    "description": getattr(bundle, "description", None),
+                    "price": bundle.price,
+                    "fingerprint": _bundle_fingerprint(bundle),
+                },
                 "one",
             )
 
@@ -153,6 +220,8 @@ class BundleDAO(BaseModel):
 
             logging.info(f"Added predefined bundle: {bundle.name}")
             return self.find_bundle_by_id(id_bundle)
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add predefined bundle: {e}")
             return None
@@ -161,14 +230,15 @@ class BundleDAO(BaseModel):
         try:
             raw_created_bundle = self.db_connector.sql_query(
                 """
-                INSERT INTO bundle (name, description, bundle_type, price, discount)
-                VALUES (%(name)s, %(description)s, 'discount', NULL, %(discount)s)
+                INSERT INTO bundle (name, description, bundle_type, price, discount, composition_fingerprint)
+                VALUES (%(name)s, %(description)s, 'discount', NULL, %(discount)s, %(fingerprint)s)
                 RETURNING *;
                 """,
                 {
                     "name": bundle.name,
                     "description": getattr(bundle, "description", None),
                     "discount": bundle.discount,
+                    "fingerprint": _bundle_fingerprint(bundle),
                 },
                 "one",
             )
@@ -180,6 +250,8 @@ class BundleDAO(BaseModel):
             logging.info(f"Added discounted bundle: {bundle.name}")
             return self.find_bundle_by_id(id_bundle)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add discounted bundle: {e}")
             return None
@@ -192,7 +264,8 @@ class BundleDAO(BaseModel):
                     UPDATE bundle
                     SET name = %(name)s,
                         description = %(description)s,
-                        price = %(price)s
+                        price = %(price)s,
+                        composition_fingerprint = %(fingerprint)s
                     WHERE id_bundle = %(id_bundle)s
                     """,
                     {
@@ -200,6 +273,7 @@ class BundleDAO(BaseModel):
                         "name": bundle.name,
                         "description": getattr(bundle, "description", None),
                         "price": bundle.price,
+                        "fingerprint": _bundle_fingerprint(bundle),
                     },
                     None,
                 )
@@ -225,7 +299,8 @@ class BundleDAO(BaseModel):
                     UPDATE bundle
                     SET name = %(name)s,
                         description = %(description)s,
-                        discount = %(discount)s
+                        discount = %(discount)s,
+                        composition_fingerprint = %(fingerprint)s
                     WHERE id_bundle = %(id_bundle)s
                     """,
                     {
@@ -233,6 +308,7 @@ class BundleDAO(BaseModel):
                         "name": bundle.name,
                         "description": getattr(bundle, "description", None),
                         "discount": bundle.discount,
+                        "fingerprint": _bundle_fingerprint(bundle),
                     },
                     None,
                 )
@@ -241,6 +317,8 @@ class BundleDAO(BaseModel):
 
             logging.info(f"Updated bundle: {bundle.name}")
             return True
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to update bundle {bundle.id_bundle}: {e}")
             return False
@@ -261,6 +339,8 @@ class BundleDAO(BaseModel):
 
             logging.info(f"Deleted bundle with ID: {bundle_id}")
             return True
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to delete bundle {bundle_id}: {e}")
             return False
\ No newline at end of file
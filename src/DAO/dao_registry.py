@@ -0,0 +1,76 @@
+import threading
+
+from .addressDAO import AddressDAO
+from .analyticsDAO import AnalyticsDAO
+from .bundleDAO import BundleDAO
+from .DBConnector import DBConnector
+from .deliveryDAO import DeliveryDAO
+from .itemDAO import ItemDAO
+from .orderDAO import OrderDAO
+from .userDAO import UserDAO
+
+
+class shared:
+    """
+    Attribute computed by its method on first access, then stored on the instance and shared by
+    every later access. The first computation is serialized by the `_lock` of the instance, so
+    that threads racing on it still get a single object.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with instance._lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.build(instance)
+        return instance.__dict__[self.name]
+
+
+class DAORegistry:
+    """
+    The DAOs of a connector, each built on first use and shared by all the services, so that they
+    share the same dependencies (and their caches).
+    """
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+        self._lock = threading.RLock()
+
+    @shared
+    def item_dao(self) -> ItemDAO:
+        return ItemDAO(db_connector=self.db_connector)
+
+    @shared
+    def user_dao(self) -> UserDAO:
+        return UserDAO(db_connector=self.db_connector)
+
+    @shared
+    def address_dao(self) -> AddressDAO:
+        return AddressDAO(db_connector=self.db_connector)
+
+    @shared
+    def bundle_dao(self) -> BundleDAO:
+        return BundleDAO(db_connector=self.db_connector, item_dao=self.item_dao)
+
+    @shared
+    def order_dao(self) -> OrderDAO:
+        return OrderDAO(
+            db_connector=self.db_connector,
+            item_dao=self.item_dao,
+            user_dao=self.user_dao,
+            address_dao=self.address_dao,
+            bundle_dao=self.bundle_dao,
+        )
+
+    @shared
+    def delivery_dao(self) -> DeliveryDAO:
+        return DeliveryDAO(db_connector=self.db_connector, user_dao=self.user_dao, order_dao=self.order_dao)
+
+    @shared
+    def analytics_dao(self) -> AnalyticsDAO:
+        return AnalyticsDAO(db_connector=self.db_connector)
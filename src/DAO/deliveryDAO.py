@@ -1,8 +1,15 @@
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional
 
+from src.DAO.batch_loader import defer
 from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import identity_scope, outside_identity_scope
 from src.DAO.orderDAO import OrderDAO
+from src.DAO.query_limits import LISTING_TIMEOUT, QueryCancelledError, statement_timeout
+from src.DAO.relation_loader import RelationLoader
+from src.DAO.replica_routing import read_only
+from src.DAO.trusted_rows import build
 from src.DAO.userDAO import UserDAO
 from src.Model.delivery import Delivery
 from src.Model.order import Order
@@ -18,6 +25,51 @@ class DeliveryDAO:
         self.user_dao = user_dao
         self.order_dao = order_dao
 
+    def _build_lazy_deliveries(self, raw_deliveries: List[dict]) -> List[Delivery]:
+        """Build deliveries whose driver and orders are fetched on first access, for all of them at once."""
+        deliveries = [
+            Delivery.model_construct(
+                id_delivery=raw_delivery["id_delivery"],
+                status=raw_delivery["status"],
+                delivery_time=raw_delivery["delivery_time"],
+            )
+            for raw_delivery in raw_deliveries
+        ]
+        RelationLoader(deliveries, raw_deliveries, {"driver": self._fetch_drivers, "orders": self._fetch_orders})
+        return deliveries
+
+    def _fetch_drivers(self, deliveries: List[Delivery], raw_deliveries: List[dict]) -> None:
+        id_drivers = {raw["id_driver"] for raw in raw_deliveries if raw["id_driver"] is not None}
+        drivers = {driver.id_user: driver for driver in self.user_dao.find_users_by_ids(list(id_drivers))}
+        for delivery, raw_delivery in zip(deliveries, raw_deliveries, strict=True):
+            delivery.driver = drivers.get(raw_delivery["id_driver"])
+
+    def _fetch_orders(self, deliveries: List[Delivery], raw_deliveries: List[dict]) -> None:
+        try:
+            raw_orders = self.db_connector.sql_query(
+                """
+                SELECT dor.id_delivery, o.*
+                FROM delivery_order dor
+                JOIN "order" o ON o.id_order = dor.id_order
+                WHERE dor.id_delivery = ANY(%(id_deliveries)s::int[])
+                ORDER BY dor.id_delivery, o.id_order
+                """,
+                {"id_deliveries": [raw_delivery["id_delivery"] for raw_delivery in raw_deliveries]},
+                "all",
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch orders of deliveries: {e}")
+            raw_orders = []
+
+        orders_by_delivery = {}
+        for order, raw_order in zip(self.order_dao.build_lazy_orders(raw_orders), raw_orders, strict=True):
+            orders_by_delivery.setdefault(raw_order["id_delivery"], []).append(order)
+        for delivery in deliveries:
+            delivery.orders = orders_by_delivery.get(delivery.id_delivery, [])
+
+    @read_only
     def find_delivery_by_id(self, id_delivery: int) -> Optional[Delivery]:
         """Find a delivery by its ID.
 
@@ -44,74 +96,140 @@ class DeliveryDAO:
                 "all",
             )
 
-            orders = []
-            for order_data in raw_order_ids:
-                order = self.order_dao.find_order_by_id(order_data["id_order"])
-                if order:
-                    orders.append(order)
+            with identity_scope():
+                defer("order_row", [order_data["id_order"] for order_data in raw_order_ids])
+                orders = []
+                for order_data in raw_order_ids:
+                    order = self.order_dao.find_order_by_id(order_data["id_order"])
+                    if order:
+                        orders.append(order)
 
-            return Delivery(
+            return build(
+                Delivery,
                 id_delivery=raw_delivery["id_delivery"],
                 driver=driver,
                 orders=orders,
                 status=raw_delivery["status"],
                 delivery_time=raw_delivery["delivery_time"],
             )
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch delivery {id_delivery}: {e}")
             return None
 
-    def find_all_deliveries(self) -> List[Delivery]:
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
+    def find_all_deliveries(self, lazy: bool = False) -> List[Delivery]:
         """Returns a list of all Delivery objects from the database.
 
+        Args:
+            lazy: If True, drivers and orders are only fetched on first access, with one query
+                per relation for all the deliveries. Otherwise every delivery is fully loaded.
+
         Returns:
             List[Delivery]: A list of Delivery objects (empty if no deliveries exist).
         """
         try:
             raw_deliveries = self.db_connector.sql_query("SELECT * FROM delivery", {}, "all")
+            if lazy:
+                return self._build_lazy_deliveries(raw_deliveries)
 
-            deliveries = []
-            for delivery_data in raw_deliveries:
-                driver = None
-                if delivery_data["id_driver"] is not None:
-                    driver = self.user_dao.find_user_by_id(delivery_data["id_driver"])
-
-                raw_order_ids = self.db_connector.sql_query(
-                    """
-                    SELECT id_order 
-                    FROM delivery_order 
-                    WHERE id_delivery = %(id_delivery)s
-                    """,
-                    {"id_delivery": delivery_data["id_delivery"]},
-                    "all",
-                )
-
-                orders = []
-                for order_data in raw_order_ids:
-                    order = self.order_dao.find_order_by_id(order_data["id_order"])
-                    if order:
-                        orders.append(order)
-
-                deliveries.append(
-                    Delivery(
-                        id_delivery=delivery_data["id_delivery"],
-                        driver=driver,
-                        orders=orders,
-                        status=delivery_data["status"],
-                        delivery_time=delivery_data["delivery_time"],
+            raw_links = self.db_connector.sql_query(
+                """
+                SELECT id_delivery, id_order
+                FROM delivery_order
+                WHERE id_delivery = ANY(%(id_deliveries)s::int[])
+                ORDER BY id_delivery, id_order
+                """,
+                {"id_deliveries": [delivery_data["id_delivery"] for delivery_data in raw_deliveries]},
+                "all",
+            )
+            order_ids_by_delivery = {}
+            for raw_link in raw_links or []:
+                order_ids_by_delivery.setdefault(raw_link["id_delivery"], []).append(raw_link["id_order"])
+
+            with identity_scope():
+                defer("user", [delivery_data["id_driver"] for delivery_data in raw_deliveries])
+                defer("order_row", [raw_link["id_order"] for raw_link in raw_links or []])
+                deliveries = []
+                for delivery_data in raw_deliveries:
+                    driver = None
+                    if delivery_data["id_driver"] is not None:
+                        driver = self.user_dao.find_user_by_id(delivery_data["id_driver"])
+
+                    orders = []
+                    for id_order in order_ids_by_delivery.get(delivery_data["id_delivery"], []):
+                        order = self.order_dao.find_order_by_id(id_order)
+                        if order:
+                            orders.append(order)
+
+                    deliveries.append(
+                        build(
+                            Delivery,
+                            id_delivery=delivery_data["id_delivery"],
+                            driver=driver,
+                            orders=orders,
+                            status=delivery_data["status"],
+                            delivery_time=delivery_data["delivery_time"],
+                        )
                     )
-                )
 
             return deliveries
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch all deliveries: {e}")
             return []
 
-    def find_in_progress_deliveries_by_driver(self, driver_id: int) -> List[Delivery]:
+    def iter_deliveries(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fetch_size: Optional[int] = None,
+    ) -> Iterator[Delivery]:
+        """Stream the deliveries from a server-side cursor, in constant memory.
+
+        The deliveries of each fetched chunk are fully loaded together (drivers, orders and their
+        relations with one query each) and are not kept in the identity map.
+
+        Args:
+            since: If given, only the deliveries completed at or after this date are streamed.
+            until: If given, only the deliveries completed before this date are streamed.
+            fetch_size: Number of deliveries fetched per round trip (defaults to the connector's).
+
+        Yields:
+            Delivery objects, ordered by ID.
+
+        Raises:
+            Exception: If the query fails (logged first), so that a truncated stream is never taken for a complete one.
+        """
+        query = "SELECT * FROM delivery WHERE TRUE"
+        if since is not None:
+            query += " AND delivery_time >= %(since)s"
+        if until is not None:
+            query += " AND delivery_time < %(until)s"
+
+        try:
+            for raw_deliveries in self.db_connector.stream_query(
+                query + " ORDER BY id_delivery", {"since": since, "until": until}, fetch_size
+            ):
+                with outside_identity_scope():
+                    deliveries = [delivery.load_relations() for delivery in self._build_lazy_deliveries(raw_deliveries)]
+                yield from deliveries
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to stream deliveries: {e}")
+            raise
+
+    @read_only
+    def find_in_progress_deliveries_by_driver(self, driver_id: int, lazy: bool = False) -> List[Delivery]:
         """Retrieve all deliveries assigned to a given driver
         that are currently 'in_progress'.
         Args:
             driver_id (int): The driver's ID.
+            lazy (bool): If True, drivers and orders are only fetched on first access.
 
         Returns:
             List[Delivery]: A list of deliveries in progress for that driver.
@@ -127,15 +245,20 @@ class DeliveryDAO:
                 {"driver_id": driver_id},
                 "all",
             )
+            if lazy:
+                return self._build_lazy_deliveries(raw_deliveries)
 
-            deliveries = []
-            for raw_delivery in raw_deliveries:
-                delivery = self.find_delivery_by_id(raw_delivery["id_delivery"])
-                if delivery:
-                    deliveries.append(delivery)
+            with identity_scope():
+                deliveries = []
+                for raw_delivery in raw_deliveries:
+                    delivery = self.find_delivery_by_id(raw_delivery["id_delivery"])
+                    if delivery:
+                        deliveries.append(delivery)
 
             return deliveries
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch in-progress deliveries for driver {driver_id}: {e}")
             return []
@@ -170,6 +293,8 @@ class DeliveryDAO:
                 "one",
             )
             return res is not None
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to update delivery {delivery.id_delivery}: {e}")
             return False
@@ -210,6 +335,8 @@ class DeliveryDAO:
                 )
 
             return self.find_delivery_by_id(id_delivery)
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add delivery: {e}")
             return None
@@ -234,6 +361,8 @@ class DeliveryDAO:
                 "one",
             )
             return res is not None
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to delete delivery {id_delivery}: {e}")
             return False
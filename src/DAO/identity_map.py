@@ -0,0 +1,128 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+class IdentityMap:
+    """
+    Cache of the entities materialized during one request or unit of work.
+
+    Entities are keyed by their kind (the table they come from) and their primary key, so that
+    every DAO returns the same instance for the same row instead of querying and building it again.
+
+    `wrote` becomes True once the unit of work has written to the database: its later reads then go
+    to the primary rather than to a read replica that may not have the write yet.
+    """
+
+    def __init__(self) -> None:
+        self._entities: Dict[Tuple[str, Hashable], Any] = {}
+        self.pending: Dict[str, set] = {}
+        self.wrote = False
+
+    def get(self, kind: str, key: Hashable) -> Optional[Any]:
+        return self._entities.get((kind, key))
+
+    def add(self, kind: str, key: Hashable, entity: Any) -> Any:
+        """Registers an entity and returns the instance to use: the one already mapped, if any."""
+        return self._entities.setdefault((kind, key), entity)
+
+    def discard(self, kind: str, key: Hashable) -> None:
+        self._entities.pop((kind, key), None)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+
+_current_identity_map: ContextVar[Optional[IdentityMap]] = ContextVar("identity_map", default=None)
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    """Returns the identity map of the current scope, or None outside of any scope."""
+    return _current_identity_map.get()
+
+
+@contextmanager
+def identity_scope() -> Iterator[IdentityMap]:
+    """
+    Opens a unit of work in which every DAO shares one identity map.
+    Nested scopes reuse the map of the outermost one. Outside of any scope, nothing is cached.
+    """
+    identity_map = _current_identity_map.get()
+    if identity_map is not None:
+        yield identity_map
+        return
+
+    token = _current_identity_map.set(IdentityMap())
+    try:
+        yield _current_identity_map.get()
+    finally:
+        _current_identity_map.reset(token)
+
+
+@contextmanager
+def outside_identity_scope() -> Iterator[None]:
+    """
+    Suspends the current identity map, so that nothing loaded in the block is cached.
+    Used by the streaming scans, whose entities would otherwise all stay mapped until the end of the request.
+    """
+    token = _current_identity_map.set(None)
+    try:
+        yield
+    finally:
+        _current_identity_map.reset(token)
+
+
+def in_identity_scope(func: Callable) -> Callable:
+    """Decorator running a function as one unit of work (see identity_scope)."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with identity_scope():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def lookup(kind: str, key: Hashable) -> Optional[Any]:
+    """Returns the mapped entity for a primary key, or None if it is not mapped (or outside of any scope)."""
+    identity_map = _current_identity_map.get()
+    if identity_map is None or key is None:
+        return None
+    return identity_map.get(kind, key)
+
+
+def lookup_many(kind: str, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+    """Splits primary keys into the already mapped entities and the keys still to load."""
+    found = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        entity = lookup(kind, key)
+        if entity is None:
+            missing.append(key)
+        else:
+            found[key] = entity
+    return found, missing
+
+
+def remember(kind: str, key: Hashable, entity: Any) -> Any:
+    """Maps a freshly loaded entity and returns the instance to use (the already mapped one wins)."""
+    identity_map = _current_identity_map.get()
+    if identity_map is None or key is None or entity is None:
+        return entity
+    return identity_map.add(kind, key, entity)
+
+
+def materialize(kind: str, key: Hashable, build: Callable[[], Any]) -> Any:
+    """Returns the mapped entity for a primary key, only building (and mapping) it when it is not mapped yet."""
+    entity = lookup(kind, key)
+    if entity is None:
+        entity = remember(kind, key, build())
+    return entity
+
+
+def forget(kind: str, key: Hashable) -> None:
+    """Drops an entity from the current map after it was written or deleted."""
+    identity_map = _current_identity_map.get()
+    if identity_map is not None:
+        identity_map.discard(kind, key)
@@ -1,8 +1,13 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from src.Model.item import Item
 
+from .batch_loader import load_batched
 from .DBConnector import DBConnector
+from .identity_map import forget, lookup, lookup_many, materialize
+from .query_limits import LISTING_TIMEOUT, statement_timeout
+from .replica_routing import read_only
+from .trusted_rows import build
 
 
 class ItemDAO:
@@ -11,16 +16,32 @@ class ItemDAO:
     def __init__(self, db_connector: DBConnector) -> None:
         self.db_connector = db_connector
 
+    @staticmethod
+    def _item_from_row(raw_item: dict) -> Item:
+        return materialize("item", raw_item["id_item"], lambda: build(Item, **raw_item))
+
+    @read_only
     def find_item_by_id(self, id_item: int) -> Item:
+        item = lookup("item", id_item)
+        if item is not None:
+            return item
+        if load_batched("item", id_item, self.get_items_by_ids):
+            return lookup("item", id_item)
+
         raw_item = self.db_connector.sql_query("SELECT * from item WHERE id_item=%s", [id_item], "one")
         if raw_item is None:
             return None
-        return Item(**raw_item)
+        return self._item_from_row(raw_item)
 
+    @read_only
     def get_items_by_ids(self, item_ids: List[int]) -> List[Item]:
         if not item_ids:
             return []
 
+        mapped_items, item_ids = lookup_many("item", item_ids)
+        if not item_ids:
+            return list(mapped_items.values())
+
         placeholders = ", ".join(["%s"] * len(item_ids))
 
         query = f"SELECT * FROM item WHERE id_item IN ({placeholders})"
@@ -28,15 +49,53 @@ class ItemDAO:
         raw_items = self.db_connector.sql_query(query, item_ids, "all")
 
         if not raw_items:
-            return []
+            return list(mapped_items.values())
 
-        return [Item(**raw_item) for raw_item in raw_items]
+        return list(mapped_items.values()) + [self._item_from_row(raw_item) for raw_item in raw_items]
 
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
     def find_all_items(self) -> list[Item]:
         raw_all_items = self.db_connector.sql_query("SELECT * FROM item", {}, "all")
-        return [Item(**item) for item in raw_all_items]
+        return [self._item_from_row(item) for item in raw_all_items]
+
+    @read_only
+    def find_items_by_type(self, item_type: str, available_only: bool = True) -> List[Item]:
+        """Returns the items of one type (by default only the available ones), cheapest first."""
+        query = "SELECT * FROM item WHERE item_type = %(item_type)s"
+        if available_only:
+            query += " AND availability"
+        raw_items = self.db_connector.sql_query(query + " ORDER BY price, id_item", {"item_type": item_type}, "all")
+        return [self._item_from_row(raw_item) for raw_item in raw_items or []]
+
+    @read_only
+    def find_item_id_by_name(self, name: str) -> Optional[int]:
+        """Returns the ID of the item with this name, whatever its case (probes the unique index on lower(name))."""
+        raw_item = self.db_connector.sql_query(
+            "SELECT id_item FROM item WHERE lower(name) = lower(%(name)s)", {"name": name}, "one"
+        )
+        return raw_item["id_item"] if raw_item else None
+
+    @read_only
+    def find_item_ids_by_names(self, names: List[str]) -> Dict[str, int]:
+        """Returns the IDs of the items with these names, by lower-cased name (one probe of idx_item_name)."""
+        if not names:
+            return {}
+        raw_items = self.db_connector.sql_query(
+            "SELECT id_item, lower(name) AS name FROM item WHERE lower(name) = ANY(%(names)s)",
+            {"names": sorted({name.lower() for name in names})},
+            "all",
+        )
+        return {raw_item["name"]: raw_item["id_item"] for raw_item in raw_items or []}
+
+    @read_only
+    def get_menu_version(self) -> int:
+        """Returns the version of the menu, bumped by the database on every write to the items or bundles."""
+        raw_version = self.db_connector.sql_query("SELECT version FROM menu_version", None, "one")
+        return raw_version["version"]
 
     def update_item(self, item: Item) -> bool:
+        forget("item", item.id_item)
         success_indicator = self.db_connector.sql_query(
             """
             UPDATE item
@@ -63,6 +122,155 @@ class ItemDAO:
             return success_indicator
         return True
 
+    def reserve_stock(self, quantities: Dict[int, int]) -> List[int]:
+        """Atomically decrements the stock of several items in a single statement.
+
+        The reservation is all-or-nothing: the rows are locked in id order, and the stock is only
+        decremented if every item exists and has enough stock. Items reaching zero are made
+        unavailable by the same statement.
+
+        Args:
+            quantities: Mapping of item ID to the quantity to reserve.
+
+        Returns:
+            List[int]: Sorted IDs of the items that could not be reserved (missing or not enough stock).
+            An empty list means that every quantity was reserved.
+        """
+        if not quantities:
+            return []
+
+        raw_failed = self.db_connector.sql_query(
+            """
+            WITH needed AS (
+                SELECT id_item, quantity
+                FROM unnest(%(id_items)s::int[], %(quantities)s::int[]) AS n(id_item, quantity)
+            ),
+            locked AS (
+                SELECT i.id_item, i.stock
+                FROM item i
+                JOIN needed n USING (id_item)
+                ORDER BY i.id_item
+                FOR UPDATE OF i
+            ),
+            failed AS (
+                SELECT n.id_item
+                FROM needed n
+                LEFT JOIN locked l USING (id_item)
+                WHERE l.stock IS NULL OR l.stock < n.quantity
+            ),
+            reserved AS (
+                UPDATE item i
+                SET stock = i.stock - n.quantity,
+                    availability = i.availability AND i.stock - n.quantity > 0
+                FROM needed n
+                WHERE i.id_item = n.id_item
+                AND i.stock >= n.quantity
+                AND NOT EXISTS (SELECT 1 FROM failed)
+                RETURNING i.id_item
+            )
+            SELECT id_item FROM failed ORDER BY id_item;
+            """,
+            {"id_items": list(quantities.keys()), "quantities": list(quantities.values())},
+            "all",
+        )
+        for id_item in quantities:
+            forget("item", id_item)
+        return [row["id_item"] for row in raw_failed]
+
+    def apply_item_batch(
+        self, new_items: List[Item], changed_items: List[Item], stock_deltas: Dict[int, int]
+    ) -> Tuple[List[Item], List[int]]:
+        """
+        Creates `new_items`, overwrites `changed_items` and adds `stock_deltas` to the stocks, in this
+        order and in one transaction, with one statement each.
+
+        A stock change that would make the stock negative is skipped; one that empties the stock makes
+        the item unavailable, and one that refills an empty stock makes it available again.
+
+        Args:
+            new_items (List[Item]): Items to create (with distinct names).
+            changed_items (List[Item]): Items to update, with all their values (at most once each).
+            stock_deltas (Dict[int, int]): Units to add to the stock, by item ID.
+
+        Returns:
+            Tuple[List[Item], List[int]]: The created items, in the order of `new_items`, and the IDs
+            of the items whose stock was changed.
+        """
+        for item in changed_items:
+            forget("item", item.id_item)
+        for id_item in stock_deltas:
+            forget("item", id_item)
+
+        with self.db_connector.transaction() as query:
+            raw_created = []
+            if new_items:
+                raw_created = query(
+                    """
+                    INSERT INTO item (name, item_type, price, description, stock, availability)
+                    SELECT name, item_type, price, description, stock, availability
+                    FROM unnest(
+                        %(names)s::text[], %(item_types)s::text[], %(prices)s::float[],
+                        %(descriptions)s::text[], %(stocks)s::int[], %(availabilities)s::boolean[]
+                    ) AS n(name, item_type, price, description, stock, availability)
+                    RETURNING *;
+                    """,
+                    self._columns(new_items),
+                    "all",
+                )
+            if changed_items:
+                query(
+                    """
+                    UPDATE item
+                    SET name = c.name,
+                        item_type = c.item_type,
+                        price = c.price,
+                        description = c.description,
+                        stock = c.stock,
+                        availability = c.availability
+                    FROM unnest(
+                        %(id_items)s::int[], %(names)s::text[], %(item_types)s::text[], %(prices)s::float[],
+                        %(descriptions)s::text[], %(stocks)s::int[], %(availabilities)s::boolean[]
+                    ) AS c(id_item, name, item_type, price, description, stock, availability)
+                    WHERE item.id_item = c.id_item;
+                    """,
+                    {"id_items": [item.id_item for item in changed_items], **self._columns(changed_items)},
+                    None,
+                )
+            raw_restocked = []
+            if stock_deltas:
+                raw_restocked = query(
+                    """
+                    UPDATE item
+                    SET stock = item.stock + d.delta,
+                        availability = CASE
+                            WHEN item.stock + d.delta = 0 THEN FALSE
+                            WHEN item.stock = 0 THEN TRUE
+                            ELSE item.availability
+                        END
+                    FROM unnest(%(id_items)s::int[], %(deltas)s::int[]) AS d(id_item, delta)
+                    WHERE item.id_item = d.id_item AND item.stock + d.delta >= 0
+                    RETURNING item.id_item;
+                    """,
+                    {"id_items": list(stock_deltas.keys()), "deltas": list(stock_deltas.values())},
+                    "all",
+                )
+
+        # Names are unique (idx_item_name): they map the returned rows back to the order of the batch.
+        created_by_name = {raw_item["name"].lower(): raw_item for raw_item in raw_created}
+        created = [self._item_from_row(created_by_name[item.name.lower()]) for item in new_items]
+        return created, [raw_item["id_item"] for raw_item in raw_restocked]
+
+    @staticmethod
+    def _columns(items: List[Item]) -> dict:
+        return {
+            "names": [item.name for item in items],
+            "item_types": [item.item_type for item in items],
+            "prices": [item.price for item in items],
+            "descriptions": [item.description for item in items],
+            "stocks": [item.stock for item in items],
+            "availabilities": [item.availability for item in items],
+        }
+
     def add_item(self, item: Item) -> Item:
         raw_created_item = self.db_connector.sql_query(
             """
@@ -80,9 +288,10 @@ class ItemDAO:
             },
             "one",
         )
-        return Item(**raw_created_item)
+        return build(Item, **raw_created_item)
 
     def delete_item(self, id_item: int) -> bool:
+        forget("item", id_item)
         success_indicator = self.db_connector.sql_query(
             """
             DELETE FROM item
@@ -1,15 +1,23 @@
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict
 
 from src.DAO.addressDAO import AddressDAO
+from src.DAO.batch_loader import defer, load_batched
 from src.DAO.bundleDAO import BundleDAO
 from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import forget, identity_scope, lookup, materialize, outside_identity_scope, remember
 from src.DAO.itemDAO import ItemDAO
+from src.DAO.query_limits import LISTING_TIMEOUT, QueryCancelledError, statement_timeout
+from src.DAO.relation_loader import RelationLoader
+from src.DAO.replica_routing import read_only
+from src.DAO.trusted_rows import build
 from src.DAO.userDAO import UserDAO
+from src.Model.item import Item
 from src.Model.order import Order
+from src.Model.order_line import OrderLine
 
 
 class OrderDAO(BaseModel):
@@ -21,6 +29,154 @@ class OrderDAO(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @staticmethod
+    def _order_columns(order: Order) -> dict:
+        # Relations of a lazy order that were never read cannot have changed, so they are left out.
+        columns = {"status": order.status, "price": order.price, "order_date": order.order_date}
+        if "customer" in order.__dict__:
+            columns["id_user"] = order.customer.id_user
+        if "address" in order.__dict__:
+            columns["id_address"] = order.address.id_address
+        return columns
+
+    def _remember_persisted_state(self, order: Order) -> None:
+        """Snapshots the order as stored in the database, so that later updates only write what changed."""
+        order._persisted_columns = {**(order._persisted_columns or {}), **self._order_columns(order)}
+        if "lines" in order.__dict__:
+            order._persisted_items = order.item_quantities()
+
+    def build_lazy_orders(self, raw_orders: List[dict]) -> List[Order]:
+        """Build orders from raw "order" rows without loading their relations.
+
+        Customer, address and lines are fetched on first access, with one query per relation
+        for all the orders built together.
+
+        Args:
+            raw_orders: Rows of the "order" table.
+
+        Returns:
+            List[Order]: The lazy orders, in the order of the rows.
+        """
+        orders = []
+        for raw_order in raw_orders:
+            order = Order.model_construct(
+                id_order=raw_order["id_order"],
+                status=raw_order["status"],
+                price=raw_order["price"],
+                order_date=raw_order["order_date"],
+            )
+            order._persisted_columns = {
+                "id_user": raw_order["id_user"],
+                "status": raw_order["status"],
+                "price": raw_order["price"],
+                "id_address": raw_order["id_address"],
+                "order_date": raw_order["order_date"],
+            }
+            orders.append(order)
+
+        RelationLoader(
+            orders,
+            raw_orders,
+            {"customer": self._fetch_customers, "address": self._fetch_addresses, "lines": self._fetch_lines},
+        )
+        return orders
+
+    def _fetch_customers(self, orders: List[Order], raw_orders: List[dict]) -> None:
+        id_users = {raw_order["id_user"] for raw_order in raw_orders if raw_order["id_user"] is not None}
+        customers = {customer.id_user: customer for customer in self.user_dao.find_users_by_ids(list(id_users))}
+        for order, raw_order in zip(orders, raw_orders, strict=True):
+            order.customer = customers.get(raw_order["id_user"])
+
+    def _fetch_addresses(self, orders: List[Order], raw_orders: List[dict]) -> None:
+        id_addresses = {raw_order["id_address"] for raw_order in raw_orders if raw_order["id_address"] is not None}
+        addresses = {
+            address.id_address: address for address in self.address_dao.find_addresses_by_ids(list(id_addresses))
+        }
+        for order, raw_order in zip(orders, raw_orders, strict=True):
+            order.address = addresses.get(raw_order["id_address"])
+
+    def _fetch_lines(self, orders: List[Order], raw_orders: List[dict]) -> None:
+        try:
+            lines_by_order = self._find_lines_by_order_ids([raw_order["id_order"] for raw_order in raw_orders])
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch lines of orders: {e}")
+            lines_by_order = {}
+        for order in orders:
+            order.lines = lines_by_order.get(order.id_order, [])
+            order._persisted_items = order.item_quantities()
+
+    @read_only
+    def _find_lines_by_order_ids(self, id_orders: List[int]) -> Dict[int, List[OrderLine]]:
+        """Fetch the lines of several orders with one query, sharing one Item instance per item."""
+        if not id_orders:
+            return {}
+
+        raw_lines = self.db_connector.sql_query(
+            """
+            SELECT oi.id_order, oi.quantity, i.*
+            FROM order_item oi
+            JOIN item i ON i.id_item = oi.id_item
+            WHERE oi.id_order = ANY(%(id_orders)s::int[])
+            ORDER BY oi.id_order, oi.id_item
+            """,
+            {"id_orders": id_orders},
+            "all",
+        )
+
+        items = {}
+        lines_by_order = {}
+        for line_data in raw_lines:
+            id_order = line_data.pop("id_order")
+            quantity = line_data.pop("quantity")
+            item = items.get(line_data["id_item"])
+            if item is None:
+                item = items[line_data["id_item"]] = materialize(
+                    "item", line_data["id_item"], lambda row=line_data: build(Item, **row)
+                )
+            lines_by_order.setdefault(id_order, []).append(build(OrderLine, item=item, quantity=quantity))
+        return lines_by_order
+
+    def stage_raw_orders(self, raw_orders: List[dict]) -> None:
+        """Map raw order rows for the find_order_by_id calls that follow in the current scope.
+
+        The customers, addresses and lines of the staged orders are deferred, so that they are
+        fetched with one query per kind instead of one query per order.
+
+        Args:
+            raw_orders: Rows of the "order" table.
+        """
+        for raw_order in raw_orders:
+            remember("order_row", raw_order["id_order"], raw_order)
+        defer("user", [raw_order["id_user"] for raw_order in raw_orders])
+        defer("address", [raw_order["id_address"] for raw_order in raw_orders])
+        defer("order_lines", [raw_order["id_order"] for raw_order in raw_orders])
+
+    @read_only
+    def _fetch_raw_orders(self, id_orders: List[int]) -> None:
+        raw_orders = self.db_connector.sql_query(
+            'SELECT * FROM "order" WHERE id_order = ANY(%(id_orders)s::int[])',
+            {"id_orders": id_orders},
+            "all",
+        )
+        self.stage_raw_orders(raw_orders)
+
+    def _stage_lines(self, id_orders: List[int]) -> None:
+        lines_by_order = self._find_lines_by_order_ids(id_orders)
+        for id_order in id_orders:
+            remember("order_lines", id_order, lines_by_order.get(id_order, []))
+
+    @staticmethod
+    def _take_staged(kind: str, key: int, fetch_many) -> Optional[object]:
+        """Pops a staged value, fetching the batch of deferred keys it belongs to if needed."""
+        staged = lookup(kind, key)
+        if staged is None and load_batched(kind, key, fetch_many):
+            staged = lookup(kind, key)
+        forget(kind, key)
+        return staged
+
+    @read_only
     def find_order_by_id(self, id_order: int) -> Optional[Order]:
         """Find an order by its ID.
 
@@ -31,11 +187,13 @@ class OrderDAO(BaseModel):
             Order object if found, None otherwise.
         """
         try:
-            raw_order = self.db_connector.sql_query(
-                'SELECT * FROM "order" WHERE id_order = %(id_order)s',
-                {"id_order": id_order},
-                "one",
-            )
+            raw_order = self._take_staged("order_row", id_order, self._fetch_raw_orders)
+            if raw_order is None:
+                raw_order = self.db_connector.sql_query(
+                    'SELECT * FROM "order" WHERE id_order = %(id_order)s',
+                    {"id_order": id_order},
+                    "one",
+                )
             if raw_order is None:
                 return None
 
@@ -47,56 +205,148 @@ class OrderDAO(BaseModel):
             if raw_order["id_address"] is not None:
                 address = self.address_dao.find_address_by_id(raw_order["id_address"])
 
-            raw_items = self.db_connector.sql_query(
-                """
-                SELECT i.*
-                FROM item i
-                JOIN order_item oi ON i.id_item = oi.id_item
-                WHERE oi.id_order = %(id_order)s
-                """,
-                {"id_order": id_order},
-                "all",
-            )
+            lines = self._take_staged("order_lines", id_order, self._stage_lines)
+            if lines is None:
+                raw_lines = self.db_connector.sql_query(
+                    """
+                    SELECT i.*, oi.quantity
+                    FROM item i
+                    JOIN order_item oi ON i.id_item = oi.id_item
+                    WHERE oi.id_order = %(id_order)s
+                    ORDER BY oi.id_item
+                    """,
+                    {"id_order": id_order},
+                    "all",
+                )
 
-            items = []
-            for item_data in raw_items:
-                item = self.item_dao.find_item_by_id(item_data["id_item"])
-                if item:
-                    items.append(item)
+                lines = []
+                for line_data in raw_lines:
+                    quantity = line_data.pop("quantity")
+                    item = materialize("item", line_data["id_item"], lambda row=line_data: build(Item, **row))
+                    lines.append(build(OrderLine, item=item, quantity=quantity))
 
-            return Order(
+            order = build(
+                Order,
                 id_order=raw_order["id_order"],
                 customer=customer,
                 address=address,
-                items=items,
+                lines=lines,
                 status=raw_order["status"],
                 price=raw_order["price"],
                 order_date=raw_order["order_date"],
             )
+            self._remember_persisted_state(order)
+            return order
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch order {id_order}: {e}")
             return None
 
-    def find_all_orders(self) -> List[Order]:
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
+    def find_all_orders(self, lazy: bool = False) -> List[Order]:
         """Returns a list of all Order objects from the database.
 
+        Args:
+            lazy: If True, the relations of the orders are only fetched on first access
+                (see build_lazy_orders). Otherwise every order is fully loaded.
+
         Returns:
             List[Order]: A list of Order objects (empty if no orders exist).
         """
         try:
             raw_orders = self.db_connector.sql_query('SELECT * FROM "order"', {}, "all")
+            return self._orders_from_rows(raw_orders, lazy)
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch all orders: {e}")
+            return []
+
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
+    def find_orders_by_status(self, status: str, lazy: bool = False) -> List[Order]:
+        """Returns the orders with a given status.
+
+        Only these orders are read, so that the relations of lazy orders are batched over them
+        and not over the whole order table.
 
+        Args:
+            status: The status of the orders to return.
+            lazy: If True, the relations of the orders are only fetched on first access
+                (see build_lazy_orders). Otherwise every order is fully loaded.
+
+        Returns:
+            List[Order]: The orders with this status, by ID (empty if there are none).
+        """
+        try:
+            raw_orders = self.db_connector.sql_query(
+                'SELECT * FROM "order" WHERE status = %(status)s ORDER BY id_order', {"status": status}, "all"
+            )
+            return self._orders_from_rows(raw_orders, lazy)
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch the orders with status {status}: {e}")
+            return []
+
+    def _orders_from_rows(self, raw_orders: List[dict], lazy: bool) -> List[Order]:
+        if lazy:
+            return self.build_lazy_orders(raw_orders)
+
+        with identity_scope():
+            self.stage_raw_orders(raw_orders)
             orders = []
             for order_data in raw_orders:
                 order = self.find_order_by_id(order_data["id_order"])
                 if order:
                     orders.append(order)
 
-            return orders
+        return orders
+
+    def iter_orders(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fetch_size: Optional[int] = None,
+    ) -> Iterator[Order]:
+        """Stream the orders from a server-side cursor, in constant memory.
+
+        The orders of each fetched chunk are fully loaded together, with one query per relation
+        for the whole chunk, and are not kept in the identity map.
+
+        Args:
+            since: If given, only the orders placed at or after this date are streamed.
+            until: If given, only the orders placed before this date are streamed.
+            fetch_size: Number of orders fetched per round trip (defaults to the connector's).
+
+        Yields:
+            Order objects, ordered by ID.
+
+        Raises:
+            Exception: If the query fails (logged first), so that a truncated stream is never taken for a complete one.
+        """
+        query = 'SELECT * FROM "order" WHERE TRUE'
+        if since is not None:
+            query += " AND order_date >= %(since)s"
+        if until is not None:
+            query += " AND order_date < %(until)s"
+
+        try:
+            for raw_orders in self.db_connector.stream_query(
+                query + " ORDER BY id_order", {"since": since, "until": until}, fetch_size
+            ):
+                with outside_identity_scope():
+                    orders = [order.load_relations() for order in self.build_lazy_orders(raw_orders)]
+                yield from orders
+        except QueryCancelledError:
+            raise
         except Exception as e:
-            logging.error(f"Failed to fetch all orders: {e}")
-            return []
+            logging.error(f"Failed to stream orders: {e}")
+            raise
 
+    @read_only
     def find_orders_by_customer(self, id_user: int) -> List[Order]:
         """Find all orders for a specific customer.
 
@@ -113,22 +363,28 @@ class OrderDAO(BaseModel):
                 "all",
             )
 
-            orders = []
-            for order_data in raw_orders:
-                order = self.find_order_by_id(order_data["id_order"])
-                if order:
-                    orders.append(order)
+            with identity_scope():
+                self.stage_raw_orders(raw_orders)
+                orders = []
+                for order_data in raw_orders:
+                    order = self.find_order_by_id(order_data["id_order"])
+                    if order:
+                        orders.append(order)
 
             return orders
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch orders for customer {id_user}: {e}")
             return []
 
-    def add_order(self, order: Order) -> Optional[Order]:
-        """Add a new order to the database.
+    def add_order(self, order: Order, bundle_sales: Optional[List[Tuple[int, float]]] = None) -> Optional[Order]:
+        """Add a new order, all its items and the bundles sold with it to the database in a single statement.
 
         Args:
             order: The Order object to add.
+            bundle_sales: (id_bundle, price) of each bundle sold in the order, recorded for the sales
+                analytics like record_bundle_sale does. Bundles that no longer exist are skipped.
 
         Returns:
             Order: The created order with its ID, or None if failed.
@@ -137,11 +393,28 @@ class OrderDAO(BaseModel):
             id_user = order.customer.id_user if hasattr(order.customer, "id_user") else order.customer
             id_address = order.address.id_address if hasattr(order.address, "id_address") else order.address
 
+            quantities = order.item_quantities()
+
             raw_created_order = self.db_connector.sql_query(
                 """
-                INSERT INTO "order" (id_user, status, price, id_address, order_date)
-                VALUES (%(id_user)s, %(status)s, %(price)s, %(id_address)s, %(order_date)s)
-                RETURNING *;
+                WITH created_order AS (
+                    INSERT INTO "order" (id_user, status, price, id_address, order_date)
+                    VALUES (%(id_user)s, %(status)s, %(price)s, %(id_address)s, %(order_date)s)
+                    RETURNING *
+                ),
+                created_items AS (
+                    INSERT INTO order_item (id_order, id_item, quantity)
+                    SELECT created_order.id_order, l.id_item, l.quantity
+                    FROM created_order, unnest(%(id_items)s::int[], %(quantities)s::int[]) AS l(id_item, quantity)
+                ),
+                created_bundles AS (
+                    INSERT INTO order_bundle (id_order, id_bundle, quantity, price)
+                    SELECT created_order.id_order, s.id_bundle, COUNT(*), SUM(s.price)
+                    FROM created_order, unnest(%(id_bundles)s::int[], %(bundle_prices)s::float[]) AS s(id_bundle, price)
+                    JOIN bundle b ON b.id_bundle = s.id_bundle
+                    GROUP BY created_order.id_order, s.id_bundle
+                )
+                SELECT * FROM created_order;
                 """,
                 {
                     "id_user": id_user,
@@ -149,32 +422,29 @@ class OrderDAO(BaseModel):
                     "price": order.price,
                     "id_address": id_address,
                     "order_date": order.order_date if hasattr(order, "order_date") else datetime.now(),
+                    "id_items": list(quantities.keys()),
+                    "quantities": list(quantities.values()),
+                    "id_bundles": [id_bundle for id_bundle, _ in bundle_sales or []],
+                    "bundle_prices": [price for _, price in bundle_sales or []],
                 },
                 "one",
             )
 
             id_order = raw_created_order["id_order"]
 
-            for item in order.items:
-                self.db_connector.sql_query(
-                    """
-                    INSERT INTO order_item (id_order, id_item)
-                    VALUES (%(id_order)s, %(id_item)s)
-                    """,
-                    {
-                        "id_order": id_order,
-                        "id_item": item.id_item,
-                    },
-                    None,
-                )
-
             return self.find_order_by_id(id_order)
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add order: {e}")
             return None
 
     def update_order(self, order: Order) -> bool:
-        """Update an existing order.
+        """Update an existing order, only writing what changed since it was loaded.
+
+        Only the dirty columns of the order row are updated, and the item multiset is diffed
+        against the stored one into at most one DELETE and one upsert. Orders that were not
+        loaded through this DAO are fully written.
 
         Args:
             order: The Order object with updated information.
@@ -183,52 +453,149 @@ class OrderDAO(BaseModel):
             bool: True if update succeeded, False otherwise.
         """
         try:
-            res = self.db_connector.sql_query(
+            columns = self._order_columns(order)
+            persisted_columns = order._persisted_columns
+            if persisted_columns is None:
+                dirty_columns = columns
+            else:
+                dirty_columns = {name: value for name, value in columns.items() if persisted_columns[name] != value}
+
+            if dirty_columns:
+                set_clause = ", ".join(f"{name} = %({name})s" for name in dirty_columns)
+                res = self.db_connector.sql_query(
+                    f"""
+                    UPDATE "order"
+                    SET {set_clause}
+                    WHERE id_order = %(id_order)s
+                    RETURNING id_order;
+                    """,
+                    {**dirty_columns, "id_order": order.id_order},
+                    "one",
+                )
+                if res is None:
+                    return False
+
+            # Lines of a lazy order that were never read cannot have changed.
+            if "lines" in order.__dict__:
+                quantities = order.item_quantities()
+                persisted_items = order._persisted_items
+
+                if persisted_items is None:
+                    self.db_connector.sql_query(
+                        """
+                        DELETE FROM order_item
+                        WHERE id_order = %(id_order)s
+                        AND NOT (id_item = ANY(%(id_items)s::int[]))
+                        """,
+                        {"id_order": order.id_order, "id_items": list(quantities.keys())},
+                        None,
+                    )
+                    changed_items = quantities
+                else:
+                    removed_ids = [id_item for id_item in persisted_items if id_item not in quantities]
+                    if removed_ids:
+                        self.db_connector.sql_query(
+                            """
+                            DELETE FROM order_item
+                            WHERE id_order = %(id_order)s
+                            AND id_item = ANY(%(id_items)s::int[])
+                            """,
+                            {"id_order": order.id_order, "id_items": removed_ids},
+                            None,
+                        )
+                    changed_items = {
+                        id_item: quantity
+                        for id_item, quantity in quantities.items()
+                        if persisted_items.get(id_item) != quantity
+                    }
+
+                if changed_items:
+                    self.db_connector.sql_query(
+                        """
+                        INSERT INTO order_item (id_order, id_item, quantity)
+                        SELECT %(id_order)s, l.id_item, l.quantity
+                        FROM unnest(%(id_items)s::int[], %(quantities)s::int[]) AS l(id_item, quantity)
+                        ON CONFLICT (id_order, id_item)
+                        DO UPDATE SET quantity = EXCLUDED.quantity
+                        """,
+                        {
+                            "id_order": order.id_order,
+                            "id_items": list(changed_items.keys()),
+                            "quantities": list(changed_items.values()),
+                        },
+                        None,
+                    )
+
+            self._remember_persisted_state(order)
+            return True
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to update order {order.id_order}: {e}")
+            return False
+
+    def update_order_status(self, id_orders: List[int], status: str) -> bool:
+        """Set the same status on several orders with a single statement.
+
+        Args:
+            id_orders: The IDs of the orders to update.
+            status: The new status of the orders.
+
+        Returns:
+            bool: True if every order was updated, False otherwise.
+        """
+        if not id_orders:
+            return True
+
+        try:
+            raw_updated = self.db_connector.sql_query(
                 """
                 UPDATE "order"
-                SET id_user = %(id_user)s,
-                    status = %(status)s,
-                    price = %(price)s,
-                    id_address = %(id_address)s,
-                    order_date = %(order_date)s
-                WHERE id_order = %(id_order)s
+                SET status = %(status)s
+                WHERE id_order = ANY(%(id_orders)s::int[])
                 RETURNING id_order;
                 """,
-                {
-                    "id_order": order.id_order,
-                    "id_user": order.customer.id_user,
-                    "status": order.status,
-                    "price": order.price,
-                    "id_address": order.address.id_address,
-                    "order_date": order.order_date,
-                },
-                "one",
+                {"id_orders": list(id_orders), "status": status},
+                "all",
             )
+            return len(raw_updated) == len(set(id_orders))
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to update the status of orders {id_orders}: {e}")
+            return False
+
+    def record_bundle_sale(self, id_order: int, id_bundle: int, price: float) -> bool:
+        """Record that a bundle was added to an order, for the sales analytics.
+
+        The items of the bundle are stored in order_item as usual; this only keeps track of
+        which bundle they were sold in, and at which price.
+
+        Args:
+            id_order: The ID of the order.
+            id_bundle: The ID of the bundle added to the order.
+            price: The price the bundle was sold at.
 
+        Returns:
+            bool: True if the sale was recorded, False otherwise.
+        """
+        try:
             self.db_connector.sql_query(
-                "DELETE FROM order_item WHERE id_order = %(id_order)s",
-                {"id_order": order.id_order},
+                """
+                INSERT INTO order_bundle (id_order, id_bundle, quantity, price)
+                VALUES (%(id_order)s, %(id_bundle)s, 1, %(price)s)
+                ON CONFLICT (id_order, id_bundle)
+                DO UPDATE SET quantity = order_bundle.quantity + 1,
+                              price = order_bundle.price + EXCLUDED.price
+                """,
+                {"id_order": id_order, "id_bundle": id_bundle, "price": price},
                 None,
             )
-
-            for item in order.items:
-                self.db_connector.sql_query(
-                """
-                INSERT INTO order_item (id_order, id_item, quantity)
-                    VALUES (%(id_order)s, %(id_item)s, 1)
-                    ON CONFLICT (id_order, id_item)
-                    DO UPDATE SET quantity = order_item.quantity + 1
-                    """,
-                    {
-                        "id_order": order.id_order,
-                        "id_item": item.id_item,
-                    },
-                    None,
-                )
-
-            return res is not None
+            return True
+        except QueryCancelledError:
+            raise
         except Exception as e:
-            logging.error(f"Failed to update order {order.id_order}: {e}")
+            logging.error(f"Failed to record the sale of bundle {id_bundle} in order {id_order}: {e}")
             return False
 
     def delete_order(self, id_order: int) -> bool:
@@ -259,6 +626,8 @@ class OrderDAO(BaseModel):
                 "one",
             )
             return res is not None
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to delete order {id_order}: {e}")
             return False
@@ -0,0 +1,102 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Set
+
+# Statement timeouts of the DAO methods, in seconds, tighter than the default of the connector: a
+# lookup by value or a full listing must not be able to hold a connection for long.
+LOOKUP_TIMEOUT = 5.0
+LISTING_TIMEOUT = 10.0
+REPORT_TIMEOUT = 20.0
+
+
+class QueryCancelledError(Exception):
+    """A query was cancelled server-side, because the client that needed its result went away."""
+
+
+class QueryTimeoutError(QueryCancelledError):
+    """A query ran longer than its statement timeout and was stopped by PostgreSQL."""
+
+    def __init__(self, timeout: Optional[float], message: str = ""):
+        self.timeout = timeout
+        super().__init__(message or f"The query exceeded its statement timeout ({timeout} s).")
+
+
+_statement_timeout: ContextVar[Optional[float]] = ContextVar("statement_timeout", default=None)
+
+
+@contextmanager
+def statement_timeout(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Limits the duration of each query run in the block (or by the decorated DAO method) to `seconds`,
+    instead of the default of the connector (POSTGRES_STATEMENT_TIMEOUT). 0 disables the limit.
+    """
+    token = _statement_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _statement_timeout.reset(token)
+
+
+def current_statement_timeout() -> Optional[float]:
+    """Timeout of the innermost statement_timeout block, or None to use the default of the connector."""
+    return _statement_timeout.get()
+
+
+class QueryCanceller:
+    """
+    Connections running queries on behalf of one request, so that they can be cancelled together
+    when the client disconnects.
+
+    A connection that was sent a cancel request is closed rather than reused, so that a late cancel
+    cannot interrupt the next query run on it.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._running: Set = set()
+        self._interrupted: Set = set()
+        self._lock = threading.Lock()
+
+    def track(self, connection) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("The request was cancelled.")
+            self._running.add(connection)
+
+    def untrack(self, connection) -> bool:
+        """Stops tracking a connection; returns True if it was interrupted and must be closed."""
+        with self._lock:
+            self._running.discard(connection)
+            interrupted = connection in self._interrupted
+            self._interrupted.discard(connection)
+            return interrupted
+
+    def cancel(self) -> None:
+        """Cancels the running queries, and makes the next ones fail immediately."""
+        with self._lock:
+            self.cancelled = True
+            for connection in self._running:
+                try:
+                    connection.cancel()
+                except Exception:
+                    continue
+                self._interrupted.add(connection)
+
+
+_canceller: ContextVar[Optional[QueryCanceller]] = ContextVar("query_canceller", default=None)
+
+
+@contextmanager
+def cancellation_scope() -> Iterator[QueryCanceller]:
+    """Tracks the queries run in the block (including in the worker threads it starts) so that they can be cancelled."""
+    canceller = QueryCanceller()
+    token = _canceller.set(canceller)
+    try:
+        yield canceller
+    finally:
+        _canceller.reset(token)
+
+
+def current_canceller() -> Optional[QueryCanceller]:
+    return _canceller.get()
@@ -0,0 +1,36 @@
+from typing import Callable, Dict, List
+
+from src.Model.lazy_model import LazyModel
+
+
+class RelationLoader:
+    """Fetches the relations of a group of sibling lazy models on first access.
+
+    The first time a relation is read on any model of the group, its fetcher is called once
+    for the whole group, so that N siblings cost one query per relation instead of N.
+
+    Args:
+        models: The sibling models, built with `model_construct`.
+        rows: The raw database rows the models were built from, in the same order.
+        fetchers: For each relation name, a function receiving (models, rows) and setting the
+            relation on every model.
+    """
+
+    def __init__(
+        self,
+        models: List[LazyModel],
+        rows: List[dict],
+        fetchers: Dict[str, Callable[[List[LazyModel], List[dict]], None]],
+    ) -> None:
+        self.models = models
+        self.rows = rows
+        self.fetchers = dict(fetchers)
+        for model in models:
+            for name in fetchers:
+                model.__dict__.pop(name, None)
+            model._relation_loader = self
+
+    def load(self, name: str) -> None:
+        fetcher = self.fetchers.pop(name, None)
+        if fetcher is not None:
+            fetcher(self.models, self.rows)
@@ -0,0 +1,111 @@
+import functools
+import itertools
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .identity_map import current_identity_map
+
+Endpoint = Tuple[str, str]
+
+_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+# Time (time.monotonic) of the last write of the current context, scoped or not.
+_last_write: ContextVar[Optional[float]] = ContextVar("last_write", default=None)
+
+
+def read_only(func: Callable) -> Callable:
+    """
+    Marks a DAO method as read-only: the SELECT queries it runs may be served by a read replica.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+
+    return wrapper
+
+
+def is_write(query: str) -> bool:
+    """Tells whether a query may modify the database (anything but a plain SELECT)."""
+    return not _SELECT.match(query) or bool(_LOCKING_READ.search(query))
+
+
+def record_write() -> None:
+    """
+    Pins the current unit of work to the primary, so that its next reads see what it wrote.
+    Outside a unit of work (or after it), the reads of the same context are pinned for a while.
+    """
+    _last_write.set(time.monotonic())
+    unit_of_work = current_identity_map()
+    if unit_of_work is not None:
+        unit_of_work.wrote = True
+
+
+def replica_allowed(query: str, read_only_query: bool = False, pinned_for: float = 5.0) -> bool:
+    """
+    Tells whether a query may be served by a replica: a plain SELECT run by a read-only DAO method
+    (or a streaming scan), in a unit of work that has not written yet, and not within `pinned_for`
+    seconds of a write of the current context (a replica may not have replayed it yet).
+    """
+    if not (read_only_query or _read_only.get()) or is_write(query):
+        return False
+    unit_of_work = current_identity_map()
+    if unit_of_work is not None and unit_of_work.wrote:
+        return False
+    last_write = _last_write.get()
+    return last_write is None or time.monotonic() - last_write >= pinned_for
+
+
+class ReplicaSet:
+    """
+    Read replicas used in turn (round-robin). A replica that fails is skipped for `retry_after`
+    seconds, after which it is tried again; when none is healthy, reads go to the primary.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], retry_after: float = 30.0):
+        self.endpoints = list(endpoints)
+        self.retry_after = retry_after
+        self._turn = itertools.count()
+        self._down_until: Dict[Endpoint, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(value: str, default_port: str) -> List[Endpoint]:
+        """Parses "host1:5433,host2" into [("host1", "5433"), ("host2", default_port)]."""
+        endpoints = []
+        for endpoint in filter(None, (part.strip() for part in value.split(","))):
+            host, _, port = endpoint.partition(":")
+            endpoints.append((host, port or str(default_port)))
+        return endpoints
+
+    def choose(self) -> Optional[Endpoint]:
+        """Returns the next healthy replica, or None if they are all down."""
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._turn)
+            for offset in range(len(self.endpoints)):
+                endpoint = self.endpoints[(start + offset) % len(self.endpoints)]
+                if self._down_until.get(endpoint, 0) <= now:
+                    return endpoint
+        return None
+
+    def mark_down(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            self._down_until[endpoint] = time.monotonic() + self.retry_after
+
+    def healthy(self) -> List[Endpoint]:
+        now = time.monotonic()
+        with self._lock:
+            return [endpoint for endpoint in self.endpoints if self._down_until.get(endpoint, 0) <= now]
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
@@ -0,0 +1,184 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+import psycopg2
+
+_PLACEHOLDER = re.compile(r"%%|%\((\w+)\)s|%s")
+_PREPARABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|VALUES)\b", re.IGNORECASE)
+# Errors after which the prepared statements of a session can no longer be trusted: statement
+# missing (e.g. DISCARD ALL) or cached plan invalidated by a schema change.
+_STALE_STATEMENT_CODES = {"26000", "0A000"}
+_MAX_TRACKED_QUERIES = 2000
+
+# (statement name, body of the PREPARE, names of the parameters or their number)
+Statement = Tuple[str, str, Union[List[str], int]]
+
+
+class StatementCache:
+    """
+    Server-side prepared statements for the queries run most often.
+
+    A query run `threshold` times is prepared (PREPARE) on each pooled connection the next time it
+    is run there, then executed by name (EXECUTE), so that PostgreSQL parses and plans it once per
+    connection instead of on every call. Each connection keeps at most `per_connection` statements,
+    the least recently used ones being deallocated first.
+
+    Queries that cannot be prepared (DDL, several statements, parameters whose type PostgreSQL
+    cannot infer...) are simply executed as before.
+    """
+
+    def __init__(self, threshold: int = 5, per_connection: int = 100):
+        self.threshold = threshold
+        self.per_connection = per_connection
+        self._lock = threading.Lock()
+        self._uses: Dict[str, int] = {}
+        self._compiled: Dict[Tuple[str, str], Optional[Statement]] = {}
+        # Connection -> names of its prepared statements (LRU order), None when they must be reset.
+        self._prepared: "WeakKeyDictionary[object, Optional[OrderedDict]]" = WeakKeyDictionary()
+        self.hits = 0
+        self.prepares = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    def attach(self, connection) -> None:
+        """Enables prepared statements on a (pooled) connection."""
+        if self.threshold > 0:
+            with self._lock:
+                if connection not in self._prepared:
+                    self._prepared[connection] = OrderedDict()
+
+    @staticmethod
+    def _style(data) -> str:
+        if data is None:
+            return "none"
+        return "named" if isinstance(data, dict) else "positional"
+
+    @staticmethod
+    def compile(query: str, style: str) -> Optional[Statement]:
+        """
+        Turns a psycopg2 query into the body of a PREPARE ($1, $2...), or None if it cannot be prepared.
+        `style` tells how the query is given its parameters: "named" (dict), "positional" (sequence)
+        or "none" (no parameters: psycopg2 then sends the query untouched).
+        """
+        if not _PREPARABLE.match(query) or ";" in query.strip().rstrip(";"):
+            return None
+        name = "s_" + hashlib.md5(f"{style}:{query}".encode()).hexdigest()[:20]
+        if style == "none":
+            return name, query.strip().rstrip(";"), 0
+
+        names: List[str] = []
+        positional = 0
+
+        def placeholder(match: re.Match) -> str:
+            nonlocal positional
+            if match.group(0) == "%%":
+                return "%"
+            if match.group(1) is None:
+                positional += 1
+                return f"${positional}"
+            if match.group(1) not in names:
+                names.append(match.group(1))
+            return f"${names.index(match.group(1)) + 1}"
+
+        body = _PLACEHOLDER.sub(placeholder, query.strip().rstrip(";"))
+        if (style == "named" and positional) or (style == "positional" and names):
+            return None
+        return name, body, names if style == "named" else positional
+
+    def _statement(self, query: str, data) -> Optional[Statement]:
+        with self._lock:
+            uses = self._uses.get(query, 0) + 1
+            if len(self._uses) >= _MAX_TRACKED_QUERIES and query not in self._uses:
+                self._uses.clear()
+            self._uses[query] = uses
+            if uses < self.threshold:
+                return None
+            key = (query, self._style(data))
+            if key not in self._compiled:
+                self._compiled[key] = self.compile(*key)
+            return self._compiled[key]
+
+    @staticmethod
+    def _arguments(statement: Statement, data) -> tuple:
+        parameters = statement[2]
+        if isinstance(parameters, list):
+            return tuple(data[name] for name in parameters)
+        if len(data or ()) != parameters:
+            raise ValueError(f"The query expects {parameters} parameters, {len(data)} given.")
+        return tuple(data or ())
+
+    def _prepare(self, cursor, query: str, data, statement: Statement, prepared: OrderedDict) -> bool:
+        name, body, _ = statement
+        # In a savepoint, so that a statement PostgreSQL refuses to prepare does not abort the transaction.
+        cursor.execute("SAVEPOINT prepare_statement")
+        try:
+            cursor.execute(f"PREPARE {name} AS {body}")
+        except psycopg2.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+            with self._lock:
+                self._compiled[(query, self._style(data))] = None
+                self.fallbacks += 1
+            return False
+        cursor.execute("RELEASE SAVEPOINT prepare_statement")
+
+        prepared[name] = None
+        evicted = prepared.popitem(last=False)[0] if len(prepared) > self.per_connection else None
+        if evicted:
+            cursor.execute(f"DEALLOCATE {evicted}")
+        with self._lock:
+            self.prepares += 1
+            self.evictions += evicted is not None
+        return True
+
+    def execute(self, connection, cursor, query: str, data=None) -> None:
+        """Executes a query on the cursor, by name if it is prepared (or worth preparing) on this connection."""
+        with self._lock:
+            attached = connection in self._prepared
+            prepared = self._prepared.get(connection)
+        statement = self._statement(query, data) if attached else None
+        if statement is None:
+            cursor.execute(query, data)
+            return
+
+        if prepared is None:
+            cursor.execute("DEALLOCATE ALL")
+            prepared = OrderedDict()
+            with self._lock:
+                self._prepared[connection] = prepared
+
+        if statement[0] in prepared:
+            prepared.move_to_end(statement[0])
+        elif not self._prepare(cursor, query, data, statement, prepared):
+            cursor.execute(query, data)
+            return
+
+        arguments = self._arguments(statement, data)
+        placeholders = f"({', '.join(['%s'] * len(arguments))})" if arguments else ""
+        try:
+            cursor.execute(f"EXECUTE {statement[0]}{placeholders}", arguments)
+        except psycopg2.Error as e:
+            if e.pgcode in _STALE_STATEMENT_CODES:
+                with self._lock:
+                    self._prepared[connection] = None
+            raise
+        with self._lock:
+            self.hits += 1
+
+    def stats(self) -> dict:
+        """Size and efficiency of the cache."""
+        with self._lock:
+            statements = [prepared for prepared in self._prepared.values() if prepared]
+            return {
+                "threshold": self.threshold,
+                "connections": len(statements),
+                "prepared_statements": sum(len(prepared) for prepared in statements),
+                "hot_queries": sum(1 for statement in self._compiled.values() if statement is not None),
+                "hits": self.hits,
+                "prepares": self.prepares,
+                "evictions": self.evictions,
+                "fallbacks": self.fallbacks,
+            }
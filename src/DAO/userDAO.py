@@ -1,12 +1,16 @@
 import logging
 from datetime import date
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 
 from src.Model.admin import Admin
 from src.Model.customer import Customer
 from src.Model.driver import Driver
 
+from .batch_loader import load_batched
 from .DBConnector import DBConnector
+from .identity_map import forget, lookup, lookup_many, materialize
+from .query_limits import LISTING_TIMEOUT, QueryCancelledError, statement_timeout
+from .replica_routing import read_only
 
 
 class UserDAO:
@@ -15,26 +19,80 @@ class UserDAO:
     def __init__(self, db_connector: DBConnector):
         self.db_connector = db_connector
 
+    _SELECT_USERS = """
+        SELECT
+            u.*,
+            c.name as customer_name,
+            c.phone_number as customer_phone,
+            d.name as driver_name,
+            d.phone_number as driver_phone,
+            d.vehicle_type,
+            d.availability,
+            a.name as admin_name,
+            a.phone_number as admin_phone
+        FROM "user" u
+        LEFT JOIN customer c USING (id_user)
+        LEFT JOIN driver d USING (id_user)
+        LEFT JOIN admin a USING (id_user)
+    """
+
+    @classmethod
+    def _user_from_row(cls, raw_user: dict) -> Optional[Union[Customer, Driver, Admin]]:
+        return materialize("user", raw_user["id_user"], lambda: cls._build_user(raw_user))
+
+    @staticmethod
+    def _build_user(raw_user: dict) -> Optional[Union[Customer, Driver, Admin]]:
+        user_type = raw_user["user_type"]
+
+        if user_type == "customer":
+            user = Customer(
+                id_user=raw_user["id_user"],
+                username=raw_user["username"],
+                sign_up_date=raw_user["sign_up_date"],
+                name=raw_user["customer_name"],
+                phone_number=raw_user["customer_phone"],
+            )
+
+        elif user_type == "driver":
+            user = Driver(
+                id_user=raw_user["id_user"],
+                username=raw_user["username"],
+                sign_up_date=raw_user["sign_up_date"],
+                name=raw_user["driver_name"],
+                phone_number=raw_user["driver_phone"],
+                vehicle_type=raw_user["vehicle_type"],
+                availability=raw_user["availability"],
+            )
+
+        elif user_type == "admin":
+            user = Admin(
+                id_user=raw_user["id_user"],
+                username=raw_user["username"],
+                sign_up_date=raw_user["sign_up_date"],
+                name=raw_user["admin_name"],
+                phone_number=raw_user["admin_phone"],
+            )
+
+        else:
+            return None
+
+        # Inject private attributes
+        user._hash_password = raw_user["hash_password"]
+        user._salt = raw_user["salt"]
+
+        return user
+
+    @read_only
     def find_user_by_id(self, id_user: int) -> Optional[Union[Customer, Driver, Admin]]:
+        user = lookup("user", id_user)
+        if user is not None:
+            return user
+        if load_batched("user", id_user, self.find_users_by_ids):
+            return lookup("user", id_user)
+
         try:
             raw_user = self.db_connector.sql_query(
-                """
-                SELECT
-                    u.*,
-                    c.name as customer_name,
-                    c.phone_number as customer_phone,
-                    d.name as driver_name,
-                    d.phone_number as driver_phone,
-                    d.vehicle_type,
-                    d.availability,
-                    a.name as admin_name,
-                    a.phone_number as admin_phone
-                FROM "user" u
-                LEFT JOIN customer c USING (id_user)
-                LEFT JOIN driver d USING (id_user)
-                LEFT JOIN admin a USING (id_user)
-                WHERE u.id_user = %(id_user)s
-                """,
+                self._SELECT_USERS + " WHERE u.id_user = %(id_user)s",
                 {"id_user": id_user},
                 "one",
             )
@@ -42,69 +100,48 @@ class UserDAO:
             if not raw_user:
                 return None
 
-            user_type = raw_user["user_type"]
+            return self._user_from_row(raw_user)
 
-            if user_type == "customer":
-                user = Customer(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["customer_name"],
-                    phone_number=raw_user["customer_phone"],
-                )
-
-            elif user_type == "driver":
-                user = Driver(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["driver_name"],
-                    phone_number=raw_user["driver_phone"],
-                    vehicle_type=raw_user["vehicle_type"],
-                    availability=raw_user["availability"],
-                )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to fetch user {id_user}: {e}")
+            return None
 
-            elif user_type == "admin":
-                user = Admin(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["admin_name"],
-                    phone_number=raw_user["admin_phone"],
-                )
+    @read_only
+    def find_users_by_ids(self, id_users: List[int]) -> List[Union[Customer, Driver, Admin]]:
+        """Fetch several users with a single query.
 
-            else:
-                return None
+        Args:
+            id_users: The IDs of the users to find.
 
-            # Inject private attributes
-            user._hash_password = raw_user["hash_password"]
-            user._salt = raw_user["salt"]
+        Returns:
+            List of the users found, in no particular order (empty on failure).
+        """
+        mapped_users, id_users = lookup_many("user", id_users)
+        if not id_users:
+            return list(mapped_users.values())
 
-            return user
+        try:
+            raw_users = self.db_connector.sql_query(
+                self._SELECT_USERS + " WHERE u.id_user = ANY(%(id_users)s::int[])",
+                {"id_users": id_users},
+                "all",
+            )
+            users = [self._user_from_row(raw_user) for raw_user in raw_users]
+            return list(mapped_users.values()) + [user for user in users if user is not None]
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
-            logging.error(f"Failed to fetch user {id_user}: {e}")
-            return None
+            logging.error(f"Failed to fetch users {id_users}: {e}")
+            return []
 
+    @read_only
     def find_user_by_username(self, username: str) -> Optional[Union[Customer, Driver, Admin]]:
         try:
             raw_user = self.db_connector.sql_query(
-                """
-                SELECT u.*,
-                    c.name as customer_name,
-                    c.phone_number as customer_phone,
-                    d.name as driver_name,
-                    d.phone_number as driver_phone,
-                    d.vehicle_type,
-                    d.availability,
-                    a.name as admin_name,
-                    a.phone_number as admin_phone
-                FROM "user" u
-                LEFT JOIN customer c USING (id_user)
-                LEFT JOIN driver d USING (id_user)
-                LEFT JOIN admin a USING (id_user)
-                WHERE u.username = %(username)s
-                """,
+                self._SELECT_USERS + " WHERE u.username = %(username)s",
                 {"username": username},
                 "one",
             )
@@ -112,67 +149,19 @@ class UserDAO:
             if not raw_user:
                 return None
 
-            user_type = raw_user["user_type"]
-
-            if user_type == "customer":
-                user = Customer(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["customer_name"],
-                    phone_number=raw_user["customer_phone"],
-                )
-
-            elif user_type == "driver":
-                user = Driver(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["driver_name"],
-                    phone_number=raw_user["driver_phone"],
-                    vehicle_type=raw_user["vehicle_type"],
-                    availability=raw_user["availability"],
-                )
-
-            elif user_type == "admin":
-                user = Admin(
-                    id_user=raw_user["id_user"],
-                    username=raw_user["username"],
-                    sign_up_date=raw_user["sign_up_date"],
-                    name=raw_user["admin_name"],
-                    phone_number=raw_user["admin_phone"],
-                )
-
-            else:
-                return None
-
-            # Inject private attributes
-            user._hash_password = raw_user["hash_password"]
-            user._salt = raw_user["salt"]
-
-            return user
+            return self._user_from_row(raw_user)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch user {username}: {e}")
             return None
 
+    @read_only
+    @statement_timeout(LISTING_TIMEOUT)
     def find_all(self, user_type: Optional[str] = None) -> List[Union[Customer, Driver, Admin]]:
         try:
-            query = """
-                SELECT u.*,
-                    c.name as customer_name,
-                    c.phone_number as customer_phone,
-                    d.name as driver_name,
-                    d.phone_number as driver_phone,
-                    d.vehicle_type,
-                    d.availability,
-                    a.name as admin_name,
-                    a.phone_number as admin_phone
-                FROM "user" u
-                LEFT JOIN customer c USING (id_user)
-                LEFT JOIN driver d USING (id_user)
-                LEFT JOIN admin a USING (id_user)
-            """
+            query = self._SELECT_USERS
             params = {}
 
             if user_type:
@@ -180,53 +169,65 @@ class UserDAO:
                 params["user_type"] = user_type
 
             raw_users = self.db_connector.sql_query(query, params, "all")
-            users = []
-
-            for u in raw_users:
-                if u["user_type"] == "customer":
-                    obj = Customer(
-                        id_user=u["id_user"],
-                        username=u["username"],
-                        sign_up_date=u["sign_up_date"],
-                        name=u["customer_name"],
-                        phone_number=u["customer_phone"],
-                    )
-
-                elif u["user_type"] == "driver":
-                    obj = Driver(
-                        id_user=u["id_user"],
-                        username=u["username"],
-                        sign_up_date=u["sign_up_date"],
-                        name=u["driver_name"],
-                        phone_number=u["driver_phone"],
-                        vehicle_type=u["vehicle_type"],
-                        availability=u["availability"],
-                    )
-
-                elif u["user_type"] == "admin":
-                    obj = Admin(
-                        id_user=u["id_user"],
-                        username=u["username"],
-                        sign_up_date=u["sign_up_date"],
-                        name=u["admin_name"],
-                        phone_number=u["admin_phone"],
-                    )
-
-                else:
-                    continue
-
-                # Inject private attributes
-                obj._hash_password = u["hash_password"]
-                obj._salt = u["salt"]
-
-                users.append(obj)
-
-            return users
+            users = [self._user_from_row(u) for u in raw_users]
+            return [user for user in users if user is not None]
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to fetch users: {e}")
             return []
 
+    def iter_users(
+        self,
+        user_type: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        fetch_size: Optional[int] = None,
+    ) -> Iterator[Union[Customer, Driver, Admin]]:
+        """Stream the users from a server-side cursor.
+
+        Unlike find_all, the users are neither collected in a list nor kept in the identity map,
+        so that any number of them can be processed in constant memory.
+
+        Args:
+            user_type: If given, only the users of this type are streamed.
+            since: If given, only the users who signed up on or after this date are streamed.
+            until: If given, only the users who signed up before this date are streamed.
+            fetch_size: Number of rows fetched per round trip (defaults to the connector's).
+
+        Yields:
+            The users, ordered by ID.
+
+        Raises:
+            Exception: If the query fails (logged first), so that a consumer never mistakes a
+                truncated stream for a complete one.
+        """
+        query = self._SELECT_USERS + " WHERE TRUE"
+        if user_type:
+            query += " AND u.user_type = %(user_type)s"
+        if since is not None:
+            query += " AND u.sign_up_date >= %(since)s"
+        if until is not None:
+            query += " AND u.sign_up_date < %(until)s"
+        params = {"user_type": user_type, "since": since, "until": until}
+
+        try:
+            for raw_users in self.db_connector.stream_query(query + " ORDER BY u.id_user", params, fetch_size):
+                users = []
+                for raw_user in raw_users:
+                    try:
+                        users.append(self._build_user(raw_user))
+                    except ValueError as e:
+                        # One invalid row must not abort a scan of the whole table.
+                        logging.error(f"Skipped invalid user {raw_user['id_user']}: {e}")
+                yield from (user for user in users if user is not None)
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to stream users: {e}")
+            raise
+
     def add_user(self, user: Union[Customer, Driver, Admin]) -> Optional[Union[Customer, Driver, Admin]]:
         if isinstance(user, Customer):
             user_type = "customer"
@@ -292,11 +293,14 @@ class UserDAO:
 
             return self.find_user_by_id(id_user)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to add user {user.username}: {e}")
             return None
 
     def update_user(self, user: Union[Customer, Driver, Admin]) -> Optional[Union[Customer, Driver, Admin]]:
+        forget("user", user.id_user)
         try:
             if isinstance(user, Customer):
                 user_type = "customer"
@@ -376,6 +380,8 @@ class UserDAO:
 
             return self.find_user_by_id(user.id_user)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to update user {user.id_user}: {e}")
             return None
@@ -383,6 +389,7 @@ class UserDAO:
     def delete_user(self, id_user: int) -> bool:
         try:
             user = self.find_user_by_id(id_user)
+            forget("user", id_user)
             if not user:
                 logging.warning(f"User {id_user} not found, cannot delete")
                 return False
@@ -416,6 +423,8 @@ class UserDAO:
 
             return True
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Failed to delete user {id_user}: {e}")
             return False
@@ -1,15 +1,15 @@
 from datetime import datetime
 from typing import Optional, Literal
 
-from pydantic import BaseModel
-
 from src.Model.driver import Driver
+from src.Model.lazy_model import LazyModel
 from src.Model.order import Order
 
 
-class Delivery(BaseModel):
+class Delivery(LazyModel):
     """
     Delivery to be done by a Driver.
+    When loaded lazily, driver and orders are fetched on first access.
 
     Attributes:
         id_delivery (Optional[int]): Unique identifier for the delivery.
@@ -0,0 +1,70 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+from src.Model.item import Item
+
+
+class ItemChange(BaseModel):
+    """
+    Update of one item in a batch: only the fields that are set are changed.
+
+    Attributes:
+        id_item (int): Identifier of the item to update.
+        name, item_type, price, description, stock, availability: New values, or None to keep the current ones.
+    """
+
+    id_item: int
+    name: Optional[str] = None
+    item_type: Optional[Literal["main", "starter", "drink", "side", "dessert"]] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    stock: Optional[int] = None
+    availability: Optional[bool] = None
+
+
+class StockDelta(BaseModel):
+    """
+    Relative change of the stock of one item in a batch (positive to restock, negative to remove units).
+
+    Attributes:
+        id_item (int): Identifier of the item.
+        delta (int): Number of units added to the stock.
+    """
+
+    id_item: int
+    delta: int
+
+
+class ItemBatch(BaseModel):
+    """
+    Item creations, updates and stock changes applied together, in this order and in one transaction.
+
+    Attributes:
+        create (List[Item]): Items to create.
+        update (List[ItemChange]): Items to update.
+        restock (List[StockDelta]): Stock changes.
+    """
+
+    create: List[Item] = []
+    update: List[ItemChange] = []
+    restock: List[StockDelta] = []
+
+
+class BatchRowResult(BaseModel):
+    """
+    Outcome of one row of an ItemBatch.
+
+    Attributes:
+        operation (str): "create", "update" or "restock".
+        index (int): Position of the row in its list.
+        id_item (Optional[int]): Identifier of the item (of the created item for a creation).
+        success (bool): Whether the row was applied.
+        error (Optional[str]): Why the row was rejected.
+    """
+
+    operation: Literal["create", "update", "restock"]
+    index: int
+    id_item: Optional[int] = None
+    success: bool
+    error: Optional[str] = None
@@ -0,0 +1,37 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class LazyModel(BaseModel):
+    """
+    Base class of the models whose relations can be fetched on first access.
+
+    A DAO builds a lazy instance with `model_construct`, leaves its relation fields unset and
+    attaches a relation loader. Reading an unset relation asks the loader to fetch it, usually
+    for all the sibling instances at once.
+
+    Attributes:
+        _relation_loader (Optional[Any]): Loader of the unset relations, None for eager instances. (private attribute)
+    """
+
+    _relation_loader: Optional[Any] = PrivateAttr(default=None)
+
+    def __getattr__(self, name: str) -> Any:
+        if not name.startswith("_") and name in type(self).model_fields:
+            private = self.__pydantic_private__ or {}
+            loader = private.get("_relation_loader")
+            if loader is not None:
+                loader.load(name)
+                if name in self.__dict__:
+                    return self.__dict__[name]
+        return super().__getattr__(name)
+
+    def load_relations(self) -> "LazyModel":
+        """Fetches every relation that is still unset, recursively, so that the full graph can be serialized."""
+        for name in type(self).model_fields:
+            value = getattr(self, name)
+            for related in value if isinstance(value, list) else [value]:
+                if isinstance(related, LazyModel):
+                    related.load_relations()
+        return self
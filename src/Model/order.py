@@ -1,31 +1,88 @@
 from datetime import datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import Field, PrivateAttr, model_validator
 
 from src.Model.address import Address
 from src.Model.customer import Customer
 from src.Model.item import Item
+from src.Model.lazy_model import LazyModel
+from src.Model.order_line import OrderLine
 
 
-class Order(BaseModel):
+class Order(LazyModel):
     """
     Represents an order placed by a customer.
+    When loaded lazily, customer, address and lines are fetched on first access.
 
     Attributes:
         id_order (Optional[int]): Unique identifier.
         customer (Customer): Customer who placed the order.
         address (Address): Delivery address.
-        items (list[Item]): Items included in the order.
+        lines (list[OrderLine]): Items included in the order, one line per distinct item with its quantity.
+            A flat `items` list is still accepted and grouped into lines.
+        items (list[Item]): Flat view of the lines, each item repeated `quantity` times. It is not
+            serialized: the JSON of an order only carries `lines`, which consumers expand if needed.
         price (Optional[float]): Total order price.
         status (str): Order status.
         order_date (datetime): Creation timestamp (defaults to now).
+        _persisted_columns (Optional[dict]): Column values last read from or written to the database.
+            (private attribute)
+        _persisted_items (Optional[dict]): Item quantities last read from or written to the database.
+            (private attribute)
     """
 
     id_order: Optional[int] = None
     customer: Customer
     address: Address
-    items: list[Item]
+    lines: list[OrderLine] = Field(default_factory=list)
     price: Optional[float] = None
     status: Literal["in_progress", "validated", "pending", "delivered"]
     order_date: datetime = Field(default_factory=datetime.now)
+    _persisted_columns: Optional[dict] = PrivateAttr(default=None)
+    _persisted_items: Optional[dict] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _group_items(cls, data):
+        """Accepts a flat `items` list and groups its duplicates into lines (`lines` wins when both are given)."""
+        if isinstance(data, dict) and "items" in data:
+            data = dict(data)
+            items = [Item.model_validate(item) for item in data.pop("items")]
+            data.setdefault("lines", cls._lines_from_items(items))
+        return data
+
+    @staticmethod
+    def _lines_from_items(items: list[Item]) -> list[OrderLine]:
+        lines = {}
+        for item in items:
+            key = item.id_item if item.id_item is not None else id(item)
+            if key in lines:
+                lines[key].quantity += 1
+            else:
+                lines[key] = OrderLine(item=item, quantity=1)
+        return list(lines.values())
+
+    @property
+    def items(self) -> list[Item]:
+        """Flat view of the ordered items, each line's item repeated `quantity` times."""
+        return [line.item for line in self.lines for _ in range(line.quantity)]
+
+    @items.setter
+    def items(self, items: list[Item]) -> None:
+        self.lines = self._lines_from_items(items)
+
+    def add_item(self, item: Item, quantity: int = 1) -> None:
+        """Adds units of an item, increasing the quantity of its line if it is already ordered."""
+        for line in self.lines:
+            if item.id_item is not None and line.item.id_item == item.id_item:
+                line.quantity += quantity
+                return
+        self.lines.append(OrderLine(item=item, quantity=quantity))
+
+    def item_quantities(self) -> dict[int, int]:
+        """Maps the ID of every ordered item to its quantity."""
+        quantities = {}
+        for line in self.lines:
+            quantities[line.item.id_item] = quantities.get(line.item.id_item, 0) + line.quantity
+        return quantities
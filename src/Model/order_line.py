@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from src.Model.item import Item
+
+
+class OrderLine(BaseModel):
+    """
+    One line of an order: an item and how many units of it were ordered.
+
+    Attributes:
+        item (Item): The ordered item, shared by every unit of the line.
+        quantity (int): Number of units ordered (at least 1).
+    """
+
+    item: Item
+    quantity: int = Field(default=1, ge=1)
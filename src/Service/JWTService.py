@@ -1,5 +1,9 @@
+import hashlib
 import os
+import threading
 import time
+from collections import OrderedDict
+from typing import Optional
 
 import jwt
 from jwt import ExpiredSignatureError
@@ -10,14 +14,24 @@ from src.Model.JWTResponse import JWTResponse
 class JwtService:
     """
     Handler for JWT encryption and validation
+
+    The claims of the last `cache_size` tokens verified (JWT_CACHE_SIZE, 1024 by default, 0 to disable)
+    are kept, by hash of the token: a token seen again is not verified again until it expires.
     """
 
-    def __init__(self, secret: str = "", algorithm: str = "HS256"):
+    cache_size: int = 1024
+
+    def __init__(self, secret: str = "", algorithm: str = "HS256", cache_size: Optional[int] = None):
         if secret == "":
             self.secret = os.environ["JWT_SECRET"]
         else:
             self.secret = secret
         self.algorithm = algorithm
+        if cache_size is None:
+            cache_size = int(os.environ.get("JWT_CACHE_SIZE", self.cache_size))
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[bytes, dict]" = OrderedDict()
+        self._lock = threading.Lock()
 
     def encode_jwt(self, user_id: int) -> JWTResponse:
         """
@@ -34,12 +48,35 @@ class JwtService:
         """
         return jwt.decode(token, self.secret, algorithms=[self.algorithm])
 
+    def verify_jwt(self, token: str) -> dict:
+        """
+        Returns the claims of a token, checking its signature only if it is not in the cache
+        Throws in case of invalid or expired JWT
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            claims = self._verified.get(key)
+            if claims is not None:
+                self._verified.move_to_end(key)
+
+        cached = claims is not None
+        if not cached:
+            claims = self.decode_jwt(token)
+        if claims["expiry_timestamp"] < time.time():
+            with self._lock:
+                self._verified.pop(key, None)
+            raise ExpiredSignatureError("Expired JWT")
+
+        if not cached and self.cache_size > 0:
+            with self._lock:
+                self._verified[key] = claims
+                if len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return dict(claims)
+
     def validate_user_jwt(self, token: str) -> str:
         """
         Returns the id of the user authenticated by the JWT
         Throws in case of invalid or expired JWT
         """
-        decoded_jwt = self.decode_jwt(token)
-        if decoded_jwt["expiry_timestamp"] < time.time():
-            raise ExpiredSignatureError("Expired JWT")
-        return decoded_jwt["user_id"]
+        return self.verify_jwt(token)["user_id"]
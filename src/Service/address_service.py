@@ -1,21 +1,22 @@
 import os
 from typing import List, Optional
 
-import requests
 from dotenv import load_dotenv
 
 from src.DAO.addressDAO import AddressDAO
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
+from src.DAO.query_limits import QueryCancelledError
 from src.Model.address import Address
 
 
 class AddressService:
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects the connector into the DAO.
         """
         load_dotenv()
-        self.address_dao = AddressDAO(db_connector=db_connector)
+        self.address_dao = daos.address_dao if daos is not None else AddressDAO(db_connector=db_connector)
         self.api_key = os.environ["GOOGLE_MAPS_API_KEY"]
 
     def get_or_create_address(
@@ -25,30 +26,25 @@ class AddressService:
         Retrieves an address from the database if it exists.
         If not found, creates a new address record.
         This assumes the address components have already been validated.
+        Both happen in one indexed statement, so concurrent checkouts get the same address.
         """
-
-        existing_address = self.address_dao.find_address_by_components(
-            city=city, postal_code=postal_code, street_name=street_name, street_number=street_number
-        )
-
-        if existing_address:
-            return existing_address
-
         try:
-            new_address = Address(
-                street_name=street_name,
-                street_number=street_number,
-                city=city,
-                postal_code=postal_code,
+            address = self.address_dao.upsert_address(
+                Address(
+                    street_name=street_name,
+                    street_number=street_number,
+                    city=city,
+                    postal_code=postal_code,
+                )
             )
 
-            created_address = self.address_dao.add_address(new_address)
-
-            if not created_address:
+            if not address:
                 raise Exception("DAO failed to add new address.")
 
-            return created_address
+            return address
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             raise ValueError(f"Database error while saving address: {e}") from e
 
@@ -1,29 +1,68 @@
-from typing import List, Optional
+import gzip
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Tuple, Union
+
+import psycopg2
+import psycopg2.errors
+from pydantic import TypeAdapter
 
 from src.DAO.bundleDAO import BundleDAO
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
 from src.DAO.itemDAO import ItemDAO
 from src.Model.abstract_bundle import AbstractBundle
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.item import Item
+from src.Model.item_batch import BatchRowResult, ItemBatch
 from src.Model.one_item_bundle import OneItemBundle
 from src.Model.predefined_bundle import PredefinedBundle
 
+# Lengths of the name and description columns of the item table.
+ITEM_NAME_MAX_LENGTH = 20
+ITEM_DESCRIPTION_MAX_LENGTH = 300
+
+MENU_ADAPTERS = {
+    "items": TypeAdapter(List[Item]),
+    "bundles": TypeAdapter(List[Union[PredefinedBundle, DiscountedBundle, OneItemBundle]]),
+}
+
+
+@dataclass(frozen=True)
+class MenuPayload:
+    """
+    Serialized menu (list of items or of bundles) for one version of the menu.
+
+    Attributes:
+        etag (str): Entity tag of this version, for conditional requests.
+        body (bytes): The menu as JSON.
+        gzipped_body (bytes): The same JSON, compressed with gzip.
+    """
+
+    etag: str
+    body: bytes
+    gzipped_body: bytes
+
 
 class AdminMenuService:
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects dependencies into the DAOs.
+        The DAOs of `daos` are shared with the other services; without it, the service builds its own.
         """
-        self.item_dao = ItemDAO(db_connector=db_connector)
-        self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+        if daos is not None:
+            self.item_dao = daos.item_dao
+            self.bundle_dao = daos.bundle_dao
+        else:
+            self.item_dao = ItemDAO(db_connector=db_connector)
+            self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+        self._menu_payloads: Dict[str, Tuple[int, MenuPayload]] = {}
+        self._items_by_type: Tuple[Optional[int], Dict[str, List[Item]]] = (None, {})
 
     def create_item(self, name: str, desc: str, price: float, stock: int, availability: bool, item_type: str) -> None:
         """
         Validates and creates a new item in the database.
         """
-        existing_items = self.item_dao.find_all_items()
-        if any(i.name.lower() == name.lower() for i in existing_items):
+        if self.item_dao.find_item_id_by_name(name) is not None:
             raise ValueError(f"An item with the name '{name}' already exists.")
 
         if price < 0:
@@ -58,8 +97,7 @@ class AdminMenuService:
             raise ValueError(f"No item found with ID {id}.")
 
         if name is not None and name.lower() != item.name.lower():
-            existing_items = self.item_dao.find_all_items()
-            if any(i.name.lower() == name.lower() for i in existing_items):
+            if self.item_dao.find_item_id_by_name(name) is not None:
                 raise ValueError(f"An item with the name '{name}' already exists.")
             item.name = name
 
@@ -88,6 +126,120 @@ class AdminMenuService:
         if not updated_item:
             raise Exception(f"Failed to update item: {id}")
 
+    @staticmethod
+    def _item_error(item: Item) -> Optional[str]:
+        """Checks the rules of create_item and update_item, and the item table constraints, on an item."""
+        if len(item.name) > ITEM_NAME_MAX_LENGTH:
+            return f"Name cannot exceed {ITEM_NAME_MAX_LENGTH} characters."
+        if item.description is not None and len(item.description) > ITEM_DESCRIPTION_MAX_LENGTH:
+            return f"Description cannot exceed {ITEM_DESCRIPTION_MAX_LENGTH} characters."
+        if item.price < 0:
+            return "Price must be positive."
+        if item.stock is None or item.stock < 0:
+            return "Stock cannot be negative."
+        if item.availability is None:
+            return "Availability must be set."
+        if item.stock == 0 and item.availability:
+            return "Zero stock implies non-availability."
+        return None
+
+    @staticmethod
+    def _check_name(name: str, id_item: Optional[int], owners: Dict[str, Optional[int]]) -> Optional[str]:
+        """Reserves `name` for the item `id_item` (None for a new item), unless it is already taken."""
+        if name.lower() in owners and (id_item is None or owners[name.lower()] != id_item):
+            return f"An item with the name '{name}' already exists."
+        owners[name.lower()] = id_item
+        return None
+
+    def _validate_creations(
+        self, batch: ItemBatch, owners: Dict[str, Optional[int]], results: List[BatchRowResult]
+    ) -> List[Item]:
+        new_items = []
+        for index, item in enumerate(batch.create):
+            error = self._item_error(item) or self._check_name(item.name, None, owners)
+            results.append(BatchRowResult(operation="create", index=index, success=error is None, error=error))
+            if error is None:
+                new_items.append(item)
+        return new_items
+
+    def _validate_updates(
+        self, batch: ItemBatch, items: Dict[int, Item], owners: Dict[str, Optional[int]], results: List[BatchRowResult]
+    ) -> List[Item]:
+        changed: Dict[int, Item] = {}
+        for index, change in enumerate(batch.update):
+            item = items.get(change.id_item)
+            if item is None:
+                error = f"No item found with ID {change.id_item}."
+            elif change.id_item in changed:
+                error = "The item is updated more than once in the batch."
+            else:
+                updated = item.model_copy(update=change.model_dump(exclude_unset=True, exclude_none=True))
+                error = self._item_error(updated)
+                if error is None and updated.name.lower() != item.name.lower():
+                    error = self._check_name(updated.name, item.id_item, owners)
+                if error is None:
+                    changed[item.id_item] = updated
+            results.append(
+                BatchRowResult(
+                    operation="update", index=index, id_item=change.id_item, success=error is None, error=error
+                )
+            )
+        return list(changed.values())
+
+    @staticmethod
+    def _validate_restocks(batch: ItemBatch, items: Dict[int, Item], results: List[BatchRowResult]) -> Dict[int, int]:
+        stock_deltas: Dict[int, int] = {}
+        for index, delta in enumerate(batch.restock):
+            error = None
+            if delta.id_item not in items:
+                error = f"No item found with ID {delta.id_item}."
+            elif delta.id_item in stock_deltas:
+                error = "The stock of the item is changed more than once in the batch."
+            else:
+                stock_deltas[delta.id_item] = delta.delta
+            results.append(
+                BatchRowResult(
+                    operation="restock", index=index, id_item=delta.id_item, success=error is None, error=error
+                )
+            )
+        return stock_deltas
+
+    def apply_item_batch(self, batch: ItemBatch) -> List[BatchRowResult]:
+        """
+        Validates and applies many item creations, updates and stock changes in one transaction.
+        Rows that break a rule are skipped and reported; the others are applied together.
+        Raises ValueError, without applying anything, if the database still rejects the batch
+        (e.g. a name taken by a concurrent change).
+        """
+        ids = {change.id_item for change in batch.update} | {delta.id_item for delta in batch.restock}
+        items = {item.id_item: item for item in self.item_dao.get_items_by_ids(sorted(ids))}
+        names = [item.name for item in batch.create] + [change.name for change in batch.update if change.name]
+        owners: Dict[str, Optional[int]] = dict(self.item_dao.find_item_ids_by_names(names))
+        for item in items.values():
+            owners.setdefault(item.name.lower(), item.id_item)
+
+        results: List[BatchRowResult] = []
+        new_items = self._validate_creations(batch, owners, results)
+        changed_items = self._validate_updates(batch, items, owners, results)
+        stock_deltas = self._validate_restocks(batch, items, results)
+        if not (new_items or changed_items or stock_deltas):
+            return results
+
+        try:
+            created, restocked = self.item_dao.apply_item_batch(new_items, changed_items, stock_deltas)
+        except psycopg2.errors.UniqueViolation as e:
+            raise ValueError("An item name of the batch was taken by a concurrent change: nothing was applied.") from e
+        except (psycopg2.IntegrityError, psycopg2.DataError) as e:
+            raise ValueError(f"The batch was rejected by the database: {e.diag.message_primary or e}") from e
+
+        created_ids = iter(item.id_item for item in created)
+        for result in results:
+            if result.operation == "create" and result.success:
+                result.id_item = next(created_ids)
+            elif result.operation == "restock" and result.success and result.id_item not in restocked:
+                result.success, result.error = False, "Stock cannot be negative."
+        return results
+
     def delete_item(self, id: int) -> None:
         """
         Finds an item by ID and deletes it from the database.
@@ -112,18 +264,11 @@ class AdminMenuService:
         if not composition or len(composition) != len(item_ids):
             raise ValueError("One or more item IDs provided in the composition were not found.")
 
-        all_bundles = self.bundle_dao.find_all_bundles()
-
-        if any(b.name.lower() == name.lower() for b in all_bundles):
+        if self.bundle_dao.find_bundle_id_by_name(name) is not None:
             raise ValueError(f"A bundle with the name '{name}' already exists.")
 
-        new_composition_ids = sorted(item_ids)
-
-        for existing_bundle in all_bundles:
-            if isinstance(existing_bundle, PredefinedBundle):
-                existing_ids = sorted([i.id_item for i in existing_bundle.composition])
-                if existing_ids == new_composition_ids:
-                    raise ValueError("A predefined bundle with this exact composition already exists.")
+        if self.bundle_dao.find_bundle_id_by_composition("predefined", item_ids) is not None:
+            raise ValueError("A predefined bundle with this exact composition already exists.")
 
         new_bundle = PredefinedBundle(name=name, description=description, composition=composition, price=price)
 
@@ -148,18 +293,11 @@ class AdminMenuService:
 
         required_item_types = [t.lower() for t in required_item_types]
 
-        all_bundles = self.bundle_dao.find_all_bundles()
-
-        if any(b.name.lower() == name.lower() for b in all_bundles):
+        if self.bundle_dao.find_bundle_id_by_name(name) is not None:
             raise ValueError(f"A bundle with the name '{name}' already exists.")
 
-        new_types_sorted = sorted(required_item_types)
-
-        for existing_bundle in all_bundles:
-            if isinstance(existing_bundle, DiscountedBundle):
-                existing_types = sorted([t.lower() for t in existing_bundle.required_item_types])
-                if existing_types == new_types_sorted:
-                    raise ValueError("A discounted bundle with this exact configuration of item types already exists.")
+        if self.bundle_dao.find_bundle_id_by_composition("discount", required_item_types) is not None:
+            raise ValueError("A discounted bundle with this exact configuration of item types already exists.")
 
         new_bundle = DiscountedBundle(
             name=name, description=description, required_item_types=required_item_types, discount=discount
@@ -185,12 +323,45 @@ class AdminMenuService:
         """
         return self.item_dao.find_all_items()
 
+    def get_items_by_type(self, item_types: List[str]) -> Dict[str, List[Item]]:
+        """
+        Returns the available items of each of these types, cheapest first.
+        The per-type index is kept for one version of the menu: only the types not indexed yet are queried.
+        """
+        version = self.item_dao.get_menu_version()
+        indexed_version, index = self._items_by_type
+        if indexed_version != version:
+            index = {}
+            self._items_by_type = (version, index)
+
+        for item_type in item_types:
+            if item_type not in index:
+                index[item_type] = self.item_dao.find_items_by_type(item_type)
+        return {item_type: index[item_type] for item_type in item_types}
+
     def list_bundles(self) -> list[AbstractBundle]:
         """
         Retrieves a list of all bundles from the database.
         """
         return self.bundle_dao.find_all_bundles()
 
+    def get_menu_payload(self, kind: Literal["items", "bundles"]) -> MenuPayload:
+        """
+        Returns the serialized list of items or bundles, computed once per version of the menu.
+        Serving an unchanged menu only costs the read of its version.
+        """
+        version = self.item_dao.get_menu_version()
+        cached = self._menu_payloads.get(kind)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        menu = self.list_items() if kind == "items" else self.list_bundles()
+        body = MENU_ADAPTERS[kind].dump_json(menu)
+        # The version is global to the database, so every worker derives the same tag.
+        payload = MenuPayload(etag=f'W/"{kind}-{version}"', body=body, gzipped_body=gzip.compress(body))
+        self._menu_payloads[kind] = (version, payload)
+        return payload
+
     def update_predefined_bundle(
         self,
         id: int,
@@ -211,8 +382,7 @@ class AdminMenuService:
 
         if name is not None:
             if name.lower() != bundle.name.lower():
-                all_bundles = self.bundle_dao.find_all_bundles()
-                if any(b.name.lower() == name.lower() for b in all_bundles):
+                if self.bundle_dao.find_bundle_id_by_name(name) not in (None, id):
                     raise ValueError(f"A bundle with the name '{name}' already exists.")
             bundle.name = name
 
@@ -238,13 +408,8 @@ class AdminMenuService:
             if not composition or len(composition) != len(item_ids):
                 raise ValueError("One or more item IDs provided in the composition were not found.")
 
-            new_ids_sorted = sorted(item_ids)
-            all_bundles = self.bundle_dao.find_all_bundles()
-            for existing in all_bundles:
-                if isinstance(existing, PredefinedBundle) and existing.id_bundle != id:
-                    existing_ids = sorted([i.id_item for i in existing.composition])
-                    if existing_ids == new_ids_sorted:
-                        raise ValueError("Another predefined bundle with this exact composition already exists.")
+            if self.bundle_dao.find_bundle_id_by_composition("predefined", item_ids) not in (None, id):
+                raise ValueError("Another predefined bundle with this exact composition already exists.")
 
             bundle.composition = composition
 
@@ -272,8 +437,7 @@ class AdminMenuService:
 
         if name is not None:
             if name.lower() != bundle.name.lower():
-                all_bundles = self.bundle_dao.find_all_bundles()
-                if any(b.name.lower() == name.lower() for b in all_bundles):
+                if self.bundle_dao.find_bundle_id_by_name(name) not in (None, id):
                     raise ValueError(f"A bundle with the name '{name}' already exists.")
             bundle.name = name
 
@@ -294,15 +458,8 @@ class AdminMenuService:
 
             normalized_types = [t.lower() for t in required_item_types]
 
-            new_types_sorted = sorted(normalized_types)
-            all_bundles = self.bundle_dao.find_all_bundles()
-            for existing in all_bundles:
-                if isinstance(existing, DiscountedBundle) and existing.id_bundle != id:
-                    existing_types = sorted([t.lower() for t in existing.required_item_types])
-                    if existing_types == new_types_sorted:
-                        raise ValueError(
-                            "Another discounted bundle with this exact item types configuration already exists."
-                        )
+            if self.bundle_dao.find_bundle_id_by_composition("discount", normalized_types) not in (None, id):
+                raise ValueError("Another discounted bundle with this exact item types configuration already exists.")
 
             bundle.required_item_types = normalized_types
 
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from src.DAO.addressDAO import AddressDAO
 from src.DAO.bundleDAO import BundleDAO
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
 from src.DAO.itemDAO import ItemDAO
 from src.DAO.orderDAO import OrderDAO
@@ -9,30 +12,37 @@ from src.Model.order import Order
 
 
 class AdminOrderService:
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects dependencies into the DAOs.
+        The DAOs of `daos` are shared with the other services; without it, the service builds its own.
         """
-        self.item_dao = ItemDAO(db_connector=db_connector)
-        self.user_dao = UserDAO(db_connector=db_connector)
-        self.address_dao = AddressDAO(db_connector=db_connector)
+        if daos is not None:
+            self.item_dao = daos.item_dao
+            self.user_dao = daos.user_dao
+            self.address_dao = daos.address_dao
+            self.bundle_dao = daos.bundle_dao
+            self.order_dao = daos.order_dao
+        else:
+            self.item_dao = ItemDAO(db_connector=db_connector)
+            self.user_dao = UserDAO(db_connector=db_connector)
+            self.address_dao = AddressDAO(db_connector=db_connector)
 
-        self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+            self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
 
-        self.order_dao = OrderDAO(
-            db_connector=db_connector,
-            item_dao=self.item_dao,
-            user_dao=self.user_dao,
-            address_dao=self.address_dao,
-            bundle_dao=self.bundle_dao,
-        )
+            self.order_dao = OrderDAO(
+                db_connector=db_connector,
+                item_dao=self.item_dao,
+                user_dao=self.user_dao,
+                address_dao=self.address_dao,
+                bundle_dao=self.bundle_dao,
+            )
 
     def list_waiting_orders(self) -> list[Order]:
         """
         Returns the list of all pending orders
         """
-        all_orders = self.order_dao.find_all_orders()
-        return [order for order in all_orders if order.status == "pending"]
+        return self.order_dao.find_orders_by_status("pending", lazy=True)
 
     def list_deliveries(self) -> list[Delivery]:
         """
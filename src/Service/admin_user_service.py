@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional
 
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
 from src.DAO.userDAO import UserDAO
 from src.Model.admin import Admin
@@ -9,11 +10,11 @@ from src.Service.password_service import PasswordService
 
 
 class AdminUserService:
-    def __init__(self, db_connector: DBConnector, password_service=PasswordService):
+    def __init__(self, db_connector: DBConnector, password_service=PasswordService, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects dependencies into the UserDAO.
         """
-        self.user_dao = UserDAO(db_connector=db_connector)
+        self.user_dao = daos.user_dao if daos is not None else UserDAO(db_connector=db_connector)
         self.password_service = password_service
 
     def create_admin_account(self, username: str, password: str, name: str, phone_number: str) -> Admin:
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from src.DAO.analyticsDAO import AnalyticsDAO
+from src.DAO.dao_registry import DAORegistry
+from src.DAO.DBConnector import DBConnector
+
+BUCKETS = ("day", "week", "month")
+MAX_TOP = 100
+DEFAULT_PERIOD = timedelta(days=30)
+
+
+class AnalyticsService:
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
+        """
+        Initializes the service and injects dependencies into the AnalyticsDAO.
+        """
+        self.analytics_dao = daos.analytics_dao if daos is not None else AnalyticsDAO(db_connector=db_connector)
+
+    @staticmethod
+    def _period(since: Optional[datetime], until: Optional[datetime]) -> Tuple[datetime, datetime]:
+        """
+        Completes a reported period: it ends now and lasts 30 days unless told otherwise.
+        """
+        until = until or datetime.now()
+        since = since or until - DEFAULT_PERIOD
+        if since >= until:
+            raise ValueError("The start of the period must be before its end.")
+        return since, until
+
+    @staticmethod
+    def _check_limit(limit: int) -> None:
+        if not 1 <= limit <= MAX_TOP:
+            raise ValueError(f"The limit must be between 1 and {MAX_TOP}.")
+
+    def revenue(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None, bucket: str = "day"
+    ) -> List[dict]:
+        """
+        Returns the number of orders and the revenue per day, week or month of the period.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Invalid bucket '{bucket}'. Expected one of {', '.join(BUCKETS)}.")
+        since, until = self._period(since, until)
+        return self.analytics_dao.revenue_by_period(since, until, bucket)
+
+    def top_items(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 10
+    ) -> List[dict]:
+        """
+        Returns the best-selling items of the period.
+        """
+        self._check_limit(limit)
+        since, until = self._period(since, until)
+        return self.analytics_dao.top_items(since, until, limit)
+
+    def top_bundles(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 10
+    ) -> List[dict]:
+        """
+        Returns the best-selling bundles of the period.
+        """
+        self._check_limit(limit)
+        since, until = self._period(since, until)
+        return self.analytics_dao.top_bundles(since, until, limit)
+
+    def dashboard(self) -> dict:
+        """
+        Returns the live counters of the admin dashboard: orders per status, active drivers and today's sales.
+        """
+        counters = self.analytics_dao.dashboard_counters()
+        if counters is None:
+            raise Exception("Failed to read the dashboard counters.")
+        return counters
@@ -2,27 +2,8 @@ import os
 import urllib
 import urllib.parse
 
-import requests
 from dotenv import load_dotenv
 
-from src.DAO.addressDAO import AddressDAO
-from src.DAO.bundleDAO import BundleDAO
-from src.DAO.DBConnector import DBConnector
-from src.DAO.deliveryDAO import DeliveryDAO
-from src.DAO.itemDAO import ItemDAO
-from src.DAO.orderDAO import OrderDAO
-from src.DAO.userDAO import UserDAO
-
-db = DBConnector()
-user_dao = UserDAO(db_connector=db)
-address_dao = AddressDAO(db_connector=db)
-item_dao = ItemDAO(db_connector=db)
-bundle_dao = BundleDAO(db_connector=db, item_dao=item_dao)
-order_dao = OrderDAO(
-    db_connector=db, user_dao=user_dao, address_dao=address_dao, bundle_dao=bundle_dao, item_dao=item_dao
-)
-delivery_dao = DeliveryDAO(db_connector=db, user_dao=user_dao, order_dao=order_dao)
-
 
 class ApiMapsService:
     def __init__(self) -> None:
@@ -49,6 +30,8 @@ class ApiMapsService:
 
         url = f"https://maps.googleapis.com/maps/api/directions/json?origin={encoded_origin}&destination={encoded_destination}&waypoints={encoded_waypoints}&key={self.api_key}"
 
+        import requests
+
         response = requests.get(url)
         data = response.json()
         if data["status"] == "OK":
@@ -85,6 +68,8 @@ class ApiMapsService:
         if not self.api_key:
             raise EnvironmentError("Missing Google Maps API key.")
 
+        import requests
+
         response = requests.get(
             "https://maps.googleapis.com/maps/api/geocode/json",
             params={"address": full_address, "key": self.api_key},
@@ -1,7 +1,7 @@
 import re
+from typing import Optional
 
-import phonenumbers
-
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
 from src.DAO.userDAO import UserDAO
 from src.Model.customer import Customer
@@ -9,12 +9,14 @@ from src.Service.password_service import PasswordService
 
 
 class AuthenticationService:
-    def __init__(self, db_connector: DBConnector, password_service: PasswordService):
+    def __init__(
+        self, db_connector: DBConnector, password_service: PasswordService, daos: Optional[DAORegistry] = None
+    ):
         """
         Secure authentication service.
         Injects UserDAO for data access and PasswordService for hashing/salting.
         """
-        self.user_dao = UserDAO(db_connector=db_connector)
+        self.user_dao = daos.user_dao if daos is not None else UserDAO(db_connector=db_connector)
         self.password_service = password_service
 
     def login(self, username: str, password: str) -> Customer:
@@ -47,7 +49,9 @@ class AuthenticationService:
                 "Username may only contain letters (a-z, A-Z), digits (0-9), underscores (_), dots (.), or hyphens (-)."
             )
 
-        # Clean and validate phone number
+        # Clean and validate phone number (phonenumbers loads large metadata, so it is only imported when needed)
+        import phonenumbers
+
         phone_number_clean = re.sub(r"[^\d+]", "", phone_number)
         if phone_number_clean.startswith("+"):
             number = phonenumbers.parse(phone_number_clean, None)
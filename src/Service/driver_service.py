@@ -4,10 +4,13 @@ from typing import List, Optional
 
 from src.DAO.addressDAO import AddressDAO
 from src.DAO.bundleDAO import BundleDAO
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
 from src.DAO.deliveryDAO import DeliveryDAO
+from src.DAO.identity_map import in_identity_scope
 from src.DAO.itemDAO import ItemDAO
 from src.DAO.orderDAO import OrderDAO
+from src.DAO.query_limits import QueryCancelledError
 from src.DAO.userDAO import UserDAO
 from src.Model.delivery import Delivery
 from src.Model.driver import Driver
@@ -16,25 +19,35 @@ from src.Service.api_maps_service import ApiMapsService
 
 
 class DriverService:
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects dependencies into the DAOs.
+        The DAOs of `daos` are shared with the other services; without it, the service builds its own.
         """
-        self.item_dao = ItemDAO(db_connector=db_connector)
-        self.user_dao = UserDAO(db_connector=db_connector)
-        self.address_dao = AddressDAO(db_connector=db_connector)
-        self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
-
-        self.order_dao = OrderDAO(
-            db_connector=db_connector,
-            user_dao=self.user_dao,
-            address_dao=self.address_dao,
-            bundle_dao=self.bundle_dao,
-            item_dao=self.item_dao,
-        )
-
-        self.delivery_dao = DeliveryDAO(db_connector=db_connector, user_dao=self.user_dao, order_dao=self.order_dao)
-
+        if daos is not None:
+            self.item_dao = daos.item_dao
+            self.user_dao = daos.user_dao
+            self.address_dao = daos.address_dao
+            self.bundle_dao = daos.bundle_dao
+            self.order_dao = daos.order_dao
+            self.delivery_dao = daos.delivery_dao
+        else:
+            self.item_dao = ItemDAO(db_connector=db_connector)
+            self.user_dao = UserDAO(db_connector=db_connector)
+            self.address_dao = AddressDAO(db_connector=db_connector)
+            self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+
+            self.order_dao = OrderDAO(
+                db_connector=db_connector,
+                user_dao=self.user_dao,
+                address_dao=self.address_dao,
+                bundle_dao=self.bundle_dao,
+                item_dao=self.item_dao,
+            )
+
+            self.delivery_dao = DeliveryDAO(db_connector=db_connector, user_dao=self.user_dao, order_dao=self.order_dao)
+
+    @in_identity_scope
     def create_and_assign_delivery(self, order_ids: List[int], user_id: int) -> Optional[Delivery]:
         """
         Creates a new delivery run from a list of 'validated' order IDs and
@@ -62,7 +75,7 @@ class DriverService:
 
         for o in orders:
             o.status = "in_progress"
-            self.order_dao.update_order(o)
+        self.order_dao.update_order_status(order_ids, "in_progress")
 
         new_delivery = Delivery(
             driver=driver,
@@ -82,14 +95,14 @@ class DriverService:
         return created_delivery
 
     def get_assigned_delivery(self, user_id: int):
-        delivery = self.delivery_dao.find_in_progress_deliveries_by_driver(user_id)
+        delivery = self.delivery_dao.find_in_progress_deliveries_by_driver(user_id, lazy=True)
         return delivery
 
     def get_itinerary(self, user_id: int):
         """
         Retrieves the ongoing delivery for a given driver.
         """
-        deliveries = self.delivery_dao.find_in_progress_deliveries_by_driver(user_id)
+        deliveries = self.delivery_dao.find_in_progress_deliveries_by_driver(user_id, lazy=True)
         if not deliveries:
             print("Aucune livraison en cours pour ce chauffeur.")
             return None
@@ -106,6 +119,7 @@ class DriverService:
         service = ApiMapsService()
         return service.Driveritinerary(adresses)
 
+    @in_identity_scope
     def complete_delivery(self, delivery_id: int) -> Optional[Delivery]:
         """
         Marks a delivery as 'delivered' and sets the delivery time.
@@ -123,7 +137,9 @@ class DriverService:
         try:
             for order in delivery.orders:
                 order.status = "delivered"
-                self.order_dao.update_order(order)
+            self.order_dao.update_order_status([order.id_order for order in delivery.orders], "delivered")
+        except QueryCancelledError:
+            raise
         except Exception as e:
             logging.warning(f"Could not update status for orders in delivery {delivery_id}: {e}")
 
@@ -132,6 +148,7 @@ class DriverService:
 
         return delivery
 
+    @in_identity_scope
     def get_delivery_details(self, delivery_id: int) -> Optional[Delivery]:
         """
         Retrieves all details for a single delivery.
@@ -152,5 +169,4 @@ class DriverService:
         """
         Returns a list of all orders with 'pending' status (awaiting a driver).
         """
-        all_orders = self.order_dao.find_all_orders()
-        return [o for o in all_orders if o.status == "pending"]
\ No newline at end of file
+        return self.order_dao.find_orders_by_status("pending", lazy=True)
\ No newline at end of file
@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Literal, Optional
+
+from src.DAO.addressDAO import AddressDAO
+from src.DAO.bundleDAO import BundleDAO
+from src.DAO.dao_registry import DAORegistry
+from src.DAO.DBConnector import DBConnector
+from src.DAO.deliveryDAO import DeliveryDAO
+from src.DAO.itemDAO import ItemDAO
+from src.DAO.orderDAO import OrderDAO
+from src.DAO.userDAO import UserDAO
+from src.Model.address import Address
+from src.Model.delivery import Delivery
+from src.Model.order import Order
+
+ExportFormat = Literal["ndjson", "csv"]
+
+ORDER_COLUMNS = ["id_order", "order_date", "status", "price", "id_customer", "customer_name", "address", "items"]
+DELIVERY_COLUMNS = ["id_delivery", "status", "delivery_time", "id_driver", "driver_name", "orders"]
+USER_COLUMNS = ["id_user", "username", "user_type", "name", "phone_number", "sign_up_date"]
+
+
+class ExportService:
+    # Rows encoded together into one chunk of the stream: big enough to keep the per-chunk overhead
+    # low, small enough to keep the memory of the export constant.
+    ROWS_PER_CHUNK = 500
+
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
+        """
+        Initializes the service and injects dependencies into the DAOs.
+        The DAOs of `daos` are shared with the other services; without it, the service builds its own.
+        """
+        if daos is not None:
+            self.item_dao = daos.item_dao
+            self.user_dao = daos.user_dao
+            self.address_dao = daos.address_dao
+            self.bundle_dao = daos.bundle_dao
+            self.order_dao = daos.order_dao
+            self.delivery_dao = daos.delivery_dao
+        else:
+            self.item_dao = ItemDAO(db_connector=db_connector)
+            self.user_dao = UserDAO(db_connector=db_connector)
+            self.address_dao = AddressDAO(db_connector=db_connector)
+            self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+            self.order_dao = OrderDAO(
+                db_connector=db_connector,
+                item_dao=self.item_dao,
+                user_dao=self.user_dao,
+                address_dao=self.address_dao,
+                bundle_dao=self.bundle_dao,
+            )
+            self.delivery_dao = DeliveryDAO(db_connector=db_connector, user_dao=self.user_dao, order_dao=self.order_dao)
+
+    def export_orders(
+        self, export_format: ExportFormat, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """
+        Streams the orders placed between since (included) and until (excluded), as NDJSON or CSV text chunks.
+        """
+        orders = self.order_dao.iter_orders(since=since, until=until)
+        return self._encode((self._order_row(order) for order in orders), ORDER_COLUMNS, export_format)
+
+    def export_deliveries(
+        self, export_format: ExportFormat, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """
+        Streams the deliveries completed between since (included) and until (excluded), as NDJSON or CSV text chunks.
+        """
+        deliveries = self.delivery_dao.iter_deliveries(since=since, until=until)
+        return self._encode((self._delivery_row(delivery) for delivery in deliveries), DELIVERY_COLUMNS, export_format)
+
+    def export_users(
+        self, export_format: ExportFormat, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Iterator[str]:
+        """
+        Streams the users who signed up between since (included) and until (excluded), as NDJSON or CSV text chunks.
+        """
+        users = self.user_dao.iter_users(since=since, until=until)
+        return self._encode((self._user_row(user) for user in users), USER_COLUMNS, export_format)
+
+    @staticmethod
+    def gzip(chunks: Iterable[str]) -> Iterator[bytes]:
+        """
+        Compresses a text stream on the fly into a gzip stream, without buffering it.
+        """
+        compressor = zlib.compressobj(wbits=31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk.encode())
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def _encode(self, rows: Iterable[dict], columns: List[str], export_format: ExportFormat) -> Iterator[str]:
+        if export_format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        if export_format == "csv":
+            writer.writeheader()
+
+        row_count = 0
+        for row in rows:
+            if export_format == "csv":
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row, ensure_ascii=False))
+                buffer.write("\n")
+            row_count += 1
+            if row_count % self.ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _iso(value: Optional[date]) -> Optional[str]:
+        return value.isoformat() if value is not None else None
+
+    @staticmethod
+    def _format_address(address: Optional[Address]) -> Optional[str]:
+        if address is None:
+            return None
+        street = f"{address.street_number} {address.street_name}" if address.street_number else address.street_name
+        return f"{street}, {address.postal_code:05d} {address.city}"
+
+    @classmethod
+    def _order_row(cls, order: Order) -> dict:
+        return {
+            "id_order": order.id_order,
+            "order_date": cls._iso(order.order_date),
+            "status": order.status,
+            "price": order.price,
+            "id_customer": order.customer.id_user if order.customer else None,
+            "customer_name": order.customer.name if order.customer else None,
+            "address": cls._format_address(order.address),
+            "items": "; ".join(f"{line.quantity}x {line.item.name}" for line in order.lines),
+        }
+
+    @classmethod
+    def _delivery_row(cls, delivery: Delivery) -> dict:
+        return {
+            "id_delivery": delivery.id_delivery,
+            "status": delivery.status,
+            "delivery_time": cls._iso(delivery.delivery_time),
+            "id_driver": delivery.driver.id_user if delivery.driver else None,
+            "driver_name": delivery.driver.name if delivery.driver else None,
+            "orders": ";".join(str(order.id_order) for order in delivery.orders),
+        }
+
+    @classmethod
+    def _user_row(cls, user) -> dict:
+        return {
+            "id_user": user.id_user,
+            "username": user.username,
+            "user_type": type(user).__name__.lower(),
+            "name": getattr(user, "name", None),
+            "phone_number": getattr(user, "phone_number", None),
+            "sign_up_date": cls._iso(user.sign_up_date),
+        }
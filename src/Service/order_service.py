@@ -1,12 +1,15 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from src.DAO.addressDAO import AddressDAO
 from src.DAO.bundleDAO import BundleDAO
+from src.DAO.dao_registry import DAORegistry
 from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import in_identity_scope
 from src.DAO.itemDAO import ItemDAO
 from src.DAO.orderDAO import OrderDAO
 from src.DAO.userDAO import UserDAO
+from src.Model.address import Address
 from src.Model.customer import Customer
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.one_item_bundle import OneItemBundle
@@ -15,24 +18,32 @@ from src.Model.predefined_bundle import PredefinedBundle
 
 
 class OrderService:
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: DBConnector, daos: Optional[DAORegistry] = None):
         """
         Initializes the service and injects dependencies into the DAOs.
+        The DAOs of `daos` are shared with the other services; without it, the service builds its own.
         """
-        self.item_dao = ItemDAO(db_connector=db_connector)
-        self.user_dao = UserDAO(db_connector=db_connector)
-        self.address_dao = AddressDAO(db_connector=db_connector)
-        self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
-
-        self.order_dao = OrderDAO(
-            db_connector=db_connector,
-            user_dao=self.user_dao,
-            address_dao=self.address_dao,
-            item_dao=self.item_dao,
-            bundle_dao=self.bundle_dao,
-        )
+        if daos is not None:
+            self.item_dao = daos.item_dao
+            self.user_dao = daos.user_dao
+            self.address_dao = daos.address_dao
+            self.bundle_dao = daos.bundle_dao
+            self.order_dao = daos.order_dao
+        else:
+            self.item_dao = ItemDAO(db_connector=db_connector)
+            self.user_dao = UserDAO(db_connector=db_connector)
+            self.address_dao = AddressDAO(db_connector=db_connector)
+            self.bundle_dao = BundleDAO(db_connector=db_connector, item_dao=self.item_dao)
+
+            self.order_dao = OrderDAO(
+                db_connector=db_connector,
+                user_dao=self.user_dao,
+                address_dao=self.address_dao,
+                item_dao=self.item_dao,
+                bundle_dao=self.bundle_dao,
+            )
 
-    def create_order(self, customer_id: int, address_id: int) -> Optional[Order]:
+    def _find_customer_and_address(self, customer_id: int, address_id: int) -> Tuple[Customer, Address]:
         customer = self.user_dao.find_user_by_id(customer_id)
         if not customer or not isinstance(customer, Customer):
             raise ValueError(f"No valid customer found with ID {customer_id}")
@@ -41,6 +52,11 @@ class OrderService:
         if not address:
             raise ValueError(f"No address found with ID {address_id}")
 
+        return customer, address
+
+    def create_order(self, customer_id: int, address_id: int) -> Optional[Order]:
+        customer, address = self._find_customer_and_address(customer_id, address_id)
+
         new_order = Order(
             customer=customer,
             address=address,
@@ -56,6 +72,58 @@ class OrderService:
 
         return created_order
 
+    def checkout(
+        self,
+        customer_id: int,
+        address_id: int,
+        cart: List[PredefinedBundle | DiscountedBundle | OneItemBundle],
+    ) -> Optional[Order]:
+        """
+        Creates a 'pending' order containing every bundle of the cart.
+        The availability of all the cart items is checked with a single query, then the order,
+        all its items and the sales of its bundles are inserted in one transaction.
+        """
+        if not cart:
+            raise ValueError("Cannot checkout an empty cart.")
+
+        customer, address = self._find_customer_and_address(customer_id, address_id)
+
+        cart_items = [item for bundle in cart for item in bundle.composition]
+        fresh_items = {
+            item.id_item: item for item in self.item_dao.get_items_by_ids(list({i.id_item for i in cart_items}))
+        }
+
+        not_available = sorted(
+            {
+                item.name
+                for item in cart_items
+                if item.id_item not in fresh_items or not fresh_items[item.id_item].availability
+            }
+        )
+        if not_available:
+            raise ValueError(f"Cannot checkout because items {not_available} are not available.")
+
+        bundle_prices = [bundle.compute_price() for bundle in cart]
+        new_order = Order(
+            customer=customer,
+            address=address,
+            items=[fresh_items[item.id_item] for item in cart_items],
+            price=sum(bundle_prices),
+            status="pending",
+            order_date=datetime.now(),
+        )
+        bundle_sales = [
+            (bundle.id_bundle, price)
+            for bundle, price in zip(cart, bundle_prices, strict=True)
+            if bundle.id_bundle is not None
+        ]
+
+        created_order = self.order_dao.add_order(new_order, bundle_sales)
+        if not created_order:
+            raise Exception("Failed to create the order in the database.")
+
+        return created_order
+
     def cancel_order(self, order_id: int) -> bool:
         order = self.order_dao.find_order_by_id(order_id)
         if not order:
@@ -86,48 +154,42 @@ class OrderService:
             )
 
         for item in bundle.composition:
-            order.items.append(item)
+            order.add_item(item)
 
-        order.price += bundle.compute_price()
+        bundle_price = bundle.compute_price()
+        order.price += bundle_price
 
         if not self.order_dao.update_order(order):
             raise Exception("Failed to update the order.")
+        if bundle.id_bundle is not None:
+            self.order_dao.record_bundle_sale(order_id, bundle.id_bundle, bundle_price)
 
         return self.order_dao.find_order_by_id(order_id)
 
     def validate_order(self, order_id: int) -> Optional[Order]:
         """
-        Validate order: checks stock availability, updates stock, and sets status to 'validated'.
+        Validate order: reserves the stock of every item in one atomic statement, and sets status to 'validated'.
         """
         order = self.order_dao.find_order_by_id(order_id)
         if not order:
             raise ValueError(f"No order found with ID {order_id}.")
         if order.status != "pending":
             raise ValueError(f"Only 'pending' orders can be validated. Current status: '{order.status}'.")
-        if not order.items:
+        items_needed = order.item_quantities()
+        if not items_needed:
             raise ValueError("Cannot validate an empty order.")
 
-        items_needed = {}
-        for item in order.items:
-            items_needed[item.id_item] = items_needed.get(item.id_item, 0) + 1
-
-        items_to_update = []
-        for item_id, quantity_needed in items_needed.items():
-            fresh_item = self.item_dao.find_item_by_id(item_id)
+        failed_ids = self.item_dao.reserve_stock(items_needed)
+        if failed_ids:
+            fresh_items = {item.id_item: item for item in self.item_dao.get_items_by_ids(failed_ids)}
+            item_id = failed_ids[0]
+            fresh_item = fresh_items.get(item_id)
             if not fresh_item:
                 raise Exception(f"Item ID {item_id} required for order no longer exists.")
-            if fresh_item.stock < quantity_needed:
-                raise ValueError(
-                    f"Not enough stock for item '{fresh_item.name}'. Needed: {quantity_needed}, Available: {fresh_item.stock}."
-                )
-            fresh_item.stock -= quantity_needed
-            if fresh_item.stock == 0:
-                fresh_item.availability = False
-            items_to_update.append(fresh_item)
-
-        for item_to_update in items_to_update:
-            if not self.item_dao.update_item(item_to_update):
-                raise Exception(f"Failed to update stock for item {item_to_update.id_item}.")
+            raise ValueError(
+                f"Not enough stock for item '{fresh_item.name}'. "
+                f"Needed: {items_needed[item_id]}, Available: {fresh_item.stock}."
+            )
 
         order.status = "validated"
         if not self.order_dao.update_order(order):
@@ -141,6 +203,7 @@ class OrderService:
             raise ValueError(f"No order found with ID {order_id}.")
         return order
 
+    @in_identity_scope
     def list_orders_for_customer(self, customer_id: int) -> List[Order]:
         customer = self.user_dao.find_user_by_id(customer_id)
         if not customer or not isinstance(customer, Customer):
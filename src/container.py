@@ -0,0 +1,135 @@
+import threading
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from src.DAO.dao_registry import DAORegistry, shared
+from src.DAO.DBConnector import DBConnector
+
+if TYPE_CHECKING:
+    from src.Service.address_service import AddressService
+    from src.Service.admin_menu_service import AdminMenuService
+    from src.Service.admin_order_service import AdminOrderService
+    from src.Service.admin_user_service import AdminUserService
+    from src.Service.analytics_service import AnalyticsService
+    from src.Service.api_maps_service import ApiMapsService
+    from src.Service.authentication_service import AuthenticationService
+    from src.Service.driver_service import DriverService
+    from src.Service.export_service import ExportService
+    from src.Service.JWTService import JwtService
+    from src.Service.order_service import OrderService
+    from src.Service.password_service import PasswordService
+
+
+class Container:
+    """
+    Builds each service of the application on first use and shares it. All the services share the
+    DAOs of a single DAORegistry, hence a single connector (and its connection pool).
+
+    Nothing is built, and no environment variable is read, until a service is first requested. Service
+    modules are only imported then too, so that an entry point only loads the services it uses.
+    """
+
+    def __init__(self, db_connector: Optional[DBConnector] = None):
+        self._lock = threading.RLock()
+        if db_connector is not None:
+            self.__dict__["db_connector"] = db_connector
+
+    @shared
+    def db_connector(self) -> DBConnector:
+        return DBConnector()
+
+    @shared
+    def daos(self) -> DAORegistry:
+        return DAORegistry(self.db_connector)
+
+    @shared
+    def password_service(self) -> "PasswordService":
+        from src.Service.password_service import PasswordService
+
+        return PasswordService()
+
+    @shared
+    def jwt_service(self) -> "JwtService":
+        from src.Service.JWTService import JwtService
+
+        return JwtService()
+
+    @shared
+    def api_maps_service(self) -> "ApiMapsService":
+        from src.Service.api_maps_service import ApiMapsService
+
+        return ApiMapsService()
+
+    @shared
+    def auth_service(self) -> "AuthenticationService":
+        from src.Service.authentication_service import AuthenticationService
+
+        return AuthenticationService(self.db_connector, self.password_service, daos=self.daos)
+
+    @shared
+    def admin_user_service(self) -> "AdminUserService":
+        from src.Service.admin_user_service import AdminUserService
+
+        return AdminUserService(self.db_connector, self.password_service, daos=self.daos)
+
+    @shared
+    def driver_service(self) -> "DriverService":
+        from src.Service.driver_service import DriverService
+
+        return DriverService(self.db_connector, daos=self.daos)
+
+    @shared
+    def address_service(self) -> "AddressService":
+        from src.Service.address_service import AddressService
+
+        return AddressService(self.db_connector, daos=self.daos)
+
+    @shared
+    def order_service(self) -> "OrderService":
+        from src.Service.order_service import OrderService
+
+        return OrderService(self.db_connector, daos=self.daos)
+
+    @shared
+    def admin_order_service(self) -> "AdminOrderService":
+        from src.Service.admin_order_service import AdminOrderService
+
+        return AdminOrderService(self.db_connector, daos=self.daos)
+
+    @shared
+    def admin_menu_service(self) -> "AdminMenuService":
+        from src.Service.admin_menu_service import AdminMenuService
+
+        return AdminMenuService(self.db_connector, daos=self.daos)
+
+    @shared
+    def export_service(self) -> "ExportService":
+        from src.Service.export_service import ExportService
+
+        return ExportService(self.db_connector, daos=self.daos)
+
+    @shared
+    def analytics_service(self) -> "AnalyticsService":
+        from src.Service.analytics_service import AnalyticsService
+
+        return AnalyticsService(self.db_connector, daos=self.daos)
+
+
+class LazyServices(Mapping):
+    """
+    Read-only mapping of names to services of a container (e.g. {"auth": "auth_service"}), which
+    builds a service only when it is looked up.
+    """
+
+    def __init__(self, container: Container, names: Dict[str, str]):
+        self.container = container
+        self.names = names
+
+    def __getitem__(self, key: str):
+        return getattr(self.container, self.names[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -0,0 +1,101 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic_core import to_json
+
+from src.App.responses import FastJSONResponse
+from src.Model.address import Address
+from src.Model.customer import Customer
+from src.Model.item import Item
+from src.Model.order import Order
+
+
+def build_orders(count: int) -> List[Order]:
+    """Builds `count` orders of 3 lines, as the DAOs would return them."""
+    items = [
+        Item(id_item=1, name="Burger", item_type="main", price=9.5, stock=100),
+        Item(id_item=2, name="Fries", item_type="side", price=3.0, stock=100),
+        Item(id_item=3, name="Cola", item_type="drink", price=2.5, stock=100),
+    ]
+    start = datetime(2025, 1, 1, 12, 0)
+    orders = []
+    for i in range(count):
+        customer = Customer(
+            id_user=i % 50 + 1, username=f"customer{i % 50}", name="Jane Smith", phone_number="0601020304"
+        )
+        address = Address(id_address=i % 200 + 1, city="Rennes", postal_code=35000, street_name="rue de Nantes")
+        orders.append(
+            Order(
+                id_order=i + 1,
+                customer=customer,
+                address=address,
+                items=[items[0], items[0], items[1], items[2]],
+                price=24.5,
+                status="pending",
+                order_date=start + timedelta(minutes=i),
+            )
+        )
+    return orders
+
+
+def build_app(orders: List[Order]) -> FastAPI:
+    """
+    Serves the same orders through FastAPI's default paths (with and without a response model)
+    and through FastJSONResponse.
+    """
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=List[Order])
+    def response_model_path():
+        return orders
+
+    @app.get("/untyped")
+    def untyped_path():
+        return orders
+
+    @app.get("/fast")
+    def fast_path():
+        return FastJSONResponse(orders)
+
+    return app
+
+
+def mean_time(call, repeat: int) -> float:
+    """Returns the mean duration in milliseconds of `call`."""
+    call()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def run(count: int = 10_000, repeat: int = 5):
+    orders = build_orders(count)
+    client = TestClient(build_app(orders))
+
+    fast_body = client.get("/fast").json()
+    for path in ("/response-model", "/untyped"):
+        if client.get(path).json() != fast_body:
+            raise SystemExit(f"{path} and FastJSONResponse do not produce the same JSON.")
+
+    results = (
+        ("encoder only", lambda: json.dumps(jsonable_encoder(orders)), lambda: to_json(orders)),
+        ("response_model", lambda: client.get("/response-model"), lambda: client.get("/fast")),
+        ("untyped", lambda: client.get("/untyped"), lambda: client.get("/fast")),
+    )
+    print(f"{count} orders, mean of {repeat} runs")
+    print(f"{'':<16}{'default (ms)':>14}{'fast (ms)':>12}{'speedup':>10}")
+    for name, default_call, fast_call in results:
+        default_ms = mean_time(default_call, repeat)
+        fast_ms = mean_time(fast_call, repeat)
+        print(f"{name:<16}{default_ms:>14.1f}{fast_ms:>12.1f}{default_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    run(count=int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
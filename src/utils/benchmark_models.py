@@ -0,0 +1,68 @@
+import sys
+import time
+
+from src.DAO.addressDAO import AddressDAO
+from src.DAO.bundleDAO import BundleDAO
+from src.DAO.DBConnector import DBConnector
+from src.DAO.itemDAO import ItemDAO
+from src.DAO.orderDAO import OrderDAO
+from src.DAO.trusted_rows import trusted_rows
+from src.DAO.userDAO import UserDAO
+
+
+class ReplayConnector(DBConnector):
+    """
+    Answers the queries of the DAOs with the rows recorded from the database on their first
+    execution, so that the benchmark only measures the Python side of the DAOs.
+    """
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+        self.recorded = {}
+
+    def sql_query(self, query, data=None, return_type="one"):
+        key = (query, repr(data), return_type)
+        if key not in self.recorded:
+            self.recorded[key] = self.db_connector.sql_query(query, data, return_type)
+        result = self.recorded[key]
+        # The DAOs may consume the rows they receive, so each call gets fresh copies.
+        if isinstance(result, list):
+            return [dict(row) for row in result]
+        if isinstance(result, dict):
+            return dict(result)
+        return result
+
+
+def per_row_cost(find_all, repeat: int) -> tuple:
+    """Returns the number of rows and the mean cost per row in microseconds of a find_all call."""
+    row_count = len(find_all())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        find_all()
+    elapsed = time.perf_counter() - start
+    return row_count, elapsed / repeat / max(row_count, 1) * 1e6
+
+
+def run(test: bool = False, repeat: int = 20):
+    connector = ReplayConnector(DBConnector(test=test))
+    user_dao = UserDAO(connector)
+    item_dao = ItemDAO(connector)
+    order_dao = OrderDAO(
+        db_connector=connector,
+        item_dao=item_dao,
+        user_dao=user_dao,
+        address_dao=AddressDAO(db_connector=connector),
+        bundle_dao=BundleDAO(db_connector=connector, item_dao=item_dao),
+    )
+
+    print(f"{'':<16}{'rows':>8}{'validated (us/row)':>22}{'trusted (us/row)':>20}{'speedup':>10}")
+    for name, find_all in (("find_all_items", item_dao.find_all_items), ("find_all_orders", order_dao.find_all_orders)):
+        with trusted_rows(False):
+            row_count, validated = per_row_cost(find_all, repeat)
+        with trusted_rows(True):
+            _, trusted = per_row_cost(find_all, repeat)
+        print(f"{name:<16}{row_count:>8}{validated:>22.2f}{trusted:>20.2f}{validated / trusted:>9.1f}x")
+
+
+if __name__ == "__main__":
+    run(test="--test" in sys.argv)
@@ -0,0 +1,161 @@
+"""
+Startup profiling of the entry points: import time per module, construction time of each service
+and time of the first query, measured in a fresh interpreter so that nothing is already loaded.
+
+    pdm run profile_startup [cli|api|all] [--trend startup_trend.jsonl] [--top 15]
+
+Each run is appended to the trend file and compared with the previous run of the same entry point.
+Only the standard library is imported here, so that the profiler does not skew what it measures.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+# Entry point -> (module run by the entry point, module holding its `container` and `services`).
+ENTRY_POINTS = {
+    "cli": ("src.CLI.__main__", "src.init_app"),
+    "api": ("src.App.API", "src.App.init_app"),
+}
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Parses the report of `python -X importtime` into {"module", "self_ms", "cumulative_ms", "depth"} rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        rows.append(
+            {
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            }
+        )
+    return rows
+
+
+def _child(entry: str) -> None:
+    """Runs in the profiled interpreter: imports the entry point, then builds its services and queries once."""
+    import importlib
+
+    module, init_module = ENTRY_POINTS[entry]
+    start = time.perf_counter()
+    importlib.import_module(module)
+    init_app = importlib.import_module(init_module)
+    report = {"import_ms": (time.perf_counter() - start) * 1000, "services_ms": {}, "errors": {}}
+
+    for name in init_app.services:
+        start = time.perf_counter()
+        try:
+            init_app.services[name]
+            report["services_ms"][name] = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            report["errors"][name] = repr(e)
+
+    start = time.perf_counter()
+    try:
+        init_app.container.db_connector.sql_query("SELECT 1", None, "one")
+        report["first_query_ms"] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        report["first_query_ms"] = None
+        report["errors"]["first_query"] = repr(e)
+
+    print(json.dumps(report))
+
+
+def profile(entry: str, top: int = 15) -> dict:
+    """Profiles the cold start of an entry point in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src.utils.startup_profile", "--child", entry],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(completed.stderr)
+    report["entry"] = entry
+    report["slowest_imports"] = [
+        {"module": row["module"], "cumulative_ms": round(row["cumulative_ms"], 1)}
+        for row in sorted(imports, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+    ]
+    report["project_imports_ms"] = {
+        row["module"]: round(row["cumulative_ms"], 1) for row in imports if row["module"].startswith("src.")
+    }
+    return report
+
+
+def _previous(trend_path: str, entry: str) -> Optional[dict]:
+    if not os.path.exists(trend_path):
+        return None
+    previous = None
+    with open(trend_path, encoding="utf-8") as trend:
+        for line in trend:
+            record = json.loads(line)
+            if record.get("entry") == entry:
+                previous = record
+    return previous
+
+
+def _delta(value: Optional[float], previous: Optional[float]) -> str:
+    if value is None:
+        return "n/a"
+    if previous is None:
+        return f"{value:8.1f} ms"
+    return f"{value:8.1f} ms ({value - previous:+.1f})"
+
+
+def print_report(report: dict, previous: Optional[dict]) -> None:
+    previous = previous or {}
+    print(f"== {report['entry']}")
+    print(f"imports              {_delta(report['import_ms'], previous.get('import_ms'))}")
+    for name, elapsed in report["services_ms"].items():
+        print(f"  build {name:<14} {_delta(elapsed, previous.get('services_ms', {}).get(name))}")
+    print(f"first query          {_delta(report['first_query_ms'], previous.get('first_query_ms'))}")
+    for name, error in report["errors"].items():
+        print(f"  ! {name}: {error}")
+    print("slowest imports (cumulative):")
+    for row in report["slowest_imports"]:
+        print(f"  {row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Profiles the cold start of the CLI and API entry points.")
+    parser.add_argument("entry", nargs="?", choices=[*ENTRY_POINTS, "all"], default="all")
+    parser.add_argument("--trend", default="startup_trend.jsonl", help="JSON lines file the runs are appended to.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports reported.")
+    parser.add_argument("--child", choices=list(ENTRY_POINTS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child)
+        return
+
+    entries = list(ENTRY_POINTS) if args.entry == "all" else [args.entry]
+    commit = _git_commit()
+    for entry in entries:
+        report = profile(entry, args.top)
+        print_report(report, _previous(args.trend, entry))
+        report.update(timestamp=datetime.now().isoformat(timespec="seconds"), commit=commit)
+        with open(args.trend, "a", encoding="utf-8") as trend:
+            trend.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
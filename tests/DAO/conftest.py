@@ -0,0 +1,13 @@
+import pytest
+
+from src.DAO import replica_routing
+
+
+@pytest.fixture(autouse=True)
+def no_previous_write():
+    """
+    Every test starts without a recent write: the writes of the previous tests do not pin its reads to the primary.
+    """
+    token = replica_routing._last_write.set(None)
+    yield
+    replica_routing._last_write.reset(token)
@@ -1,9 +1,14 @@
 import os
+import time
 from unittest.mock import MagicMock, patch
 
+import psycopg2
 import pytest
 
 from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import identity_scope
+from src.DAO.query_limits import QueryCancelledError, QueryTimeoutError, cancellation_scope, statement_timeout
+from src.DAO.replica_routing import read_only
 
 
 @pytest.fixture
@@ -131,3 +136,284 @@ def test_sql_query_exception_handling(mock_connect, db_config):
 
     with pytest.raises(MockDatabaseError):
         connector.sql_query("SELECT * FROM fail")
+
+
+@patch("psycopg2.connect")
+def test_transaction_runs_its_queries_on_one_connection_of_the_primary(mock_connect, db_config):
+    """Tests that the queries of a transaction share one connection, and pin the unit of work to the primary."""
+    mock_conn = mock_connect.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchall.return_value = [{"id": 1}]
+    connector = DBConnector(config={**db_config, "replicas": "replica1"})
+
+    with identity_scope():
+        with connector.transaction() as query:
+            assert query("INSERT INTO t SELECT 1 RETURNING id", None, "all") == [{"id": 1}]
+            assert query("UPDATE t SET x = 1", None, None) is None
+        read_only(lambda: connector.sql_query("SELECT 1"))()
+
+    assert _hosts(mock_connect) == ["custom_host", "custom_host"]
+    assert [call.args[0] for call in mock_cursor.execute.call_args_list] == [
+        "INSERT INTO t SELECT 1 RETURNING id",
+        "UPDATE t SET x = 1",
+        "SELECT 1",
+    ]
+
+
+@patch("psycopg2.connect")
+def test_transaction_is_rolled_back_when_a_query_fails(mock_connect, db_config):
+    """Tests that an error leaves the transaction (whose connection context rolls it back) and is re-raised."""
+    mock_conn = mock_connect.return_value.__enter__.return_value
+    mock_conn.cursor.return_value.__enter__.return_value.execute.side_effect = [None, psycopg2.DataError("too long")]
+    connector = DBConnector(config=db_config)
+
+    with pytest.raises(psycopg2.DataError):
+        with connector.transaction() as query:
+            query("INSERT INTO t VALUES (1)", None, None)
+            query("INSERT INTO t VALUES ('a very long value')", None, None)
+
+    exit_args = mock_connect.return_value.__exit__.call_args.args
+    assert exit_args[0] is psycopg2.DataError
+    mock_connect.return_value.close.assert_called_once()
+
+
+@patch("psycopg2.connect")
+def test_stream_query_yields_chunks_from_a_named_cursor(mock_connect, db_config):
+    """Tests stream_query fetching rows chunk by chunk on a server-side cursor, then closing the connection."""
+    mock_conn = mock_connect.return_value
+    mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], [{"id": 3}], []]
+
+    connector = DBConnector(config={**db_config, "fetch_size": 2})
+    chunks = list(connector.stream_query("SELECT * FROM table", {"a": 1}))
+
+    assert chunks == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+    assert mock_conn.cursor.call_args.kwargs["name"].startswith("stream_")
+    assert mock_cursor.itersize == 2
+    mock_cursor.execute.assert_called_once_with("SELECT * FROM table", {"a": 1})
+    mock_cursor.fetchmany.assert_called_with(2)
+    mock_conn.close.assert_called_once()
+
+
+@patch("psycopg2.connect")
+def test_stream_query_closes_the_connection_when_abandoned(mock_connect, db_config):
+    """Tests that a stream closed before its end releases its connection."""
+    mock_conn = mock_connect.return_value
+    mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchmany.return_value = [{"id": 1}]
+
+    stream = DBConnector(config=db_config).stream_query("SELECT * FROM table", fetch_size=1)
+    assert next(stream) == [{"id": 1}]
+    stream.close()
+
+    mock_conn.close.assert_called_once()
+
+
+@patch("psycopg2.pool.ThreadedConnectionPool")
+def test_sql_query_borrows_a_pooled_connection(mock_pool_class, db_config):
+    """Tests that once the pool is open, queries borrow a connection from it and give it back."""
+    mock_pool = mock_pool_class.return_value
+    mock_conn = mock_pool.getconn.return_value
+    mock_conn.closed = 0
+    mock_cursor = mock_conn.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchone.return_value = {"id": 1}
+
+    connector = DBConnector(config={**db_config, "pool_min": 2, "pool_max": 5})
+    connector.open_pool()
+
+    with patch("psycopg2.connect") as mock_connect:
+        assert connector.sql_query("SELECT 1") == {"id": 1}
+        mock_connect.assert_not_called()
+
+    assert mock_pool_class.call_args.args == (2, 5)
+    mock_pool.putconn.assert_called_once_with(mock_conn, close=False)
+    mock_conn.close.assert_not_called()
+
+
+@patch("psycopg2.pool.ThreadedConnectionPool")
+def test_sql_query_gives_back_the_connection_on_error(mock_pool_class, db_config):
+    """Tests that a failed query rolls back and still returns its connection to the pool."""
+    mock_pool = mock_pool_class.return_value
+    mock_conn = mock_pool.getconn.return_value
+    mock_conn.closed = 0
+    mock_cursor = mock_conn.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.execute.side_effect = ValueError("boom")
+
+    connector = DBConnector(config=db_config)
+    connector.open_pool()
+
+    with pytest.raises(ValueError):
+        connector.sql_query("SELECT 1")
+
+    mock_pool.putconn.assert_called_once_with(mock_conn, close=False)
+    assert connector._pool_slots._value == connector.pool_max
+
+
+@patch("psycopg2.pool.ThreadedConnectionPool")
+@patch("psycopg2.connect")
+def test_close_pool_closes_the_connections_and_falls_back(mock_connect, mock_pool_class, db_config):
+    """Tests that closing the pool closes its connections, and that later queries open their own."""
+    mock_pool = mock_pool_class.return_value
+    connector = DBConnector(config=db_config)
+    connector.open_pool()
+
+    connector.close_pool(timeout=0)
+    connector.sql_query("SELECT 1")
+
+    mock_pool.closeall.assert_called_once()
+    mock_connect.assert_called_once()
+    mock_connect.return_value.close.assert_called_once()
+
+
+@patch("psycopg2.pool.ThreadedConnectionPool")
+def test_close_pool_waits_for_borrowed_connections(mock_pool_class, db_config):
+    """Tests that close_pool gives up waiting for a connection that is not given back after its timeout."""
+    connector = DBConnector(config={**db_config, "pool_max": 2})
+    connector.open_pool()
+    connector._pool_slots.acquire()
+
+    start = time.monotonic()
+    connector.close_pool(timeout=0.2)
+
+    assert time.monotonic() - start >= 0.2
+    mock_pool_class.return_value.closeall.assert_called_once()
+
+
+def _hosts(mock_connect):
+    return [call.kwargs["host"] for call in mock_connect.call_args_list]
+
+
+@patch("psycopg2.connect")
+def test_read_only_selects_are_spread_over_the_replicas(mock_connect, db_config):
+    """Tests that the reads of a @read_only method go to the replicas in turn, and writes to the primary."""
+    connector = DBConnector(config={**db_config, "replicas": "replica1:5434,replica2"})
+    find = read_only(lambda: connector.sql_query("SELECT 1"))
+
+    find()
+    find()
+    connector.sql_query("SELECT 1")
+    find_for_update = read_only(lambda: connector.sql_query("SELECT 1 FOR UPDATE"))
+    find_for_update()
+
+    assert _hosts(mock_connect) == ["replica1", "replica2", "custom_host", "custom_host"]
+    assert mock_connect.call_args_list[1].kwargs["port"] == "5433"
+
+
+@patch("psycopg2.connect")
+def test_reads_after_a_write_stay_on_the_primary(mock_connect, db_config):
+    """Tests that once a unit of work has written, its reads no longer go to a replica."""
+    connector = DBConnector(config={**db_config, "replicas": "replica1"})
+    find = read_only(lambda: connector.sql_query("SELECT 1"))
+
+    with identity_scope():
+        find()
+        connector.sql_query("UPDATE item SET stock = 0", None, None)
+        find()
+
+    assert _hosts(mock_connect) == ["replica1", "custom_host", "custom_host"]
+
+
+@patch("psycopg2.connect")
+def test_a_replica_that_fails_is_skipped_for_the_primary(mock_connect, db_config):
+    """Tests that a read is retried on the primary when its replica is down, and that the replica is then skipped."""
+    primary = MagicMock()
+    primary.__enter__.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = {"id": 1}
+
+    def connect(**parameters):
+        if parameters["host"] != "custom_host":
+            raise psycopg2.OperationalError("replica down")
+        return primary
+
+    mock_connect.side_effect = connect
+    connector = DBConnector(config={**db_config, "replicas": "replica1"})
+    find = read_only(lambda: connector.sql_query("SELECT 1"))
+
+    assert find() == {"id": 1}
+    assert find() == {"id": 1}
+
+    assert _hosts(mock_connect) == ["replica1", "custom_host", "custom_host"]
+    assert mock_connect.call_args_list[0].kwargs["connect_timeout"] == connector.replica_connect_timeout
+
+
+@patch("psycopg2.connect")
+def test_query_errors_on_a_replica_are_not_retried(mock_connect, db_config):
+    """Tests that an error in the query itself is raised instead of failing over to the primary."""
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.execute.side_effect = psycopg2.ProgrammingError("syntax error")
+    connector = DBConnector(config={**db_config, "replicas": "replica1"})
+
+    with pytest.raises(psycopg2.ProgrammingError):
+        read_only(lambda: connector.sql_query("SELECT nothing"))()
+
+    assert _hosts(mock_connect) == ["replica1"]
+    assert connector.replicas.healthy() == [("replica1", "5433")]
+
+
+@patch("psycopg2.connect")
+def test_stream_query_scans_a_replica(mock_connect, db_config):
+    """Tests that streamed scans are served by a replica."""
+    mock_connect.return_value.cursor.return_value.__enter__.return_value.fetchmany.return_value = []
+    connector = DBConnector(config={**db_config, "replicas": "replica1"})
+
+    assert list(connector.stream_query("SELECT * FROM item")) == []
+    assert _hosts(mock_connect) == ["replica1"]
+
+
+@patch("psycopg2.pool.ThreadedConnectionPool")
+def test_open_pool_opens_a_pool_per_replica(mock_pool_class, db_config):
+    """Tests that each replica gets its own pool, opened empty, and that close_pool drains them all."""
+    connector = DBConnector(config={**db_config, "replicas": "replica1", "pool_min": 2, "pool_max": 4})
+    connector.open_pool()
+
+    assert [call.args for call in mock_pool_class.call_args_list] == [(2, 4), (0, 4)]
+    assert mock_pool_class.call_args_list[1].kwargs["host"] == "replica1"
+
+    connector.close_pool(timeout=0)
+    assert mock_pool_class.return_value.closeall.call_count == 2
+
+
+@patch("psycopg2.connect")
+def test_the_default_statement_timeout_is_set_on_the_connection(mock_connect, db_config):
+    """Tests that the default statement timeout is a connection option, so that it costs no query."""
+    connector = DBConnector(config={**db_config, "statement_timeout": 2.5})
+    connector.sql_query("SELECT 1")
+
+    assert mock_connect.call_args.kwargs["options"] == "-c search_path=custom_schema -c statement_timeout=2500"
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.execute.assert_called_once_with("SELECT 1", None)
+
+
+@patch("psycopg2.connect")
+def test_other_timeouts_are_set_for_the_transaction(mock_connect, db_config):
+    """Tests that a per-call or per-method timeout is set with SET LOCAL before the query."""
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    connector = DBConnector(config=db_config)
+
+    connector.sql_query("SELECT 1", timeout=0.5)
+    with statement_timeout(10):
+        connector.sql_query("SELECT 2")
+
+    assert [call.args for call in mock_cursor.execute.call_args_list] == [
+        ("SET LOCAL statement_timeout = %s", (500,)),
+        ("SELECT 1", None),
+        ("SET LOCAL statement_timeout = %s", (10000,)),
+        ("SELECT 2", None),
+    ]
+
+
+@patch("psycopg2.connect")
+def test_cancelled_queries_raise_distinct_errors(mock_connect, db_config):
+    """Tests that a timeout raises QueryTimeoutError, and a cancellation QueryCancelledError."""
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.execute.side_effect = psycopg2.errors.QueryCanceled("canceling statement")
+    connector = DBConnector(config=db_config)
+
+    with pytest.raises(QueryTimeoutError) as timeout:
+        connector.sql_query("SELECT pg_sleep(60)", timeout=1)
+    assert timeout.value.timeout == 1
+
+    with cancellation_scope() as canceller:
+        canceller.cancelled = True
+        with pytest.raises(QueryCancelledError) as cancelled:
+            connector.sql_query("SELECT pg_sleep(60)")
+    assert not isinstance(cancelled.value, QueryTimeoutError)
@@ -1,9 +1,11 @@
 from typing import Any, Dict, List, Literal, Optional, Union
+from unittest.mock import MagicMock
 
 import pytest
 
 from src.DAO.addressDAO import AddressDAO
 from src.DAO.DBConnector import DBConnector
+from src.DAO.replica_routing import replica_allowed
 from src.Model.address import Address
 
 
@@ -38,6 +40,9 @@ class MockDBConnector(DBConnector):
         if "simulate_db_error" in q:
             raise Exception("Simulated Database Error")
 
+        if "select * from address where id_address = any" in q and return_type == "all":
+            return [address.copy() for address in self.address if address["id_address"] in data["id_addresses"]]
+
         if "select * from address where id_address" in q and return_type == "one":
             if isinstance(data, dict) and "id_address" in data:
                 address_id = data.get("id_address")
@@ -46,7 +51,11 @@ class MockDBConnector(DBConnector):
                         return address.copy()
             return None
 
-        if "select * from address where city =" in q and "street_name =" in q and return_type == "one":
+        if "with inserted as ( insert into address" in q and return_type == "one":
+            existing = self.sql_query("SELECT * FROM address WHERE address_key = address_key(", data, "one")
+            return existing or self.sql_query("INSERT INTO address RETURNING *", data, "one")
+
+        if "select * from address where address_key = address_key(" in q and return_type == "one":
             if isinstance(data, dict):
                 target_city = data.get("city")
                 target_zip = data.get("postal_code")
@@ -115,6 +124,11 @@ class MockDBConnector(DBConnector):
 
         return None
 
+    def stream_query(self, query: str, data=None, fetch_size: Optional[int] = None):
+        rows = self.sql_query(query, data, "all")
+        for start in range(0, len(rows), fetch_size or 1):
+            yield rows[start : start + (fetch_size or 1)]
+
 
 @pytest.fixture
 def mock_db_connector():
@@ -141,6 +155,13 @@ def test_find_address_by_id_non_existing(address_dao: AddressDAO):
     assert found_address is None
 
 
+def test_find_addresses_by_ids(address_dao: AddressDAO):
+    """Tests retrieving several addresses with one query."""
+    found_addresses = address_dao.find_addresses_by_ids([2, 999])
+    assert [a.id_address for a in found_addresses] == [2]
+    assert address_dao.find_addresses_by_ids([]) == []
+
+
 def test_find_all_addresses(address_dao: AddressDAO):
     """Tests retrieving all addresses."""
     all_addresses = address_dao.find_all_addresses()
@@ -150,6 +171,13 @@ def test_find_all_addresses(address_dao: AddressDAO):
     assert all_addresses[0].id_address == 1
 
 
+def test_iter_addresses(address_dao: AddressDAO):
+    """Tests streaming all addresses chunk by chunk."""
+    streamed_addresses = list(address_dao.iter_addresses(fetch_size=1))
+    assert [a.id_address for a in streamed_addresses] == [1, 2]
+    assert streamed_addresses[1].postal_code == 89000
+
+
 def test_add_address_success(address_dao: AddressDAO, mock_db_connector):
     """Tests successfully adding a new address."""
     new_address = Address(city="Paris", postal_code=75001, street_name="Rue de Rivoli", street_number="10")
@@ -286,6 +314,47 @@ def test_find_address_by_components_not_found(address_dao: AddressDAO):
     assert found_address is None
 
 
+def test_upsert_address_returns_the_existing_address(address_dao: AddressDAO, mock_db_connector):
+    """Tests that upserting an existing address returns it without adding a row."""
+    address = Address(city="Lyon", postal_code=69000, street_name="Rue de la République", street_number=1)
+
+    upserted = address_dao.upsert_address(address)
+
+    assert upserted.id_address == 1
+    assert len(mock_db_connector.address) == 2
+
+
+def test_upsert_address_adds_a_new_address(address_dao: AddressDAO, mock_db_connector):
+    """Tests that upserting an unknown address adds it."""
+    address = Address(city="Nantes", postal_code=44000, street_name="Quai de la Fosse", street_number="2")
+
+    upserted = address_dao.upsert_address(address)
+
+    assert upserted.id_address == 3
+    assert upserted.postal_code == 44000
+    assert len(mock_db_connector.address) == 3
+
+
+def test_upsert_address_reads_a_concurrent_insertion_from_the_primary():
+    """Tests that the row inserted by a concurrent checkout is read back where it was written."""
+    row = {"id_address": 7, "city": "Nantes", "postal_code": 44000, "street_name": "Quai", "street_number": None}
+    replica_reads = []
+
+    def sql_query(query, data=None, return_type="one"):
+        replica_reads.append(replica_allowed(query))
+        return None if len(replica_reads) == 1 else row
+
+    connector = MagicMock(spec=DBConnector)
+    connector.sql_query.side_effect = sql_query
+
+    upserted = AddressDAO(db_connector=connector).upsert_address(
+        Address(city="Nantes", postal_code=44000, street_name="Quai")
+    )
+
+    assert upserted.id_address == 7
+    assert replica_reads == [False, False]
+
+
 def test_find_address_by_components_error_handling(address_dao: AddressDAO, mock_db_connector):
     """Tests error handling when finding address by components."""
     mock_db_connector.sql_query = (
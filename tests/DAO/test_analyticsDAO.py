@@ -0,0 +1,96 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.DAO.analyticsDAO import AnalyticsDAO
+from src.DAO.DBConnector import DBConnector
+from src.DAO.query_limits import REPORT_TIMEOUT, QueryTimeoutError, current_statement_timeout
+
+SINCE = datetime(2025, 1, 1)
+UNTIL = datetime(2025, 2, 1)
+
+
+@pytest.fixture
+def mock_db_connector():
+    return MagicMock(spec=DBConnector)
+
+
+@pytest.fixture
+def analytics_dao(mock_db_connector) -> AnalyticsDAO:
+    return AnalyticsDAO(db_connector=mock_db_connector)
+
+
+def test_revenue_by_period(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that the revenue is aggregated by the database over the sold orders of the period."""
+    rows = [{"period": datetime(2025, 1, 6), "orders": 3, "revenue": 42.0}]
+    mock_db_connector.sql_query.return_value = rows
+
+    assert analytics_dao.revenue_by_period(SINCE, UNTIL, "week") == rows
+
+    query, params, return_type = mock_db_connector.sql_query.call_args.args
+    assert "date_trunc(%(bucket)s, o.order_date)" in query
+    assert "o.status <> 'pending'" in query
+    assert params == {"bucket": "week", "since": SINCE, "until": UNTIL}
+    assert return_type == "all"
+
+
+def test_top_items(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that the top items query is limited by the database."""
+    mock_db_connector.sql_query.return_value = []
+
+    assert analytics_dao.top_items(SINCE, UNTIL, limit=5) == []
+
+    query, params, _ = mock_db_connector.sql_query.call_args.args
+    assert "LIMIT %(limit)s" in query
+    assert params == {"since": SINCE, "until": UNTIL, "limit": 5}
+
+
+def test_top_bundles(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that the bundle sales come from order_bundle."""
+    rows = [{"id_bundle": 1, "name": "Menu", "bundle_type": "predefined", "quantity": 2, "revenue": 30.0}]
+    mock_db_connector.sql_query.return_value = rows
+
+    assert analytics_dao.top_bundles(SINCE, UNTIL) == rows
+    assert "JOIN order_bundle ob" in mock_db_connector.sql_query.call_args.args[0]
+
+
+def test_analytics_db_error(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that a failing aggregate returns an empty report."""
+    mock_db_connector.sql_query.side_effect = Exception("DB error")
+
+    assert analytics_dao.revenue_by_period(SINCE, UNTIL) == []
+    assert analytics_dao.top_items(SINCE, UNTIL) == []
+    assert analytics_dao.top_bundles(SINCE, UNTIL) == []
+
+
+def test_dashboard_counters(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that the dashboard is one read of the trigger-maintained counters."""
+    counters = {"pending_orders": 2, "active_drivers": 1, "revenue_today": 12.5}
+    mock_db_connector.sql_query.return_value = counters
+
+    assert analytics_dao.dashboard_counters() == counters
+
+    query, _, return_type = mock_db_connector.sql_query.call_args.args
+    assert "FROM dashboard_counter" in query
+    assert return_type == "one"
+    mock_db_connector.sql_query.assert_called_once()
+
+    mock_db_connector.sql_query.side_effect = Exception("DB error")
+    assert analytics_dao.dashboard_counters() is None
+
+
+def test_reports_have_their_own_timeout_and_raise_it(analytics_dao: AnalyticsDAO, mock_db_connector):
+    """Tests that a report runs under the report timeout, and that a timeout is raised rather than logged."""
+    seen = []
+
+    def slow_query(*args):
+        seen.append(current_statement_timeout())
+        raise QueryTimeoutError(REPORT_TIMEOUT)
+
+    mock_db_connector.sql_query.side_effect = slow_query
+
+    with pytest.raises(QueryTimeoutError):
+        analytics_dao.top_items(SINCE, UNTIL)
+    assert seen == [REPORT_TIMEOUT]
+    assert current_statement_timeout() is None
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+from src.DAO.addressDAO import AddressDAO
+from src.DAO.batch_loader import defer, load_batched
+from src.DAO.DBConnector import DBConnector
+from src.DAO.identity_map import identity_scope, remember
+
+
+def test_nothing_is_batched_outside_of_a_scope():
+    fetch_many = MagicMock()
+    defer("user", [1, 2])
+    assert load_batched("user", 1, fetch_many) is False
+    fetch_many.assert_not_called()
+
+
+def test_deferred_keys_are_fetched_together():
+    fetch_many = MagicMock()
+    with identity_scope():
+        remember("user", 3, "already mapped")
+        defer("user", [1, 2, 3, None])
+
+        assert load_batched("user", 1, fetch_many) is True
+        assert load_batched("user", 2, fetch_many) is False
+
+    fetch_many.assert_called_once()
+    assert sorted(fetch_many.call_args[0][0]) == [1, 2]
+
+
+def test_single_key_without_deferred_keys_is_not_batched():
+    fetch_many = MagicMock()
+    with identity_scope():
+        defer("address", [1])
+        assert load_batched("address", 1, fetch_many) is False
+    fetch_many.assert_not_called()
+
+
+def test_find_by_id_resolves_deferred_keys_with_one_query():
+    db_connector = MagicMock(spec=DBConnector)
+    db_connector.sql_query.return_value = [
+        {"id_address": 1, "city": "Rennes", "postal_code": 35000, "street_name": "Rue A", "street_number": "1"},
+        {"id_address": 2, "city": "Brest", "postal_code": 29200, "street_name": "Rue B", "street_number": "2"},
+    ]
+    address_dao = AddressDAO(db_connector=db_connector)
+
+    with identity_scope():
+        defer("address", [1, 2])
+        first = address_dao.find_address_by_id(1)
+        second = address_dao.find_address_by_id(2)
+
+    assert (first.city, second.city) == ("Rennes", "Brest")
+    db_connector.sql_query.assert_called_once()
+    assert "ANY" in db_connector.sql_query.call_args[0][0]
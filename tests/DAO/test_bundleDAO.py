@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Literal, Optional, Union
 
 import pytest
 
-from src.DAO.bundleDAO import BundleDAO
+from src.DAO.bundleDAO import BundleDAO, composition_fingerprint
 from src.DAO.DBConnector import DBConnector
 from src.DAO.itemDAO import ItemDAO
 from src.Model.discounted_bundle import DiscountedBundle
@@ -97,6 +97,18 @@ class MockDBConnector(DBConnector):
                         return [{"item_type": t, "quantity_required": c} for t, c in counts.items()]
             return []
 
+        if q.startswith("select id_bundle from bundle where lower(name)"):
+            for b in self.bundles:
+                if b["name"].lower() == data["name"].lower():
+                    return {"id_bundle": b["id_bundle"]}
+            return None
+
+        if q.startswith("select id_bundle from bundle where composition_fingerprint"):
+            for b in self.bundles:
+                if b.get("composition_fingerprint") == data["fingerprint"]:
+                    return {"id_bundle": b["id_bundle"]}
+            return None
+
         if "select id_bundle from bundle" in q and return_type == "all":
             return [{"id_bundle": b["id_bundle"]} for b in self.bundles]
 
@@ -122,6 +134,7 @@ class MockDBConnector(DBConnector):
                 "price": data.get("price"),
                 "discount": data.get("discount"),
                 "required_item_types": [],
+                "composition_fingerprint": data.get("fingerprint"),
             }
             self.bundles.append(new_bundle)
             return new_bundle
@@ -149,6 +162,7 @@ class MockDBConnector(DBConnector):
                 for b in self.bundles:
                     if b["id_bundle"] == bid:
                         b.update({k: v for k, v in data.items() if k in b})
+                        b["composition_fingerprint"] = data.get("fingerprint")
                         return True
             return None
 
@@ -272,6 +286,36 @@ def test_add_discounted_bundle(bundle_dao: BundleDAO):
     assert created.discount == 0.28
 
 
+def test_composition_fingerprint_ignores_order_and_case():
+    assert composition_fingerprint("predefined", [12, 3, 7]) == "predefined:3,7,12"
+    assert composition_fingerprint("discount", ["Main", "drink", "main"]) == "discount:drink,main,main"
+    assert composition_fingerprint("discount", ["main"]) != composition_fingerprint("discount", ["main", "main"])
+
+
+def test_find_bundle_id_by_name_ignores_case(bundle_dao: BundleDAO):
+    assert bundle_dao.find_bundle_id_by_name("burger MENU") == 2
+    assert bundle_dao.find_bundle_id_by_name("Unknown") is None
+
+
+def test_added_bundles_are_found_by_composition(bundle_dao: BundleDAO):
+    items = [Item(id_item=iid, name=f"Item {iid}", price=5.0, item_type="main") for iid in (302, 301)]
+    predefined = bundle_dao.add_predefined_bundle(PredefinedBundle(name="Duo", price=9.0, composition=items))
+    discounted = bundle_dao.add_discounted_bundle(
+        DiscountedBundle(name="Lunch", discount=0.1, required_item_types=["main", "drink"])
+    )
+
+    assert bundle_dao.find_bundle_id_by_composition("predefined", [301, 302]) == predefined.id_bundle
+    assert bundle_dao.find_bundle_id_by_composition("discount", ["Drink", "main"]) == discounted.id_bundle
+    assert bundle_dao.find_bundle_id_by_composition("discount", ["main"]) is None
+
+
+def test_update_bundle_refreshes_the_fingerprint(bundle_dao: BundleDAO, mock_db_connector):
+    bundle = DiscountedBundle(id_bundle=3, name="Promo for couple", discount=0.1, required_item_types=["side"])
+
+    assert bundle_dao.update_bundle(bundle) is True
+    assert bundle_dao.find_bundle_id_by_composition("discount", ["side"]) == 3
+
+
 def test_update_bundle_predefined(bundle_dao: BundleDAO):
     item_mock = Item(id_item=101, name="Banh Mi", price=5.0, item_type="main")
     bundle_to_update = PredefinedBundle(
@@ -314,6 +358,12 @@ def test_find_bundle_error(bundle_dao: BundleDAO, mock_db_connector):
     assert bundle_dao.find_bundle_by_id(1) is None
 
 
+def test_find_bundle_id_error(bundle_dao: BundleDAO, mock_db_connector):
+    mock_db_connector.sql_query = lambda q, d, rt: exec('raise Exception("DB Error")')
+    assert bundle_dao.find_bundle_id_by_name("Burger Menu") is None
+    assert bundle_dao.find_bundle_id_by_composition("predefined", [201, 202]) is None
+
+
 def test_add_bundle_error(bundle_dao: BundleDAO, mock_db_connector):
     mock_db_connector.sql_query = lambda q, d, rt: exec('raise Exception("DB Error")')
     new_bundle = DiscountedBundle(name="Fail", description="", discount=0.1, required_item_types=[])
@@ -0,0 +1,41 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from src.DAO.dao_registry import DAORegistry
+from src.DAO.DBConnector import DBConnector
+
+
+def test_daos_are_built_once_and_shared():
+    """Tests that every DAO is built on first access and that the DAOs depend on each other's instances."""
+    registry = DAORegistry(MagicMock(spec=DBConnector))
+
+    assert "order_dao" not in registry.__dict__
+    order_dao = registry.order_dao
+
+    assert registry.order_dao is order_dao
+    assert order_dao.item_dao is registry.item_dao
+    assert order_dao.bundle_dao is registry.bundle_dao
+    assert registry.bundle_dao.item_dao is registry.item_dao
+    assert registry.delivery_dao.order_dao is order_dao
+    assert registry.delivery_dao.user_dao is order_dao.user_dao
+
+
+def test_concurrent_first_accesses_build_a_single_dao():
+    """Tests that threads racing on the first access of a DAO all get the same instance."""
+    registry = DAORegistry(MagicMock(spec=DBConnector))
+    barrier = threading.Barrier(8)
+    results = []
+
+    def access():
+        barrier.wait()
+        results.append(registry.user_dao)
+
+    with patch("src.DAO.dao_registry.UserDAO", side_effect=lambda db_connector: object()) as user_dao_class:
+        threads = [threading.Thread(target=access) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    user_dao_class.assert_called_once()
+    assert all(result is results[0] for result in results)
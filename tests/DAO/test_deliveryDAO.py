@@ -61,6 +61,22 @@ class MockDBConnector(DBConnector):
                 return [{"id_order": oid} for oid in order_ids]
             return []
 
+        if "select id_delivery, id_order from delivery_order" in q and return_type == "all":
+            return [
+                {"id_delivery": did, "id_order": oid}
+                for did in sorted(self.delivery_orders)
+                if did in data["id_deliveries"]
+                for oid in self.delivery_orders[did]
+            ]
+
+        if "from delivery_order dor join" in q and return_type == "all":
+            return [
+                {"id_delivery": did, "id_order": oid}
+                for did in sorted(self.delivery_orders)
+                if did in data["id_deliveries"]
+                for oid in self.delivery_orders[did]
+            ]
+
         if "select * from delivery" in q and return_type == "all":
             if "where" not in q:
                 return [d.copy() for d in self.deliveries]
@@ -209,6 +225,17 @@ def test_find_all_deliveries(delivery_dao: DeliveryDAO):
     assert len(deliveries[1].orders) == 1
 
 
+def test_find_all_deliveries_fetches_the_order_ids_once(delivery_dao: DeliveryDAO, mock_db_connector, mocker):
+    spy = mocker.spy(mock_db_connector, "sql_query")
+
+    deliveries = delivery_dao.find_all_deliveries()
+
+    assert [order.id_order for order in deliveries[0].orders] == [100, 101]
+    link_queries = [call for call in spy.call_args_list if "delivery_order" in call.args[0]]
+    assert len(link_queries) == 1
+    assert link_queries[0].args[1] == {"id_deliveries": [1, 2]}
+
+
 def test_find_in_progress_deliveries_by_driver(delivery_dao: DeliveryDAO):
     deliveries = delivery_dao.find_in_progress_deliveries_by_driver(10)
 
@@ -217,6 +244,28 @@ def test_find_in_progress_deliveries_by_driver(delivery_dao: DeliveryDAO):
     assert deliveries[1].status == "in_progress"
 
 
+def test_find_in_progress_deliveries_by_driver_lazy(delivery_dao: DeliveryDAO, mock_user_dao, mock_order_dao):
+    mock_order_dao.build_lazy_orders.side_effect = lambda rows: [
+        MagicMock(spec=Order, id_order=row["id_order"]) for row in rows
+    ]
+    mock_user_dao.find_users_by_ids.return_value = [mock_user_dao.find_user_by_id.return_value]
+
+    deliveries = delivery_dao.find_in_progress_deliveries_by_driver(10, lazy=True)
+
+    assert [d.id_delivery for d in deliveries] == [1, 2]
+    mock_order_dao.build_lazy_orders.assert_not_called()
+    mock_user_dao.find_users_by_ids.assert_not_called()
+
+    assert [o.id_order for o in deliveries[1].orders] == [102]
+    assert [o.id_order for o in deliveries[0].orders] == [100, 101]
+    assert deliveries[0].driver.id_user == 10
+    assert deliveries[1].driver.id_user == 10
+    mock_order_dao.build_lazy_orders.assert_called_once()
+    mock_user_dao.find_users_by_ids.assert_called_once_with([10])
+    mock_order_dao.find_order_by_id.assert_not_called()
+    mock_user_dao.find_user_by_id.assert_not_called()
+
+
 def test_add_delivery_success(delivery_dao: DeliveryDAO, mocker):
     driver = Driver(
         id_user=10,
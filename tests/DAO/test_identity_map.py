@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock
+
+from src.DAO.identity_map import (
+    current_identity_map,
+    forget,
+    identity_scope,
+    in_identity_scope,
+    lookup,
+    lookup_many,
+    materialize,
+    remember,
+)
+from src.DAO.itemDAO import ItemDAO
+
+
+def test_nothing_is_cached_outside_of_a_scope():
+    assert current_identity_map() is None
+    assert remember("item", 1, "burger") == "burger"
+    assert lookup("item", 1) is None
+
+
+def test_scope_maps_entities_by_kind_and_key():
+    with identity_scope() as identity_map:
+        assert remember("item", 1, "burger") == "burger"
+        assert remember("item", 1, "other burger") == "burger"
+        assert lookup("item", 1) == "burger"
+        assert lookup("user", 1) is None
+        assert len(identity_map) == 1
+
+        forget("item", 1)
+        assert lookup("item", 1) is None
+
+    assert current_identity_map() is None
+
+
+def test_nested_scopes_share_the_outer_map():
+    with identity_scope() as outer:
+        with identity_scope() as inner:
+            assert inner is outer
+            remember("address", 3, "home")
+        assert lookup("address", 3) == "home"
+
+
+def test_lookup_many_splits_mapped_and_missing_keys():
+    with identity_scope():
+        remember("user", 1, "alice")
+        found, missing = lookup_many("user", [1, 2, 2, 3])
+    assert found == {1: "alice"}
+    assert missing == [2, 3]
+
+
+def test_materialize_only_builds_once():
+    build = MagicMock(return_value="fries")
+    with identity_scope():
+        assert materialize("item", 2, build) == "fries"
+        assert materialize("item", 2, build) == "fries"
+    build.assert_called_once()
+
+
+def test_in_identity_scope_decorator():
+    @in_identity_scope
+    def unit_of_work():
+        return current_identity_map()
+
+    assert unit_of_work() is not None
+    assert current_identity_map() is None
+
+
+def test_dao_returns_the_same_instance_within_a_scope():
+    db_connector = MagicMock()
+    db_connector.sql_query.return_value = {
+        "id_item": 1,
+        "name": "Burger",
+        "item_type": "main",
+        "price": 8.0,
+        "description": None,
+        "stock": 5,
+        "availability": True,
+    }
+    item_dao = ItemDAO(db_connector)
+
+    with identity_scope():
+        first = item_dao.find_item_by_id(1)
+        assert item_dao.find_item_by_id(1) is first
+        assert item_dao.get_items_by_ids([1]) == [first]
+        assert db_connector.sql_query.call_count == 1
+
+        item_dao.update_item(first)
+        assert item_dao.find_item_by_id(1) is not first
+
+    assert item_dao.find_item_by_id(1) is not item_dao.find_item_by_id(1)
@@ -1,13 +1,19 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
+from unittest.mock import MagicMock
 
 import pytest
 
 from src.DAO.addressDAO import AddressDAO
+from src.DAO.analyticsDAO import AnalyticsDAO
 from src.DAO.bundleDAO import BundleDAO
 from src.DAO.DBConnector import DBConnector
 from src.DAO.deliveryDAO import DeliveryDAO
 from src.DAO.itemDAO import ItemDAO
 from src.DAO.orderDAO import OrderDAO
+from src.DAO.query_limits import QueryCancelledError, QueryTimeoutError, cancellation_scope, statement_timeout
 from src.DAO.userDAO import UserDAO
 from src.Model.address import Address
 from src.Model.customer import Customer
@@ -16,6 +22,7 @@ from src.Model.driver import Driver
 from src.Model.item import Item
 from src.Model.order import Order
 from src.Model.predefined_bundle import PredefinedBundle
+from src.Service.order_service import OrderService
 from src.utils.reset_database_test import ResetDatabaseTest
 
 
@@ -188,3 +195,387 @@ def test_integration_unique_username(daos, db_connector):
 
     result = daos["user"].add_user(u2)
     assert result is None
+
+
+def test_integration_reserve_stock(daos):
+    """
+    Test: Stock reservation is atomic and flips availability when the stock reaches zero.
+    """
+    item1 = daos["item"].add_item(Item(name="Reserve A", item_type="main", price=8.0, stock=3, availability=True))
+    item2 = daos["item"].add_item(Item(name="Reserve B", item_type="side", price=2.0, stock=1, availability=True))
+
+    failed = daos["item"].reserve_stock({item1.id_item: 1, item2.id_item: 2})
+    assert failed == [item2.id_item]
+    assert daos["item"].find_item_by_id(item1.id_item).stock == 3
+
+    failed = daos["item"].reserve_stock({item1.id_item: 2, item2.id_item: 1})
+    assert failed == []
+    assert daos["item"].find_item_by_id(item1.id_item).stock == 1
+    emptied_item = daos["item"].find_item_by_id(item2.id_item)
+    assert emptied_item.stock == 0
+    assert emptied_item.availability is False
+
+
+def test_integration_update_order_diff(daos):
+    """
+    Test: Updating an order only rewrites the changed items, and statuses can be updated in bulk.
+    """
+    customer = daos["user"].find_user_by_username("integration_user")
+    address = daos["address"].find_all_addresses()[0]
+    item1 = daos["item"].add_item(Item(name="Diff A", item_type="main", price=9.0, stock=10, availability=True))
+    item2 = daos["item"].add_item(Item(name="Diff B", item_type="drink", price=3.0, stock=10, availability=True))
+    item3 = daos["item"].add_item(Item(name="Diff C", item_type="dessert", price=4.0, stock=10, availability=True))
+
+    created_order = daos["order"].add_order(
+        Order(customer=customer, address=address, items=[item1, item2], status="pending", price=12.0)
+    )
+
+    created_order.items = [item1, item3]
+    created_order.price = 13.0
+    assert daos["order"].update_order(created_order) is True
+
+    fetched_order = daos["order"].find_order_by_id(created_order.id_order)
+    assert sorted(item.id_item for item in fetched_order.items) == [item1.id_item, item3.id_item]
+    assert fetched_order.price == 13.0
+
+    assert daos["order"].update_order_status([created_order.id_order], "in_progress") is True
+    assert daos["order"].find_order_by_id(created_order.id_order).status == "in_progress"
+
+
+def test_integration_lazy_loading(daos):
+    """
+    Test: Lazily loaded deliveries and orders fetch the same graph as the eager path.
+    """
+    driver = daos["user"].find_user_by_username("fast_driver")
+    deliveries = daos["delivery"].find_in_progress_deliveries_by_driver(driver.id_user, lazy=True)
+    eager_deliveries = daos["delivery"].find_in_progress_deliveries_by_driver(driver.id_user)
+
+    assert [d.id_delivery for d in deliveries] == [d.id_delivery for d in eager_deliveries]
+    assert deliveries[0].driver.name == "Fast Eddie"
+    assert [o.id_order for o in deliveries[0].orders] == [o.id_order for o in eager_deliveries[0].orders]
+    assert deliveries[0].orders[0].address == eager_deliveries[0].orders[0].address
+
+    lazy_orders = {o.id_order: o for o in daos["order"].find_all_orders(lazy=True)}
+    for order in daos["order"].find_all_orders():
+        lazy_order = lazy_orders[order.id_order]
+        assert lazy_order.customer.id_user == order.customer.id_user
+        assert lazy_order.item_quantities() == order.item_quantities()
+        assert lazy_order.load_relations().model_dump(exclude={"customer"}) == order.model_dump(exclude={"customer"})
+
+
+def test_integration_batched_loading(db_connector):
+    """
+    Test: Loading every order costs one query per kind of relation, not per order.
+    """
+    counting_connector = MagicMock(spec=DBConnector, wraps=db_connector)
+    user_dao = UserDAO(counting_connector)
+    item_dao = ItemDAO(counting_connector)
+    order_dao = OrderDAO(
+        db_connector=counting_connector,
+        user_dao=user_dao,
+        item_dao=item_dao,
+        address_dao=AddressDAO(db_connector=counting_connector),
+        bundle_dao=BundleDAO(db_connector=counting_connector, item_dao=item_dao),
+    )
+
+    orders = order_dao.find_all_orders()
+
+    assert len(orders) > 3
+    assert counting_connector.sql_query.call_count == 4
+    for order in orders[:3]:
+        assert order.model_dump() == order_dao.find_order_by_id(order.id_order).model_dump()
+
+
+def test_integration_streaming_scans(daos, db_connector):
+    """
+    Test: Streaming scans return the same entities as the list-based finders, chunk by chunk.
+    """
+    streamed_users = list(daos["user"].iter_users(fetch_size=2))
+    assert [u.id_user for u in streamed_users] == sorted(u.id_user for u in streamed_users)
+    assert daos["user"].find_user_by_username("fast_driver") in streamed_users
+    assert list(daos["address"].iter_addresses(fetch_size=2)) == sorted(
+        daos["address"].find_all_addresses(), key=lambda a: a.id_address
+    )
+
+    orders = sorted(daos["order"].find_all_orders(), key=lambda o: o.id_order)
+    streamed_orders = list(daos["order"].iter_orders(fetch_size=3))
+    assert [o.id_order for o in streamed_orders] == [o.id_order for o in orders]
+    for streamed_order, order in zip(streamed_orders, orders, strict=True):
+        assert streamed_order.customer.id_user == order.customer.id_user
+        assert streamed_order.model_dump(exclude={"customer"}) == order.model_dump(exclude={"customer"})
+
+    deliveries = sorted(daos["delivery"].find_all_deliveries(), key=lambda d: d.id_delivery)
+    streamed_deliveries = list(daos["delivery"].iter_deliveries(fetch_size=1))
+    assert [d.id_delivery for d in streamed_deliveries] == [d.id_delivery for d in deliveries]
+    assert [[o.id_order for o in d.orders] for d in streamed_deliveries] == [
+        [o.id_order for o in d.orders] for d in deliveries
+    ]
+
+
+def test_integration_sales_analytics(db_connector):
+    """
+    Test: Sales aggregates are computed by SQL over the sold orders of the period only.
+    """
+    analytics_dao = AnalyticsDAO(db_connector)
+    since, until = datetime(2024, 10, 1), datetime(2024, 10, 7)
+
+    revenue = analytics_dao.revenue_by_period(since, until, "day")
+    assert [(row["period"], row["orders"], row["revenue"]) for row in revenue] == [
+        (datetime(2024, 10, 1), 1, 13.5),
+        (datetime(2024, 10, 6), 3, 57.5),
+    ]
+
+    top_bundles = analytics_dao.top_bundles(since, until)
+    assert [(row["name"], row["quantity"], row["revenue"]) for row in top_bundles] == [
+        ("Burger Menu", 1, 15.5),
+        ("Banh mi Menu", 1, 13.5),
+    ]
+
+    top_items = analytics_dao.top_items(since, until, limit=3)
+    assert len(top_items) == 3
+    assert [row["revenue"] for row in top_items] == sorted((row["revenue"] for row in top_items), reverse=True)
+    assert analytics_dao.top_items(datetime(2024, 10, 2), datetime(2024, 10, 3)) == []
+
+
+def test_integration_checkout_records_the_bundle_sales(daos, db_connector):
+    """
+    Test: The bundles of a checked out cart are counted in the sales analytics.
+    """
+    item = daos["item"].add_item(Item(name="Analytics dish", item_type="main", price=8.0, stock=10, availability=True))
+    bundle = daos["bundle"].add_predefined_bundle(
+        PredefinedBundle(name="Analytics Menu", description="", composition=[item], price=7.5)
+    )
+    customer = daos["user"].find_user_by_username("jane_smith")
+
+    since = datetime.now()
+    order = OrderService(db_connector).checkout(customer.id_user, 1, [bundle, bundle])
+    assert daos["order"].update_order_status([order.id_order], "validated")
+
+    top_bundles = AnalyticsDAO(db_connector).top_bundles(since, datetime.now())
+    assert [(row["name"], row["quantity"], row["revenue"]) for row in top_bundles] == [("Analytics Menu", 2, 15.0)]
+
+
+def test_integration_dashboard_counters(daos, db_connector):
+    """
+    Test: The dashboard counters maintained by triggers always match a full count of the tables.
+    """
+    analytics_dao = AnalyticsDAO(db_connector)
+
+    def expected_counters():
+        return db_connector.sql_query(
+            """
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'pending') AS pending_orders,
+                COUNT(*) FILTER (WHERE status = 'validated') AS validated_orders,
+                COUNT(*) FILTER (WHERE status = 'in_progress') AS in_progress_orders,
+                COUNT(*) FILTER (WHERE status = 'delivered') AS delivered_orders,
+                (SELECT COUNT(DISTINCT id_driver) FROM delivery WHERE status = 'in_progress') AS active_drivers,
+                COUNT(*) FILTER (WHERE status <> 'pending' AND order_date::date = CURRENT_DATE) AS orders_today,
+                COALESCE(SUM(price) FILTER (WHERE status <> 'pending' AND order_date::date = CURRENT_DATE), 0)
+                    AS revenue_today
+            FROM "order"
+            """,
+            None,
+            "one",
+        )
+
+    assert analytics_dao.dashboard_counters() == expected_counters()
+
+    customer = daos["user"].find_user_by_username("jane_smith")
+    driver = daos["user"].find_user_by_username("fast_driver")
+    address = daos["address"].find_address_by_id(1)
+    order = daos["order"].add_order(
+        Order(customer=customer, address=address, items=[], price=12.0, status="pending", order_date=datetime.now())
+    )
+    assert analytics_dao.dashboard_counters() == expected_counters()
+
+    assert daos["order"].update_order_status([order.id_order], "validated")
+    delivery = daos["delivery"].add_delivery(Delivery(driver=driver, orders=[order], status="in_progress"))
+    counters = analytics_dao.dashboard_counters()
+    assert counters == expected_counters()
+    assert counters["orders_today"] >= 1
+
+    delivery.status = "delivered"
+    assert daos["delivery"].update_delivery(delivery)
+    assert daos["order"].delete_order(order.id_order)
+    assert analytics_dao.dashboard_counters() == expected_counters()
+
+
+def test_integration_menu_version(daos):
+    """
+    Test: Every write to the items or bundles bumps the menu version, reads do not.
+    """
+    version = daos["item"].get_menu_version()
+    daos["item"].find_all_items()
+    assert daos["item"].get_menu_version() == version
+
+    item = daos["item"].add_item(Item(name="Version A", item_type="main", price=5.0, stock=2, availability=True))
+    assert daos["item"].get_menu_version() > version
+
+    version = daos["item"].get_menu_version()
+    daos["bundle"].add_predefined_bundle(
+        PredefinedBundle(name="Version menu", description="", composition=[item], price=4.0)
+    )
+    assert daos["item"].get_menu_version() > version
+
+
+def test_integration_menu_version_follows_the_listed_values(daos):
+    """
+    Test: Stock changes bump the menu version, updates leaving the item unchanged do not.
+    """
+    item = daos["item"].add_item(Item(name="Version B", item_type="main", price=5.0, stock=3, availability=True))
+
+    version = daos["item"].get_menu_version()
+    assert daos["item"].update_item(daos["item"].find_item_by_id(item.id_item))
+    assert daos["item"].reserve_stock({item.id_item: 5}) == [item.id_item]
+    assert daos["item"].get_menu_version() == version
+
+    assert daos["item"].reserve_stock({item.id_item: 1}) == []
+    assert daos["item"].get_menu_version() > version
+
+
+def test_integration_prepared_statements(daos, db_connector):
+    """
+    Test: Hot queries run through prepared statements on pooled connections and return the same rows.
+    """
+    pooled = DBConnector(config={**db_connector.__dict__, "post": db_connector.port, "prepare_threshold": 2})
+    pooled.open_pool()
+    try:
+        user_dao = UserDAO(db_connector=pooled)
+        item_dao = ItemDAO(db_connector=pooled)
+        for _ in range(3):
+            assert user_dao.find_user_by_id(2) == daos["user"].find_user_by_id(2)
+            assert item_dao.find_item_by_id(1) == daos["item"].find_item_by_id(1)
+            # PostgreSQL cannot infer the type of this parameter: the query is run without being prepared.
+            assert pooled.sql_query("SELECT %(value)s IS NULL AS missing", {"value": None}) == {"missing": True}
+
+        stats = pooled.statement_stats()
+        assert stats["prepares"] == 2
+        assert stats["hits"] == 4
+        assert stats["fallbacks"] == 1
+        assert stats["prepared_statements"] == 2
+    finally:
+        pooled.close_pool()
+
+
+def test_integration_read_replicas(daos, db_connector):
+    """
+    Test: Reads are served by the replicas, and by the primary when a replica is unreachable.
+    """
+    # The primary serves as its own replica; nothing listens on port 1.
+    config = {**db_connector.__dict__, "post": db_connector.port}
+    replicas = f"{db_connector.host}:1,{db_connector.host}:{db_connector.port}"
+    routed = DBConnector(config={**config, "replicas": replicas})
+    user_dao = UserDAO(db_connector=routed)
+
+    for _ in range(3):
+        assert user_dao.find_user_by_id(2) == daos["user"].find_user_by_id(2)
+
+    assert routed.replicas.healthy() == [(db_connector.host, str(db_connector.port))]
+
+
+def test_integration_statement_timeout(db_connector):
+    """
+    Test: PostgreSQL stops a query that exceeds its timeout, and the connection remains usable.
+    """
+    with pytest.raises(QueryTimeoutError):
+        db_connector.sql_query("SELECT pg_sleep(2)", timeout=0.1)
+
+    with statement_timeout(0.1):
+        with pytest.raises(QueryTimeoutError):
+            db_connector.sql_query("SELECT pg_sleep(2)")
+
+    assert db_connector.sql_query("SELECT 1 AS one") == {"one": 1}
+
+
+def test_integration_cancellation(db_connector):
+    """
+    Test: Cancelling the scope of a running query interrupts it server-side.
+    """
+    with cancellation_scope() as canceller:
+        timer = threading.Timer(0.2, canceller.cancel)
+        timer.start()
+        start = time.monotonic()
+        with pytest.raises(QueryCancelledError):
+            db_connector.sql_query("SELECT pg_sleep(5)")
+        timer.join()
+
+    assert time.monotonic() - start < 2
+
+
+def test_integration_address_upsert(daos):
+    """
+    Test: Addresses are unique by normalized key, and concurrent upserts of a new address share one row.
+    """
+    address_dao = daos["address"]
+    new_address = Address(city="Brest", postal_code=29200, street_name="Rue de Siam", street_number="12")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        upserted = list(executor.map(address_dao.upsert_address, [new_address] * 8))
+
+    assert len({address.id_address for address in upserted}) == 1
+    same = address_dao.find_address_by_components("  brest", 29200, "RUE  DE SIAM ", "12")
+    assert same.id_address == upserted[0].id_address
+    assert address_dao.add_address(new_address) is None
+
+
+def test_integration_duplicate_names_and_compositions(daos):
+    """
+    Test: Names are unique whatever their case, bundle compositions are unique in any order, and the
+    probes of the admin checks find the seeded rows through their indexes.
+    """
+    item_dao, bundle_dao = daos["item"], daos["bundle"]
+
+    assert item_dao.find_item_id_by_name("CLASSIC burger") == 10
+    with pytest.raises(Exception, match="idx_item_name"):
+        item_dao.add_item(Item(name="classic BURGER", item_type="main", price=1.0, stock=1))
+
+    assert bundle_dao.find_bundle_id_by_name("burger menu") == 2
+    assert bundle_dao.find_bundle_id_by_composition("predefined", [11, 9, 10]) == 2
+    assert bundle_dao.find_bundle_id_by_composition("discount", ["Main", "main"]) == 3
+
+    same_items = item_dao.get_items_by_ids([9, 10, 11])
+    assert bundle_dao.add_predefined_bundle(PredefinedBundle(name="Copy", price=9.0, composition=same_items)) is None
+    assert bundle_dao.find_bundle_id_by_name("Copy") is None
+
+
+def test_integration_items_by_type(daos):
+    """
+    Test: Only the available items of the type are listed, cheapest first.
+    """
+    item_dao = daos["item"]
+    hidden = item_dao.add_item(Item(name="Hidden drink", item_type="drink", price=0.5, stock=0, availability=False))
+
+    drinks = item_dao.find_items_by_type("drink")
+
+    assert drinks and all(item.item_type == "drink" and item.availability for item in drinks)
+    assert [item.price for item in drinks] == sorted(item.price for item in drinks)
+    assert hidden.id_item not in {item.id_item for item in drinks}
+    assert hidden.id_item in {item.id_item for item in item_dao.find_items_by_type("drink", available_only=False)}
+
+
+def test_integration_item_batch(daos):
+    """
+    Test: A batch creates, updates and restocks items in one transaction, and is rolled back as a whole on error.
+    """
+    item_dao = daos["item"]
+    soup = Item(name="Batch soup", item_type="starter", price=4.0, stock=5, availability=True)
+    empty = item_dao.add_item(Item(name="Batch empty", item_type="side", price=2.0, stock=1, availability=True))
+    changed = item_dao.find_item_by_id(empty.id_item).model_copy(update={"price": 2.5})
+
+    created, restocked = item_dao.apply_item_batch([soup], [changed], {empty.id_item: -1, 1: -10_000})
+
+    assert [item.name for item in created] == ["Batch soup"]
+    assert item_dao.find_item_ids_by_names(["BATCH SOUP", "unknown"]) == {"batch soup": created[0].id_item}
+    assert restocked == [empty.id_item]
+    emptied = item_dao.find_item_by_id(empty.id_item)
+    assert (emptied.price, emptied.stock, emptied.availability) == (2.5, 0, False)
+
+    item_dao.apply_item_batch([], [], {empty.id_item: 4})
+    assert item_dao.find_item_by_id(empty.id_item).availability is True
+
+    too_long = changed.model_copy(update={"name": "A name far too long for the column"})
+    with pytest.raises(Exception, match="too long"):
+        item_dao.apply_item_batch([Item(name="Rolled back", item_type="side", price=1.0, stock=1)], [too_long], {})
+    assert item_dao.find_item_ids_by_names(["Rolled back"]) == {}
+    assert item_dao.find_item_by_id(empty.id_item).name == "Batch empty"
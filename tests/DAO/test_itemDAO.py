@@ -41,6 +41,21 @@ class MockDBConnector:
     ) -> Union[Dict[str, Any], List[Dict[str, Any]], bool, None]:
         q = " ".join(query.lower().split())
 
+        if q.startswith("with needed") and "update item" in q:
+            needed = dict(zip(data["id_items"], data["quantities"], strict=True))
+            items_by_id = {item["id_item"]: item for item in self.items}
+            failed = sorted(
+                id_item
+                for id_item, quantity in needed.items()
+                if id_item not in items_by_id or items_by_id[id_item]["stock"] < quantity
+            )
+            if not failed:
+                for id_item, quantity in needed.items():
+                    items_by_id[id_item]["stock"] -= quantity
+                    if items_by_id[id_item]["stock"] == 0:
+                        items_by_id[id_item]["availability"] = False
+            return [{"id_item": id_item} for id_item in failed]
+
         if "insert into" in q and "item" in q and "returning" in q:
             if not isinstance(data, dict):
                 return False
@@ -65,6 +80,23 @@ class MockDBConnector:
             self.items.append(created_item)
             return created_item
 
+        if q.startswith("select id_item from item where lower(name)"):
+            for item in self.items:
+                if item["name"].lower() == data["name"].lower():
+                    return {"id_item": item["id_item"]}
+            return None
+
+        if q == "select version from menu_version":
+            return {"version": 3}
+
+        if q.startswith("select * from item where item_type"):
+            found_items = [
+                item.copy()
+                for item in self.items
+                if item["item_type"] == data["item_type"] and (item["availability"] or "availability" not in q)
+            ]
+            return sorted(found_items, key=lambda item: (item["price"], item["id_item"]))
+
         if "select * from item where id_item in" in q and return_type == "all":
             if isinstance(data, list):
                 found_items = [item.copy() for item in self.items if item["id_item"] in data]
@@ -122,6 +154,31 @@ def item_dao():
     return ItemDAO(mock_connector)
 
 
+def test_get_menu_version(item_dao):
+    """Test reading the version of the menu."""
+    assert item_dao.get_menu_version() == 3
+
+
+def test_find_items_by_type(item_dao):
+    """Test listing the available items of a type, cheapest first."""
+    item_dao.db_connector.items.append(
+        {"id_item": 3, "name": "Item C", "item_type": "side", "price": 2.0, "stock": 0, "availability": False}
+    )
+    item_dao.db_connector.items.append(
+        {"id_item": 4, "name": "Item D", "item_type": "side", "price": 3.0, "stock": 5, "availability": True}
+    )
+
+    assert [item.id_item for item in item_dao.find_items_by_type("side")] == [4, 1]
+    assert [item.id_item for item in item_dao.find_items_by_type("side", available_only=False)] == [3, 4, 1]
+    assert item_dao.find_items_by_type("dessert") == []
+
+
+def test_find_item_id_by_name_ignores_case(item_dao):
+    """Test the duplicate-name probe."""
+    assert item_dao.find_item_id_by_name("item existant B") == 2
+    assert item_dao.find_item_id_by_name("Item Inconnu") is None
+
+
 def test_find_all_items(item_dao):
     """Test finding all items."""
     items = item_dao.find_all_items()
@@ -243,3 +300,28 @@ def test_get_items_by_ids_none_found(item_dao):
     """Test retrieving items where no IDs match."""
     items = item_dao.get_items_by_ids([88, 99])
     assert items == []
+
+
+def test_reserve_stock_success(item_dao):
+    """Test reserving stock for several items at once."""
+    failed = item_dao.reserve_stock({1: 10, 2: 25})
+
+    assert failed == []
+    assert item_dao.find_item_by_id(1).stock == 40
+    reserved_to_zero = item_dao.find_item_by_id(2)
+    assert reserved_to_zero.stock == 0
+    assert reserved_to_zero.availability is False
+
+
+def test_reserve_stock_is_all_or_nothing(item_dao):
+    """Test that no stock is reserved when one of the items cannot be."""
+    failed = item_dao.reserve_stock({1: 10, 2: 26, 99: 1})
+
+    assert failed == [2, 99]
+    assert item_dao.find_item_by_id(1).stock == 50
+    assert item_dao.find_item_by_id(2).stock == 25
+
+
+def test_reserve_stock_empty_input(item_dao):
+    """Test reserving nothing does not query the database."""
+    assert item_dao.reserve_stock({}) == []
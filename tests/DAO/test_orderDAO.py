@@ -55,7 +55,7 @@ class MockDBConnector:
         self.order_items = [
             {"id_order": 101, "id_item": 1001},
             {"id_order": 101, "id_item": 1002},
-            {"id_order": 102, "id_item": 1003},
+            {"id_order": 102, "id_item": 1003, "quantity": 3},
             {"id_order": 104, "id_item": 2001},
         ]
         self.next_id_order = 105
@@ -83,19 +83,31 @@ class MockDBConnector:
                 id_user = data.get("id_user")
                 results = [o for o in self.orders if o["id_user"] == id_user]
                 return results if return_type == "all" else (results[0] if results else None)
+            elif "where status" in q:
+                return [o for o in self.orders if o["status"] == data["status"]]
             else:
                 return self.orders if return_type == "all" else (self.orders[0] if self.orders else None)
 
-        if q.startswith("select i.* from item i join order_item oi on i.id_item = oi.id_item where oi.id_order"):
+        if q.startswith("select i.*, oi.quantity from item i join order_item oi on i.id_item = oi.id_item"):
             id_order = data.get("id_order")
-            item_ids = [oi["id_item"] for oi in self.order_items if oi["id_order"] == id_order]
-            return (
-                [{"id_item": item_id} for item_id in item_ids]
-                if return_type == "all"
-                else ([{"id_item": item_ids[0]}] if item_ids else None)
-            )
-
-        if q.startswith('insert into "order"'):
+            return [
+                {**MOCK_ITEMS_BUNDLES[oi["id_item"]].model_dump(), "quantity": oi.get("quantity", 1)}
+                for oi in self.order_items
+                if oi["id_order"] == id_order
+            ]
+
+        if q.startswith("select oi.id_order, oi.quantity, i.* from order_item oi"):
+            return [
+                {
+                    "id_order": oi["id_order"],
+                    "quantity": oi.get("quantity", 1),
+                    **MOCK_ITEMS_BUNDLES[oi["id_item"]].model_dump(),
+                }
+                for oi in self.order_items
+                if oi["id_order"] in data["id_orders"]
+            ]
+
+        if q.startswith('with created_order as ( insert into "order"'):
             new_order = {
                 "id_order": self.next_id_order,
                 "id_user": data["id_user"],
@@ -106,28 +118,54 @@ class MockDBConnector:
             }
             self.orders.append(new_order)
             self.next_id_order += 1
+            for id_item, quantity in zip(data["id_items"], data["quantities"], strict=True):
+                self.order_items.append({"id_order": new_order["id_order"], "id_item": id_item, "quantity": quantity})
             return new_order
 
-        if q.startswith("insert into order_item"):
-            self.order_items.append(data)
-            return None
+        if q.startswith('update "order" set status = %(status)s where id_order = any'):
+            updated = []
+            for order in self.orders:
+                if order["id_order"] in data["id_orders"]:
+                    order["status"] = data["status"]
+                    updated.append({"id_order": order["id_order"]})
+            return updated
 
         if q.startswith('update "order"'):
             id_order = data.get("id_order")
             for order in self.orders:
                 if order["id_order"] == id_order:
-                    order.update(
-                        {
-                            "id_user": data["id_user"],
-                            "status": data["status"],
-                            "price": data["price"],
-                            "id_address": data["id_address"],
-                            "order_date": data["order_date"],
-                        }
-                    )
+                    order.update({column: value for column, value in data.items() if column != "id_order"})
                     return {"id_order": id_order}
             return None
 
+        if q.startswith("insert into order_item") and "unnest" in q:
+            for id_item, quantity in zip(data["id_items"], data["quantities"], strict=True):
+                link = next(
+                    (oi for oi in self.order_items if oi["id_order"] == data["id_order"] and oi["id_item"] == id_item),
+                    None,
+                )
+                if link:
+                    link["quantity"] = quantity
+                else:
+                    self.order_items.append({"id_order": data["id_order"], "id_item": id_item, "quantity": quantity})
+            return None
+
+        if q.startswith("delete from order_item") and "not (id_item = any" in q:
+            self.order_items = [
+                oi
+                for oi in self.order_items
+                if oi["id_order"] != data["id_order"] or oi["id_item"] in data["id_items"]
+            ]
+            return None
+
+        if q.startswith("delete from order_item") and "id_item = any" in q:
+            self.order_items = [
+                oi
+                for oi in self.order_items
+                if oi["id_order"] != data["id_order"] or oi["id_item"] not in data["id_items"]
+            ]
+            return None
+
         if q.startswith("delete from order_item"):
             id_order = data.get("id_order")
             self.order_items = [oi for oi in self.order_items if oi["id_order"] != id_order]
@@ -194,14 +232,18 @@ def mock_db(mock_db_connector_impl) -> MagicMock:
 @pytest.fixture
 def mock_user_dao() -> MagicMock:
     mock = MagicMock(spec=UserDAO)
-    mock.find_user_by_id.side_effect = lambda id: MOCK_USERS.get(id, None)
+    mock.find_user_by_id.side_effect = lambda id_user: MOCK_USERS.get(id_user, None)
+    mock.find_users_by_ids.side_effect = lambda ids: [MOCK_USERS[id_user] for id_user in ids if id_user in MOCK_USERS]
     return mock
 
 
 @pytest.fixture
 def mock_address_dao() -> MagicMock:
     mock = MagicMock(spec=AddressDAO)
-    mock.find_address_by_id.side_effect = lambda id: MOCK_ADDRESSES.get(id, None)
+    mock.find_address_by_id.side_effect = lambda id_address: MOCK_ADDRESSES.get(id_address, None)
+    mock.find_addresses_by_ids.side_effect = lambda ids: [
+        MOCK_ADDRESSES[id_address] for id_address in ids if id_address in MOCK_ADDRESSES
+    ]
     return mock
 
 
@@ -247,6 +289,17 @@ def test_find_order_with_bundle(order_dao: OrderDAO):
     assert order.items[0].id_item == 2001
 
 
+def test_find_order_reads_quantities(order_dao: OrderDAO, mock_item_dao: MagicMock):
+    order = order_dao.find_order_by_id(102)
+
+    assert len(order.lines) == 1
+    assert order.lines[0].quantity == 3
+    assert order.item_quantities() == {1003: 3}
+    assert len(order.items) == 3
+    assert order.items[0] is order.items[2]
+    mock_item_dao.find_item_by_id.assert_not_called()
+
+
 def test_find_order_by_id_not_found(order_dao: OrderDAO):
     order = order_dao.find_order_by_id(999)
     assert order is None
@@ -259,6 +312,49 @@ def test_find_all_orders(order_dao: OrderDAO):
     assert orders[3].id_order == 104
 
 
+def test_find_all_orders_lazy(order_dao: OrderDAO, mock_db: MagicMock, mock_user_dao, mock_address_dao):
+    orders = order_dao.find_all_orders(lazy=True)
+
+    assert [o.id_order for o in orders] == [101, 102, 103, 104]
+    assert mock_db.sql_query.call_count == 1
+    mock_user_dao.find_users_by_ids.assert_not_called()
+
+    assert orders[2].customer.id_user == 2
+    assert orders[0].customer.name == "John Doe"
+    assert orders[3].address.city == "Lyon"
+    assert orders[1].item_quantities() == {1003: 3}
+    assert [item.id_item for item in orders[0].items] == [1001, 1002]
+    assert orders[2].lines == []
+
+    mock_user_dao.find_users_by_ids.assert_called_once()
+    mock_address_dao.find_addresses_by_ids.assert_called_once()
+    mock_user_dao.find_user_by_id.assert_not_called()
+    assert mock_db.sql_query.call_count == 2
+
+
+def test_find_orders_by_status_lazy(order_dao: OrderDAO, mock_db: MagicMock, mock_user_dao):
+    orders = order_dao.find_orders_by_status("delivered", lazy=True)
+
+    assert [o.id_order for o in orders] == [102, 104]
+    assert mock_db.sql_query.call_args[0][1] == {"status": "delivered"}
+
+    assert orders[0].customer.id_user == 1
+    assert sorted(mock_user_dao.find_users_by_ids.call_args[0][0]) == [1, 2]
+
+
+def test_update_lazy_order_does_not_load_relations(order_dao: OrderDAO, mock_db: MagicMock, mock_user_dao):
+    order = order_dao.find_all_orders(lazy=True)[0]
+    mock_db.sql_query.reset_mock()
+
+    order.status = "validated"
+    assert order_dao.update_order(order) is True
+
+    assert mock_db.sql_query.call_count == 1
+    query, data, _ = mock_db.sql_query.call_args[0]
+    assert data == {"status": "validated", "id_order": 101}
+    mock_user_dao.find_users_by_ids.assert_not_called()
+
+
 def test_find_orders_by_customer(order_dao: OrderDAO):
     orders = order_dao.find_orders_by_customer(1)
     assert len(orders) == 2
@@ -289,6 +385,21 @@ def test_add_order_nominal(order_dao: OrderDAO, mock_db_connector_impl: MockDBCo
     assert added_order.status == "pending"
 
 
+def test_add_order_groups_duplicate_items(order_dao: OrderDAO, mock_db_connector_impl: MockDBConnector):
+    new_order_data = Order(
+        customer=MOCK_USERS[1],
+        address=MOCK_ADDRESSES[10],
+        items=[MOCK_ITEMS_BUNDLES[1001], MOCK_ITEMS_BUNDLES[1002], MOCK_ITEMS_BUNDLES[1001]],
+        status="pending",
+        price=35.0,
+    )
+
+    added_order = order_dao.add_order(new_order_data)
+
+    item_links = [oi for oi in mock_db_connector_impl.order_items if oi["id_order"] == added_order.id_order]
+    assert sorted((oi["id_item"], oi["quantity"]) for oi in item_links) == [(1001, 2), (1002, 1)]
+
+
 def test_update_order_nominal(order_dao: OrderDAO, mock_db_connector_impl: MockDBConnector):
     order_to_update = order_dao.find_order_by_id(101)
 
@@ -310,6 +421,56 @@ def test_update_order_nominal(order_dao: OrderDAO, mock_db_connector_impl: MockD
     assert item_links[0]["id_item"] == 1003
 
 
+def test_update_order_only_writes_dirty_columns(order_dao: OrderDAO, mock_db: MagicMock):
+    order_to_update = order_dao.find_order_by_id(101)
+    mock_db.sql_query.reset_mock()
+
+    order_to_update.status = "in_progress"
+    success = order_dao.update_order(order_to_update)
+
+    assert success is True
+    assert mock_db.sql_query.call_count == 1
+    query, data, _ = mock_db.sql_query.call_args[0]
+    assert " ".join(query.split()).startswith('UPDATE "order" SET status = %(status)s WHERE')
+    assert data == {"status": "in_progress", "id_order": 101}
+
+
+def test_update_order_without_changes_does_not_query(order_dao: OrderDAO, mock_db: MagicMock):
+    order_to_update = order_dao.find_order_by_id(101)
+    mock_db.sql_query.reset_mock()
+
+    assert order_dao.update_order(order_to_update) is True
+    mock_db.sql_query.assert_not_called()
+
+
+def test_update_order_diffs_items(order_dao: OrderDAO, mock_db: MagicMock, mock_db_connector_impl: MockDBConnector):
+    order_to_update = order_dao.find_order_by_id(101)
+    mock_db.sql_query.reset_mock()
+
+    order_to_update.items = [MOCK_ITEMS_BUNDLES[1001], MOCK_ITEMS_BUNDLES[1003], MOCK_ITEMS_BUNDLES[1003]]
+    success = order_dao.update_order(order_to_update)
+
+    assert success is True
+    assert mock_db.sql_query.call_count == 2
+    item_links = [oi for oi in mock_db_connector_impl.order_items if oi["id_order"] == 101]
+    assert sorted((oi["id_item"], oi.get("quantity", 1)) for oi in item_links) == [(1001, 1), (1003, 2)]
+
+
+def test_update_order_status_bulk(order_dao: OrderDAO, mock_db: MagicMock, mock_db_connector_impl: MockDBConnector):
+    success = order_dao.update_order_status([101, 103], "delivered")
+
+    assert success is True
+    assert mock_db.sql_query.call_count == 1
+    assert [o["status"] for o in mock_db_connector_impl.orders if o["id_order"] in (101, 103)] == [
+        "delivered",
+        "delivered",
+    ]
+
+
+def test_update_order_status_missing_order(order_dao: OrderDAO):
+    assert order_dao.update_order_status([101, 999], "delivered") is False
+
+
 def test_delete_order_nominal(order_dao: OrderDAO, mock_db_connector_impl: MockDBConnector):
     initial_order_count = len(mock_db_connector_impl.orders)
 
@@ -360,6 +521,7 @@ def test_add_order_db_error(order_dao: OrderDAO, mock_db: MagicMock):
 
 def test_update_order_db_error(order_dao: OrderDAO, mock_db: MagicMock):
     order_to_update = order_dao.find_order_by_id(101)
+    order_to_update.status = "delivered"
     mock_db.sql_query.side_effect = Exception("Simulated DB Error")
     success = order_dao.update_order(order_to_update)
     assert success is False
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.DAO.query_limits import (
+    QueryCancelledError,
+    cancellation_scope,
+    current_canceller,
+    current_statement_timeout,
+    statement_timeout,
+)
+
+
+def test_statement_timeout_blocks_nest():
+    assert current_statement_timeout() is None
+    with statement_timeout(10):
+        assert current_statement_timeout() == 10
+        with statement_timeout(2):
+            assert current_statement_timeout() == 2
+        assert current_statement_timeout() == 10
+    assert current_statement_timeout() is None
+
+
+def test_statement_timeout_decorates_a_method():
+    @statement_timeout(5)
+    def find():
+        return current_statement_timeout()
+
+    assert find() == 5
+    assert find() == 5
+    assert current_statement_timeout() is None
+
+
+def test_cancel_interrupts_the_running_queries():
+    running, done = MagicMock(), MagicMock()
+
+    with cancellation_scope() as canceller:
+        assert current_canceller() is canceller
+        canceller.track(running)
+        canceller.track(done)
+        assert canceller.untrack(done) is False
+
+        canceller.cancel()
+
+        running.cancel.assert_called_once()
+        done.cancel.assert_not_called()
+        # The interrupted connection must not be reused.
+        assert canceller.untrack(running) is True
+        with pytest.raises(QueryCancelledError):
+            canceller.track(MagicMock())
+
+    assert current_canceller() is None
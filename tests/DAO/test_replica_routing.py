@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+from src.DAO.identity_map import identity_scope
+from src.DAO.replica_routing import ReplicaSet, is_write, read_only, record_write, replica_allowed
+
+
+def test_parse_uses_the_primary_port_by_default():
+    assert ReplicaSet.parse("replica1:5434, replica2,", "5432") == [("replica1", "5434"), ("replica2", "5432")]
+    assert ReplicaSet.parse("", "5432") == []
+
+
+def test_is_write_only_trusts_plain_selects():
+    assert not is_write("  select * FROM item")
+    assert is_write("INSERT INTO item (name) VALUES ('x') RETURNING *")
+    assert is_write("WITH deleted AS (DELETE FROM item RETURNING *) SELECT * FROM deleted")
+    assert is_write("SELECT * FROM item WHERE id_item = 1 FOR UPDATE")
+
+
+def test_only_reads_of_read_only_methods_may_use_a_replica():
+    @read_only
+    def find(query):
+        return replica_allowed(query)
+
+    assert find("SELECT 1")
+    assert not find("UPDATE item SET stock = 0")
+    assert not replica_allowed("SELECT 1")
+    assert replica_allowed("SELECT 1", read_only_query=True)
+
+
+def test_a_write_pins_the_unit_of_work_to_the_primary():
+    with identity_scope():
+        assert replica_allowed("SELECT 1", read_only_query=True)
+        record_write()
+        assert not replica_allowed("SELECT 1", read_only_query=True, pinned_for=0)
+
+    with identity_scope():
+        assert replica_allowed("SELECT 1", read_only_query=True, pinned_for=0)
+
+
+def test_a_write_outside_a_unit_of_work_pins_the_next_reads_for_a_while():
+    with patch("src.DAO.replica_routing.time.monotonic", return_value=100.0):
+        record_write()
+        assert not replica_allowed("SELECT 1", read_only_query=True)
+    with patch("src.DAO.replica_routing.time.monotonic", return_value=104.0):
+        assert not replica_allowed("SELECT 1", read_only_query=True)
+    with patch("src.DAO.replica_routing.time.monotonic", return_value=105.0):
+        assert replica_allowed("SELECT 1", read_only_query=True)
+
+
+def test_choose_goes_round_robin():
+    replicas = ReplicaSet([("a", "1"), ("b", "1")])
+
+    assert [replicas.choose() for _ in range(4)] == [("a", "1"), ("b", "1"), ("a", "1"), ("b", "1")]
+
+
+def test_a_replica_marked_down_is_skipped_until_it_may_be_retried():
+    replicas = ReplicaSet([("a", "1"), ("b", "1")], retry_after=30)
+
+    with patch("src.DAO.replica_routing.time.monotonic", return_value=100.0):
+        replicas.mark_down(("a", "1"))
+        assert [replicas.choose() for _ in range(3)] == [("b", "1")] * 3
+        assert replicas.healthy() == [("b", "1")]
+
+        replicas.mark_down(("b", "1"))
+        assert replicas.choose() is None
+
+    with patch("src.DAO.replica_routing.time.monotonic", return_value=131.0):
+        assert replicas.healthy() == [("a", "1"), ("b", "1")]
@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+from src.DAO.statement_cache import StatementCache
+
+
+class MockPgError(psycopg2.Error):
+    def __init__(self, pgcode):
+        super().__init__("error")
+        self._pgcode = pgcode
+
+    @property
+    def pgcode(self):
+        return self._pgcode
+
+
+def executed(cursor):
+    return [call.args[0] for call in cursor.execute.call_args_list]
+
+
+@pytest.fixture
+def connection():
+    return MagicMock()
+
+
+@pytest.fixture
+def cursor():
+    return MagicMock()
+
+
+@pytest.fixture
+def cache(connection):
+    cache = StatementCache(threshold=2, per_connection=2)
+    cache.attach(connection)
+    return cache
+
+
+def test_compile_numbers_named_parameters():
+    """Tests that named parameters become $n placeholders, a repeated name keeping its number."""
+    name, body, parameters = StatementCache.compile(
+        "SELECT * FROM item WHERE id_item = %(id)s OR name LIKE 'a%%' OR id_item = %(id)s + %(offset)s", "named"
+    )
+
+    assert name.startswith("s_")
+    assert body == "SELECT * FROM item WHERE id_item = $1 OR name LIKE 'a%' OR id_item = $1 + $2"
+    assert parameters == ["id", "offset"]
+
+
+def test_compile_positional_and_parameterless_queries():
+    """Tests positional parameters, and that queries without parameters are prepared untouched."""
+    assert StatementCache.compile("SELECT %s, %s", "positional")[1:] == ("SELECT $1, $2", 2)
+    assert StatementCache.compile("SELECT * FROM item WHERE name LIKE 'a%'", "none")[1:] == (
+        "SELECT * FROM item WHERE name LIKE 'a%'",
+        0,
+    )
+
+
+@pytest.mark.parametrize(
+    "query, style",
+    [
+        ("CREATE TABLE t (id INT)", "none"),
+        ("SELECT 1; SELECT 2", "none"),
+        ("SELECT %s", "named"),
+        ("SELECT %(id)s", "positional"),
+    ],
+)
+def test_compile_rejects_queries_that_cannot_be_prepared(query, style):
+    """Tests that DDL, several statements and mismatched parameter styles are not prepared."""
+    assert StatementCache.compile(query, style) is None
+
+
+def test_queries_are_prepared_once_they_are_hot(cache, connection, cursor):
+    """Tests that a query is executed as is until the threshold, then prepared once and executed by name."""
+    query = "SELECT * FROM item WHERE id_item = %(id)s"
+
+    cache.execute(connection, cursor, query, {"id": 1})
+    assert executed(cursor) == [query]
+
+    cursor.reset_mock()
+    cache.execute(connection, cursor, query, {"id": 2})
+    name = StatementCache.compile(query, "named")[0]
+    assert executed(cursor) == [
+        "SAVEPOINT prepare_statement",
+        f"PREPARE {name} AS SELECT * FROM item WHERE id_item = $1",
+        "RELEASE SAVEPOINT prepare_statement",
+        f"EXECUTE {name}(%s)",
+    ]
+    assert cursor.execute.call_args.args[1] == (2,)
+
+    cursor.reset_mock()
+    cache.execute(connection, cursor, query, {"id": 3})
+    assert executed(cursor) == [f"EXECUTE {name}(%s)"]
+
+    stats = cache.stats()
+    assert (stats["prepares"], stats["hits"], stats["prepared_statements"], stats["connections"]) == (1, 2, 1, 1)
+
+
+def test_unattached_connections_never_prepare(cache, cursor):
+    """Tests that connections outside the pool execute every query as is."""
+    other_connection = MagicMock()
+    for _ in range(3):
+        cache.execute(other_connection, cursor, "SELECT 1", None)
+
+    assert executed(cursor) == ["SELECT 1"] * 3
+    assert cache.stats()["prepares"] == 0
+
+
+def test_a_statement_that_cannot_be_prepared_falls_back(cache, connection, cursor):
+    """Tests that a refused PREPARE is rolled back to its savepoint, and that the query is no longer prepared."""
+    query = "SELECT %(value)s IS NULL"
+
+    def execute(sql, data=None):
+        if sql.startswith("PREPARE"):
+            raise MockPgError("42P18")
+
+    cursor.execute.side_effect = execute
+
+    for _ in range(3):
+        cache.execute(connection, cursor, query, {"value": None})
+
+    statements = executed(cursor)
+    assert statements.count("ROLLBACK TO SAVEPOINT prepare_statement") == 1
+    assert statements.count(query) == 3
+    assert cache.stats()["fallbacks"] == 1
+
+
+def test_least_recently_used_statements_are_deallocated(cache, connection, cursor):
+    """Tests that a connection keeps at most `per_connection` prepared statements."""
+    queries = ["SELECT 1", "SELECT 2", "SELECT 3"]
+    for query in queries:
+        cache.execute(connection, cursor, query, None)
+        cache.execute(connection, cursor, query, None)
+
+    assert f"DEALLOCATE {StatementCache.compile('SELECT 1', 'none')[0]}" in executed(cursor)
+    assert cache.stats()["prepared_statements"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stale_statements_are_reset(cache, connection, cursor):
+    """Tests that after a missing statement error, the connection's statements are deallocated and prepared again."""
+    for _ in range(2):
+        cache.execute(connection, cursor, "SELECT 1", None)
+
+    cursor.execute.side_effect = MockPgError("26000")
+    with pytest.raises(psycopg2.Error):
+        cache.execute(connection, cursor, "SELECT 1", None)
+
+    cursor.reset_mock()
+    cursor.execute.side_effect = None
+    cache.execute(connection, cursor, "SELECT 1", None)
+
+    assert executed(cursor)[0] == "DEALLOCATE ALL"
+    assert "PREPARE" in executed(cursor)[2]
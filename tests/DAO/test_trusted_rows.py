@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from src.DAO.trusted_rows import build, trusted_rows
+from src.Model.address import Address
+from src.Model.customer import Customer
+from src.Model.item import Item
+from src.Model.order import Order
+from src.Model.order_line import OrderLine
+
+ITEM_ROW = {
+    "id_item": 1,
+    "name": "Burger",
+    "item_type": "main",
+    "price": 8.0,
+    "description": "Beef burger",
+    "stock": 5,
+    "availability": True,
+}
+
+
+def test_trusted_build_matches_validated_model():
+    with trusted_rows(True):
+        trusted = build(Item, **ITEM_ROW)
+    assert trusted == Item(**ITEM_ROW)
+    assert trusted.model_dump() == ITEM_ROW
+
+
+def test_trusted_build_initializes_private_attributes():
+    item = Item(**ITEM_ROW)
+    values = {
+        "id_order": 1,
+        "customer": Customer(id_user=1, username="alice"),
+        "address": Address(city="Rennes", postal_code=35000, street_name="Rue de Paris"),
+        "lines": [OrderLine(item=item, quantity=2)],
+        "price": 16.0,
+        "status": "pending",
+        "order_date": datetime(2025, 1, 1),
+    }
+    with trusted_rows(True):
+        order = build(Order, **values)
+
+    assert order == Order(**values)
+    assert order.items == [item, item]
+    assert order._persisted_columns is None
+
+
+def test_missing_columns_fall_back_to_defaults():
+    with trusted_rows(True):
+        line = build(OrderLine, item=Item(**ITEM_ROW))
+    assert line.quantity == 1
+
+
+def test_untrusted_build_validates():
+    with trusted_rows(False):
+        item = build(Item, **{**ITEM_ROW, "price": "8.0"})
+    assert item.price == 8.0
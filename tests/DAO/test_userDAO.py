@@ -1,6 +1,7 @@
 from datetime import date
 from typing import TYPE_CHECKING, Literal, Optional, Union
 
+import psycopg2
 import pytest
 
 from src.DAO.userDAO import UserDAO
@@ -99,6 +100,9 @@ class MockDBConnector:
             if q.startswith('delete from "user"') and data and data.get("id_user") == 1:
                 raise Exception("Simulated DB Error (delete user)")
 
+        if 'from "user"' in q and "where u.id_user = any" in q:
+            return [u for u in self.users if u["id_user"] in data["id_users"]]
+
         if 'from "user"' in q and "where u.id_user" in q:
             id_user = data.get("id_user")
             for u in self.users:
@@ -246,6 +250,13 @@ class MockDBConnector:
 
         return None
 
+    def stream_query(self, query: str, data: Optional[dict] = None, fetch_size: Optional[int] = None):
+        if self.raise_exception:
+            raise psycopg2.OperationalError("Simulated DB Error (stream)")
+        rows = [u for u in self.users if data.get("user_type") in (None, u["user_type"])]
+        for start in range(0, len(rows), fetch_size or 1):
+            yield rows[start : start + (fetch_size or 1)]
+
 
 @pytest.fixture
 def mock_db():
@@ -268,6 +279,12 @@ def test_find_user_by_id(user_dao: UserDAO):
     assert isinstance(user, Customer)
 
 
+def test_find_users_by_ids(user_dao: UserDAO):
+    users = user_dao.find_users_by_ids([1, 3, 99])
+    assert sorted(u.id_user for u in users) == [1, 3]
+    assert user_dao.find_users_by_ids([]) == []
+
+
 def test_find_user_by_username(user_dao: UserDAO):
     """Tests finding a user by username and verifying its type and data."""
     user: AbstractUser = user_dao.find_user_by_username("janjak")
@@ -472,6 +489,22 @@ def test_find_all_error(mock_db: MockDBConnector, user_dao: UserDAO):
     mock_db.raise_exception = False
 
 
+def test_iter_users(user_dao: UserDAO):
+    """Tests streaming the users chunk by chunk, optionally filtered by type."""
+    assert [u.id_user for u in user_dao.iter_users(fetch_size=2)] == [1, 2, 3]
+    drivers = list(user_dao.iter_users(user_type="driver"))
+    assert len(drivers) == 1
+    assert isinstance(drivers[0], Driver)
+
+
+def test_iter_users_error(mock_db: MockDBConnector, user_dao: UserDAO):
+    """Tests that a failing stream raises instead of ending silently."""
+    mock_db.raise_exception = True
+    with pytest.raises(psycopg2.OperationalError, match="Simulated DB Error"):
+        list(user_dao.iter_users())
+    mock_db.raise_exception = False
+
+
 def test_update_user_error(mock_db: MockDBConnector, user_dao: UserDAO):
     """Tests error handling in update_user when the general 'user' table update fails."""
     mock_db.raise_exception = True
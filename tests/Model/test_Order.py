@@ -49,4 +49,48 @@ def test_order_invalid_status():
             address=addr,
             items=[],
             status="cancelled",
-        )
\ No newline at end of file
+        )
+
+def test_order_groups_duplicate_items_into_lines():
+    cust = Customer(
+        id_user=1,
+        username="u",
+        hash_password="h",
+        salt="s",
+    )
+
+    addr = Address(city="Paris", postal_code=75000, street_name="Rue Y", street_number=10)
+
+    burger = Item(id_item=1, name="Burger", item_type="main", price=8.0)
+    fries = Item(id_item=2, name="Fries", item_type="side", price=3.0)
+
+    order = Order(
+        customer=cust,
+        address=addr,
+        items=[burger, fries, burger],
+        status="pending",
+    )
+
+    assert len(order.lines) == 2
+    assert order.item_quantities() == {1: 2, 2: 1}
+    assert len(order.items) == 3
+
+    order.add_item(fries, 2)
+    order.add_item(Item(id_item=3, name="Soda", item_type="drink", price=2.0))
+
+    assert order.item_quantities() == {1: 2, 2: 3, 3: 1}
+    assert len(order.lines) == 3
+
+
+def test_order_json_only_carries_the_lines():
+    cust = Customer(id_user=1, username="u", hash_password="h", salt="s")
+    addr = Address(city="Paris", postal_code=75000, street_name="Rue Y", street_number=10)
+    burger = Item(id_item=1, name="Burger", item_type="main", price=8.0)
+
+    order = Order(customer=cust, address=addr, items=[burger, burger], status="pending")
+    dumped = order.model_dump(mode="json")
+
+    assert "items" not in dumped
+    assert dumped["lines"] == [{"item": burger.model_dump(mode="json"), "quantity": 2}]
+    assert "items" not in Order.model_json_schema(mode="serialization")["properties"]
+    assert Order.model_validate(dumped).item_quantities() == {1: 2}
@@ -1,6 +1,9 @@
 import datetime
+from unittest.mock import patch
 
+import pytest
 from freezegun import freeze_time
+from jwt import DecodeError, ExpiredSignatureError
 
 from src.Service.JWTService import JwtService
 
@@ -35,3 +38,48 @@ def test_decode_jwt():
     assert datetime.datetime.fromtimestamp(decoded_jwt.get("expiry_timestamp")) == datetime.datetime.fromisoformat(
         "2024-08-26 12:10:00"
     )
+
+
+def test_verify_jwt_checks_each_token_once():
+    service = JwtService("mysecret", cache_size=2)
+    token = service.encode_jwt(user_id=1).access_token
+
+    assert service.verify_jwt(token)["user_id"] == 1
+    with patch("src.Service.JWTService.jwt.decode") as decode:
+        assert service.verify_jwt(token)["user_id"] == 1
+        assert service.validate_user_jwt(token) == 1
+        decode.assert_not_called()
+
+    with pytest.raises(DecodeError):
+        service.verify_jwt(token[:-2] + "xx")
+
+
+def test_verify_jwt_keeps_the_most_recent_tokens():
+    service = JwtService("mysecret", cache_size=2)
+    tokens = [service.encode_jwt(user_id=user_id).access_token for user_id in range(3)]
+    claims = {"user_id": 0, "expiry_timestamp": 4102444800.0}
+    with patch("src.Service.JWTService.jwt.decode", return_value=claims) as decode:
+        for token in tokens + [tokens[2], tokens[0]]:
+            service.verify_jwt(token)
+
+    assert decode.call_count == 4
+
+
+def test_verify_jwt_rejects_expired_tokens_even_when_cached():
+    service = JwtService("mysecret")
+    with freeze_time("2024-08-26 12:00:00"):
+        token = service.encode_jwt(user_id=1).access_token
+        assert service.verify_jwt(token)["user_id"] == 1
+
+    with freeze_time("2024-08-26 12:31:00"):
+        with pytest.raises(ExpiredSignatureError):
+            service.verify_jwt(token)
+    assert len(service._verified) == 0
+
+
+def test_verify_jwt_without_cache():
+    service = JwtService("mysecret", cache_size=0)
+    token = service.encode_jwt(user_id=1).access_token
+
+    assert service.verify_jwt(token) == service.verify_jwt(token)
+    assert len(service._verified) == 0
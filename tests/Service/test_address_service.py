@@ -52,39 +52,27 @@ def test_init_service(mock_db_connector, mock_env, mocker):
     mock_dao_class.assert_called_once_with(db_connector=mock_db_connector)
 
 
-def test_get_or_create_address_existing(service, mock_address_dao, sample_address):
-    """Tests returning an existing address if found in the database."""
-    mock_address_dao.find_address_by_components.return_value = sample_address
+def test_get_or_create_address(service, mock_address_dao, sample_address):
+    """Tests that the address is found or created by a single upsert."""
+    mock_address_dao.upsert_address.return_value = sample_address
 
     result = service.get_or_create_address("Rue de la Paix", "Paris", 75001, "10")
 
     assert result == sample_address
-    mock_address_dao.find_address_by_components.assert_called_once_with(
-        city="Paris", postal_code=75001, street_name="Rue de la Paix", street_number="10"
-    )
+    mock_address_dao.upsert_address.assert_called_once()
+    mock_address_dao.find_address_by_components.assert_not_called()
     mock_address_dao.add_address.assert_not_called()
 
-
-def test_get_or_create_address_new(service, mock_address_dao, sample_address):
-    """Tests creating a new address if it does not exist."""
-    mock_address_dao.find_address_by_components.return_value = None
-    mock_address_dao.add_address.return_value = sample_address
-
-    result = service.get_or_create_address("Rue de la Paix", "Paris", 75001, "10")
-
-    assert result == sample_address
-    mock_address_dao.add_address.assert_called_once()
-
-    called_address = mock_address_dao.add_address.call_args[0][0]
+    called_address = mock_address_dao.upsert_address.call_args[0][0]
     assert isinstance(called_address, Address)
     assert called_address.city == "Paris"
     assert called_address.street_name == "Rue de la Paix"
+    assert called_address.street_number == "10"
 
 
 def test_get_or_create_address_creation_failure(service, mock_address_dao):
     """Tests that a ValueError is raised if the DAO fails to create the address."""
-    mock_address_dao.find_address_by_components.return_value = None
-    mock_address_dao.add_address.return_value = None
+    mock_address_dao.upsert_address.return_value = None
 
     with pytest.raises(ValueError, match="Database error while saving address"):
         service.get_or_create_address("Rue Fail", "ErrorCity", 99999)
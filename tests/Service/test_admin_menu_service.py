@@ -1,5 +1,9 @@
+import gzip
+import json
 from unittest.mock import ANY, MagicMock
 
+import psycopg2
+import psycopg2.errors
 import pytest
 
 from src.DAO.bundleDAO import BundleDAO
@@ -8,6 +12,7 @@ from src.DAO.itemDAO import ItemDAO
 from src.Model.abstract_bundle import AbstractBundle
 from src.Model.discounted_bundle import DiscountedBundle
 from src.Model.item import Item
+from src.Model.item_batch import ItemBatch, ItemChange, StockDelta
 from src.Model.predefined_bundle import PredefinedBundle
 from src.Service.admin_menu_service import AdminMenuService
 
@@ -19,12 +24,18 @@ def mock_db_connector():
 
 @pytest.fixture
 def mock_item_dao():
-    return MagicMock(spec=ItemDAO)
+    item_dao = MagicMock(spec=ItemDAO)
+    item_dao.find_item_id_by_name.return_value = None
+    item_dao.find_item_ids_by_names.return_value = {}
+    return item_dao
 
 
 @pytest.fixture
 def mock_bundle_dao():
-    return MagicMock(spec=BundleDAO)
+    bundle_dao = MagicMock(spec=BundleDAO)
+    bundle_dao.find_bundle_id_by_name.return_value = None
+    bundle_dao.find_bundle_id_by_composition.return_value = None
+    return bundle_dao
 
 
 @pytest.fixture
@@ -67,7 +78,6 @@ def sample_bundle():
 
 
 def test_create_item_success(service: AdminMenuService, mock_item_dao: MagicMock):
-    mock_item_dao.find_all_items.return_value = []
     mock_item_dao.add_item.return_value = MagicMock(spec=Item)
 
     service.create_item("New Item", "Desc", 15.0, 10, True, "side")
@@ -80,31 +90,30 @@ def test_create_item_success(service: AdminMenuService, mock_item_dao: MagicMock
 
 
 def test_create_item_duplicate_name(service: AdminMenuService, mock_item_dao: MagicMock, sample_item: Item):
-    mock_item_dao.find_all_items.return_value = [sample_item]
+    mock_item_dao.find_item_id_by_name.return_value = sample_item.id_item
     with pytest.raises(ValueError, match="already exists"):
-        service.create_item(sample_item.name, "Desc", 15.0, 10, True, "side")
+        service.create_item(sample_item.name.upper(), "Desc", 15.0, 10, True, "side")
+
+    mock_item_dao.find_item_id_by_name.assert_called_once_with(sample_item.name.upper())
+    mock_item_dao.find_all_items.assert_not_called()
 
 
 def test_create_item_validation_negative_price(service: AdminMenuService, mock_item_dao: MagicMock):
-    mock_item_dao.find_all_items.return_value = []
     with pytest.raises(ValueError, match="Price must be positive."):
         service.create_item("Bad Item", "Desc", -10.0, 5, True, "main")
 
 
 def test_create_item_validation_negative_stock(service: AdminMenuService, mock_item_dao: MagicMock):
-    mock_item_dao.find_all_items.return_value = []
     with pytest.raises(ValueError, match="Stock cannot be negative."):
         service.create_item("Bad Item", "Desc", 10.0, -5, True, "main")
 
 
 def test_create_item_validation_zero_stock_available(service: AdminMenuService, mock_item_dao: MagicMock):
-    mock_item_dao.find_all_items.return_value = []
     with pytest.raises(ValueError, match="Zero stock implies non-availability."):
         service.create_item("Out of Stock", "Desc", 10.0, 0, True, "main")
 
 
 def test_create_item_dao_failure(service: AdminMenuService, mock_item_dao: MagicMock):
-    mock_item_dao.find_all_items.return_value = []
     mock_item_dao.add_item.return_value = None
 
     with pytest.raises(Exception, match="Failed to create item: New Item"):
@@ -114,7 +123,6 @@ def test_create_item_dao_failure(service: AdminMenuService, mock_item_dao: Magic
 def test_update_item_success(service: AdminMenuService, mock_item_dao: MagicMock, sample_item: Item):
     mock_item_dao.find_item_by_id.return_value = sample_item
     mock_item_dao.update_item.return_value = sample_item
-    mock_item_dao.find_all_items.return_value = []
 
     service.update_item(1, "Updated Name", "Updated Desc", 20.0, 15, True, "dessert")
 
@@ -128,9 +136,8 @@ def test_update_item_success(service: AdminMenuService, mock_item_dao: MagicMock
 
 
 def test_update_item_duplicate_name(service: AdminMenuService, mock_item_dao: MagicMock, sample_item: Item):
-    item2 = Item(id_item=2, name="Other", price=10.0, item_type="main")
     mock_item_dao.find_item_by_id.return_value = sample_item
-    mock_item_dao.find_all_items.return_value = [sample_item, item2]
+    mock_item_dao.find_item_id_by_name.return_value = 2
 
     with pytest.raises(ValueError, match="already exists"):
         service.update_item(1, name="Other")
@@ -167,13 +174,132 @@ def test_update_item_validation_zero_stock_available(
 
 def test_update_item_dao_failure(service: AdminMenuService, mock_item_dao: MagicMock, sample_item: Item):
     mock_item_dao.find_item_by_id.return_value = sample_item
-    mock_item_dao.find_all_items.return_value = []
     mock_item_dao.update_item.return_value = None
 
     with pytest.raises(Exception, match="Failed to update item: 1"):
         service.update_item(1, "Updated Name", "Desc", 20.0, 15, True, "dessert")
 
 
+def test_apply_item_batch_applies_the_valid_rows_in_one_call(
+    service: AdminMenuService, mock_item_dao: MagicMock, sample_item_list: list
+):
+    burger, fries = sample_item_list
+    mock_item_dao.get_items_by_ids.return_value = sample_item_list
+    mock_item_dao.find_item_ids_by_names.return_value = {"taken": 7}
+    created = Item(id_item=10, name="Soup", price=4.0, stock=3, item_type="starter")
+    mock_item_dao.apply_item_batch.return_value = ([created], [1])
+    batch = ItemBatch(
+        create=[
+            Item(name="Soup", price=4.0, stock=3, item_type="starter"),
+            Item(name="Taken", price=4.0, stock=3, item_type="starter"),
+            Item(name="soup", price=4.0, stock=3, item_type="starter"),
+            Item(name="Free", price=-1.0, stock=3, item_type="starter"),
+        ],
+        update=[ItemChange(id_item=2, price=6.5), ItemChange(id_item=3, price=1.0), ItemChange(id_item=2, stock=1)],
+        restock=[StockDelta(id_item=1, delta=20), StockDelta(id_item=2, delta=-50), StockDelta(id_item=9, delta=1)],
+    )
+
+    results = service.apply_item_batch(batch)
+
+    mock_item_dao.get_items_by_ids.assert_called_once_with([1, 2, 3, 9])
+    mock_item_dao.find_all_items.assert_not_called()
+    new_items, changed_items, stock_deltas = mock_item_dao.apply_item_batch.call_args.args
+    assert [item.name for item in new_items] == ["Soup"]
+    assert [(item.id_item, item.price, item.name) for item in changed_items] == [(2, 6.5, fries.name)]
+    assert stock_deltas == {1: 20, 2: -50}
+    assert fries.price == 20.0
+    assert [(r.operation, r.index, r.id_item, r.success) for r in results] == [
+        ("create", 0, 10, True),
+        ("create", 1, None, False),
+        ("create", 2, None, False),
+        ("create", 3, None, False),
+        ("update", 0, 2, True),
+        ("update", 1, 3, False),
+        ("update", 2, 2, False),
+        ("restock", 0, 1, True),
+        ("restock", 1, 2, False),
+        ("restock", 2, 9, False),
+    ]
+    assert [r.error for r in results if not r.success] == [
+        "An item with the name 'Taken' already exists.",
+        "An item with the name 'soup' already exists.",
+        "Price must be positive.",
+        "No item found with ID 3.",
+        "The item is updated more than once in the batch.",
+        "Stock cannot be negative.",
+        "No item found with ID 9.",
+    ]
+
+
+def test_apply_item_batch_checks_renames(service: AdminMenuService, mock_item_dao: MagicMock, sample_item_list: list):
+    mock_item_dao.get_items_by_ids.return_value = sample_item_list
+    batch = ItemBatch(
+        create=[Item(name="Brand new", price=1.0, stock=1, item_type="side")],
+        update=[
+            ItemChange(id_item=1, name="test item 2"),
+            ItemChange(id_item=2, name="Brand New"),
+            ItemChange(id_item=2, stock=0),
+        ],
+    )
+    mock_item_dao.apply_item_batch.return_value = ([Item(id_item=3, name="Brand new", price=1.0, item_type="side")], [])
+
+    results = service.apply_item_batch(batch)
+
+    assert [r.success for r in results] == [True, False, False, False]
+    assert results[2].error == "An item with the name 'Brand New' already exists."
+    assert results[3].error == "Zero stock implies non-availability."
+
+
+def test_apply_item_batch_without_valid_rows_writes_nothing(service: AdminMenuService, mock_item_dao: MagicMock):
+    mock_item_dao.get_items_by_ids.return_value = []
+
+    results = service.apply_item_batch(ItemBatch(update=[ItemChange(id_item=5, stock=0, availability=True)]))
+
+    assert results[0].error == "No item found with ID 5."
+    mock_item_dao.apply_item_batch.assert_not_called()
+
+
+def test_apply_item_batch_checks_the_item_table_constraints(
+    service: AdminMenuService, mock_item_dao: MagicMock, sample_item_list: list
+):
+    mock_item_dao.get_items_by_ids.return_value = sample_item_list
+    batch = ItemBatch(
+        create=[
+            Item(name="A name far too long for it", price=1.0, stock=1, item_type="side"),
+            Item(name="Soup", price=1.0, stock=1, item_type="side", description="x" * 301),
+            Item(name="Salad", price=1.0, stock=1, item_type="side", availability=None),
+        ],
+        update=[ItemChange(id_item=1, name="Another name too long")],
+    )
+
+    results = service.apply_item_batch(batch)
+
+    assert [r.error for r in results] == [
+        "Name cannot exceed 20 characters.",
+        "Description cannot exceed 300 characters.",
+        "Availability must be set.",
+        "Name cannot exceed 20 characters.",
+    ]
+    mock_item_dao.apply_item_batch.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        (psycopg2.errors.UniqueViolation(), "taken by a concurrent change"),
+        (psycopg2.DataError("value too long"), "rejected by the database: value too long"),
+    ],
+)
+def test_apply_item_batch_turns_database_rejections_into_value_errors(
+    service: AdminMenuService, mock_item_dao: MagicMock, error: Exception, message: str
+):
+    mock_item_dao.get_items_by_ids.return_value = []
+    mock_item_dao.apply_item_batch.side_effect = error
+
+    with pytest.raises(ValueError, match=message):
+        service.apply_item_batch(ItemBatch(create=[Item(name="Soup", price=1.0, stock=1, item_type="side")]))
+
+
 def test_delete_item_success(service: AdminMenuService, mock_item_dao: MagicMock, sample_item: Item):
     mock_item_dao.find_item_by_id.return_value = sample_item
     mock_item_dao.delete_item.return_value = True
@@ -208,11 +334,47 @@ def test_list_items(service: AdminMenuService, mock_item_dao: MagicMock, sample_
     mock_item_dao.find_all_items.assert_called_once()
 
 
+def test_get_menu_payload_is_computed_once_per_version(
+    service: AdminMenuService, mock_item_dao: MagicMock, sample_item_list: list
+):
+    """The menu is only queried and serialized again when its version changes."""
+    mock_item_dao.get_menu_version.return_value = 4
+    mock_item_dao.find_all_items.return_value = sample_item_list
+
+    payload = service.get_menu_payload("items")
+
+    assert payload.etag == 'W/"items-4"'
+    assert json.loads(payload.body) == [item.model_dump() for item in sample_item_list]
+    assert gzip.decompress(payload.gzipped_body) == payload.body
+    assert service.get_menu_payload("items") is payload
+    mock_item_dao.find_all_items.assert_called_once()
+
+    mock_item_dao.get_menu_version.return_value = 5
+    assert service.get_menu_payload("items").etag == 'W/"items-5"'
+    assert mock_item_dao.find_all_items.call_count == 2
+
+
+def test_get_items_by_type_indexes_each_type_once_per_version(
+    service: AdminMenuService, mock_item_dao: MagicMock, sample_item_list: list
+):
+    main, side = sample_item_list
+    mock_item_dao.get_menu_version.return_value = 1
+    mock_item_dao.find_items_by_type.side_effect = lambda item_type: [main] if item_type == "main" else [side]
+
+    assert service.get_items_by_type(["main", "main", "side"]) == {"main": [main], "side": [side]}
+    assert service.get_items_by_type(["side"]) == {"side": [side]}
+    assert [c.args for c in mock_item_dao.find_items_by_type.call_args_list] == [("main",), ("side",)]
+    mock_item_dao.find_all_items.assert_not_called()
+
+    mock_item_dao.get_menu_version.return_value = 2
+    service.get_items_by_type(["side"])
+    assert mock_item_dao.find_items_by_type.call_count == 3
+
+
 def test_create_predefined_bundle_success(
     service: AdminMenuService, mock_bundle_dao: MagicMock, mock_item_dao: MagicMock, sample_item_list: list
 ):
     mock_item_dao.get_items_by_ids.return_value = sample_item_list
-    mock_bundle_dao.find_all_bundles.return_value = []
     mock_bundle_dao.add_predefined_bundle.return_value = MagicMock(spec=PredefinedBundle)
 
     item_ids = [1, 2]
@@ -230,27 +392,27 @@ def test_create_predefined_bundle_success(
 def test_create_predefined_bundle_duplicate_name(
     service: AdminMenuService, mock_bundle_dao: MagicMock, mock_item_dao: MagicMock, sample_item_list: list
 ):
-    existing = PredefinedBundle(name="Existing", price=10.0, composition=[])
     mock_item_dao.get_items_by_ids.return_value = sample_item_list
-    mock_bundle_dao.find_all_bundles.return_value = [existing]
+    mock_bundle_dao.find_bundle_id_by_name.return_value = 3
 
     with pytest.raises(ValueError, match="already exists"):
         service.create_predefined_bundle("Existing", "Desc", [1, 2], 10.0)
 
+    mock_bundle_dao.find_bundle_id_by_name.assert_called_once_with("Existing")
+
 
 def test_create_predefined_bundle_duplicate_composition(
     service: AdminMenuService, mock_bundle_dao: MagicMock, mock_item_dao: MagicMock, sample_item_list: list
 ):
-    item1 = sample_item_list[0]
-    item2 = sample_item_list[1]
-    existing = PredefinedBundle(name="Old", price=10.0, composition=[item1, item2])
-
-    mock_bundle_dao.find_all_bundles.return_value = [existing]
-    mock_item_dao.get_items_by_ids.return_value = [item1, item2]
+    mock_bundle_dao.find_bundle_id_by_composition.return_value = 3
+    mock_item_dao.get_items_by_ids.return_value = sample_item_list
 
     with pytest.raises(ValueError, match="exact composition already exists"):
         service.create_predefined_bundle("New Name", "Desc", [2, 1], 15.0)
 
+    mock_bundle_dao.find_bundle_id_by_composition.assert_called_once_with("predefined", [2, 1])
+    mock_bundle_dao.find_all_bundles.assert_not_called()
+
 
 def test_create_predefined_bundle_validation_price(service: AdminMenuService):
     with pytest.raises(ValueError, match="Price must be positive."):
@@ -274,7 +436,6 @@ def test_create_predefined_bundle_dao_failure(
     service: AdminMenuService, mock_bundle_dao: MagicMock, mock_item_dao: MagicMock, sample_item_list: list
 ):
     mock_item_dao.get_items_by_ids.return_value = sample_item_list
-    mock_bundle_dao.find_all_bundles.return_value = []
     mock_bundle_dao.add_predefined_bundle.return_value = None
 
     with pytest.raises(Exception, match="Failed to create predefined bundle: Menu Midi"):
@@ -292,7 +453,6 @@ def test_update_predefined_bundle_success(
     bundle.composition = []
 
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle]
     mock_item_dao.get_items_by_ids.return_value = sample_item_list
     mock_bundle_dao.update_bundle.return_value = True
 
@@ -309,12 +469,9 @@ def test_update_predefined_bundle_duplicate_name(service: AdminMenuService, mock
     bundle = MagicMock(spec=PredefinedBundle)
     bundle.id_bundle = 1
     bundle.name = "Old"
-    other = MagicMock(spec=PredefinedBundle)
-    other.id_bundle = 2
-    other.name = "Existing"
 
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle, other]
+    mock_bundle_dao.find_bundle_id_by_name.return_value = 2
 
     with pytest.raises(ValueError, match="already exists"):
         service.update_predefined_bundle(1, name="Existing")
@@ -323,15 +480,11 @@ def test_update_predefined_bundle_duplicate_name(service: AdminMenuService, mock
 def test_update_predefined_bundle_duplicate_composition(
     service: AdminMenuService, mock_bundle_dao: MagicMock, mock_item_dao: MagicMock, sample_item_list: list
 ):
-    item1 = sample_item_list[0]
-    item2 = sample_item_list[1]
-
     bundle = PredefinedBundle(id_bundle=1, name="ToUpdate", price=10.0, composition=[])
-    other = PredefinedBundle(id_bundle=2, name="Other", price=10.0, composition=[item1, item2])
 
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle, other]
-    mock_item_dao.get_items_by_ids.return_value = [item1, item2]
+    mock_bundle_dao.find_bundle_id_by_composition.return_value = 2
+    mock_item_dao.get_items_by_ids.return_value = sample_item_list
 
     with pytest.raises(ValueError, match="exact composition already exists"):
         service.update_predefined_bundle(1, item_ids=[2, 1])
@@ -388,7 +541,6 @@ def test_update_predefined_bundle_dao_failure(service: AdminMenuService, mock_bu
     bundle.name = "Name"
 
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle]
     mock_bundle_dao.update_bundle.return_value = False
     with pytest.raises(Exception, match="Failed to update predefined bundle"):
         service.update_predefined_bundle(1, name="Fail")
@@ -397,7 +549,6 @@ def test_update_predefined_bundle_dao_failure(service: AdminMenuService, mock_bu
 def test_create_discounted_bundle_success(
     service: AdminMenuService, mock_bundle_dao: MagicMock, sample_item_types: list
 ):
-    mock_bundle_dao.find_all_bundles.return_value = []
     mock_bundle_dao.add_discounted_bundle.return_value = MagicMock(spec=DiscountedBundle)
 
     service.create_discounted_bundle("Menu Complet", "Desc", sample_item_types, 0.25)
@@ -414,19 +565,19 @@ def test_create_discounted_bundle_success(
 def test_create_discounted_bundle_duplicate_name(
     service: AdminMenuService, mock_bundle_dao: MagicMock, sample_item_types: list
 ):
-    existing = DiscountedBundle(name="Existing", discount=0.1, required_item_types=[])
-    mock_bundle_dao.find_all_bundles.return_value = [existing]
+    mock_bundle_dao.find_bundle_id_by_name.return_value = 3
 
     with pytest.raises(ValueError, match="already exists"):
         service.create_discounted_bundle("Existing", "Desc", sample_item_types, 0.2)
 
 
 def test_create_discounted_bundle_duplicate_config(service: AdminMenuService, mock_bundle_dao: MagicMock):
-    existing = DiscountedBundle(name="Old", discount=0.1, required_item_types=["main", "drink"])
-    mock_bundle_dao.find_all_bundles.return_value = [existing]
+    mock_bundle_dao.find_bundle_id_by_composition.return_value = 3
 
     with pytest.raises(ValueError, match="exact configuration of item types already exists"):
-        service.create_discounted_bundle("New", "Desc", ["drink", "main"], 0.1)
+        service.create_discounted_bundle("New", "Desc", ["Drink", "main"], 0.1)
+
+    mock_bundle_dao.find_bundle_id_by_composition.assert_called_once_with("discount", ["drink", "main"])
 
 
 def test_create_discounted_bundle_validation_discount_low(service: AdminMenuService, sample_item_types: list):
@@ -452,7 +603,6 @@ def test_create_discounted_bundle_validation_invalid_strings(service: AdminMenuS
 def test_create_discounted_bundle_dao_failure(
     service: AdminMenuService, mock_bundle_dao: MagicMock, sample_item_types: list
 ):
-    mock_bundle_dao.find_all_bundles.return_value = []
     mock_bundle_dao.add_discounted_bundle.return_value = None
     with pytest.raises(Exception, match="Failed to create discounted bundle"):
         service.create_discounted_bundle("Fail", "Desc", sample_item_types, 0.2)
@@ -461,7 +611,6 @@ def test_create_discounted_bundle_dao_failure(
 def test_update_discounted_bundle_success(service: AdminMenuService, mock_bundle_dao: MagicMock):
     bundle = DiscountedBundle(id_bundle=2, name="Old", description="Desc", discount=0.1, required_item_types=["main"])
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle]
     mock_bundle_dao.update_bundle.return_value = True
 
     service.update_discounted_bundle(2, name="New", discount=0.15, required_item_types=["side", "drink"])
@@ -474,9 +623,8 @@ def test_update_discounted_bundle_success(service: AdminMenuService, mock_bundle
 
 def test_update_discounted_bundle_duplicate_name(service: AdminMenuService, mock_bundle_dao: MagicMock):
     bundle = DiscountedBundle(id_bundle=1, name="Old", discount=0.1, required_item_types=[])
-    other = DiscountedBundle(id_bundle=2, name="Existing", discount=0.1, required_item_types=[])
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle, other]
+    mock_bundle_dao.find_bundle_id_by_name.return_value = 2
 
     with pytest.raises(ValueError, match="already exists"):
         service.update_discounted_bundle(1, name="Existing")
@@ -484,11 +632,10 @@ def test_update_discounted_bundle_duplicate_name(service: AdminMenuService, mock
 
 def test_update_discounted_bundle_duplicate_config(service: AdminMenuService, mock_bundle_dao: MagicMock):
     bundle = DiscountedBundle(id_bundle=1, name="ToUpdate", discount=0.1, required_item_types=[])
-    other = DiscountedBundle(id_bundle=2, name="Other", discount=0.1, required_item_types=["main", "drink"])
 
     mock_bundle_dao.find_bundle_by_id.return_value = bundle
-    mock_bundle_dao.find_all_bundles.return_value = [bundle, other]
-    
+    mock_bundle_dao.find_bundle_id_by_composition.return_value = 2
+
     with pytest.raises(ValueError, match="exact item types configuration"):
         service.update_discounted_bundle(1, required_item_types=["drink", "main"])
 
@@ -117,49 +117,30 @@ def sample_delivery_completed():
 
 
 
-def test_list_waiting_orders_filters_pending(
+def test_list_waiting_orders_reads_the_pending_orders(
     service: AdminOrderService,
     mock_order_dao: MagicMock,
     sample_order_pending: Order,
-    sample_order_validated: Order,
-    sample_order_delivered: Order,
 ):
     """
-    Tests that list_waiting_orders returns only orders with status 'pending'.
+    Tests that list_waiting_orders only reads the orders with status 'pending'.
     """
-    all_orders = [sample_order_pending, sample_order_validated, sample_order_delivered]
-    mock_order_dao.find_all_orders.return_value = all_orders
+    mock_order_dao.find_orders_by_status.return_value = [sample_order_pending]
 
     result = service.list_waiting_orders()
 
-    mock_order_dao.find_all_orders.assert_called_once()
-    assert len(result) == 1
+    mock_order_dao.find_orders_by_status.assert_called_once_with("pending", lazy=True)
+    mock_order_dao.find_all_orders.assert_not_called()
     assert result == [sample_order_pending]
 
 
-def test_list_waiting_orders_returns_empty_list_if_none_pending(
-    service: AdminOrderService,
-    mock_order_dao: MagicMock,
-    sample_order_validated: Order,
-):
-    """
-    Tests that an empty list is returned if no orders have the 'pending' status.
-    """
-    non_pending_orders = [sample_order_validated]
-    mock_order_dao.find_all_orders.return_value = non_pending_orders
-
-    result = service.list_waiting_orders()
-
-    assert result == []
-
-
 def test_list_waiting_orders_returns_empty_list_if_dao_returns_empty(
     service: AdminOrderService, mock_order_dao: MagicMock
 ):
     """
     Tests that an empty list is returned if the DAO finds no orders.
     """
-    mock_order_dao.find_all_orders.return_value = []
+    mock_order_dao.find_orders_by_status.return_value = []
 
     result = service.list_waiting_orders()
 
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.DAO.analyticsDAO import AnalyticsDAO
+from src.DAO.DBConnector import DBConnector
+from src.Service.analytics_service import AnalyticsService
+
+
+@pytest.fixture
+def mock_analytics_dao():
+    """Provides a mock AnalyticsDAO."""
+    return MagicMock(spec=AnalyticsDAO)
+
+
+@pytest.fixture
+def service(mock_analytics_dao):
+    """Provides an AnalyticsService with a mocked DAO."""
+    analytics_service = AnalyticsService(db_connector=MagicMock(spec=DBConnector))
+    analytics_service.analytics_dao = mock_analytics_dao
+    return analytics_service
+
+
+def test_revenue_defaults_to_the_last_30_days(service, mock_analytics_dao):
+    """Tests that the revenue covers the last 30 days by default."""
+    mock_analytics_dao.revenue_by_period.return_value = []
+
+    assert service.revenue() == []
+
+    since, until, bucket = mock_analytics_dao.revenue_by_period.call_args.args
+    assert until - since == timedelta(days=30)
+    assert bucket == "day"
+
+
+def test_revenue_invalid_bucket(service, mock_analytics_dao):
+    """Tests that an unknown bucket is rejected."""
+    with pytest.raises(ValueError, match="Invalid bucket"):
+        service.revenue(bucket="year")
+    mock_analytics_dao.revenue_by_period.assert_not_called()
+
+
+def test_invalid_period(service, mock_analytics_dao):
+    """Tests that a period ending before it starts is rejected."""
+    with pytest.raises(ValueError, match="start of the period"):
+        service.top_items(since=datetime(2025, 2, 1), until=datetime(2025, 1, 1))
+    mock_analytics_dao.top_items.assert_not_called()
+
+
+def test_top_items(service, mock_analytics_dao):
+    """Tests that the top items are read for the requested period and limit."""
+    since, until = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    mock_analytics_dao.top_items.return_value = [{"id_item": 1}]
+
+    assert service.top_items(since, until, limit=3) == [{"id_item": 1}]
+    mock_analytics_dao.top_items.assert_called_once_with(since, until, 3)
+
+
+@pytest.mark.parametrize("limit", [0, 101])
+def test_top_bundles_invalid_limit(service, mock_analytics_dao, limit):
+    """Tests that the number of bundles asked for is bounded."""
+    with pytest.raises(ValueError, match="limit"):
+        service.top_bundles(limit=limit)
+    mock_analytics_dao.top_bundles.assert_not_called()
+
+
+def test_dashboard(service, mock_analytics_dao):
+    """Tests that the dashboard returns the counters read by the DAO."""
+    mock_analytics_dao.dashboard_counters.return_value = {"pending_orders": 1}
+    assert service.dashboard() == {"pending_orders": 1}
+
+
+def test_dashboard_failure(service, mock_analytics_dao):
+    """Tests that a failure to read the counters is reported."""
+    mock_analytics_dao.dashboard_counters.return_value = None
+    with pytest.raises(Exception, match="Failed to read the dashboard counters"):
+        service.dashboard()
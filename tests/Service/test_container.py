@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.container import Container, LazyServices
+from src.DAO.DBConnector import DBConnector
+
+
+@pytest.fixture
+def container():
+    return Container(db_connector=MagicMock(spec=DBConnector))
+
+
+def test_container_builds_nothing_upfront():
+    """Tests that creating the container neither builds a service nor reads the database settings."""
+    with (
+        patch("src.container.DBConnector") as connector_class,
+        patch("src.Service.order_service.OrderService") as service_class,
+    ):
+        container = Container()
+
+        connector_class.assert_not_called()
+        service_class.assert_not_called()
+
+        assert container.order_service is container.order_service
+        connector_class.assert_called_once_with()
+        service_class.assert_called_once()
+
+
+def test_services_share_the_same_daos(container):
+    """Tests that all the services use the DAOs of the container's single registry."""
+    order_service = container.order_service
+    admin_order_service = container.admin_order_service
+    admin_menu_service = container.admin_menu_service
+
+    assert order_service.order_dao is admin_order_service.order_dao is container.daos.order_dao
+    assert admin_menu_service.item_dao is order_service.item_dao is container.daos.item_dao
+    assert container.auth_service.user_dao is container.admin_user_service.user_dao
+    assert container.analytics_service.analytics_dao is container.daos.analytics_dao
+    assert container.daos.db_connector is container.db_connector
+
+
+def test_lazy_services_builds_a_service_on_lookup(container):
+    """Tests that the mapping given to the CLI only builds the services that are looked up."""
+    services = LazyServices(container, {"order": "order_service", "item": "admin_menu_service"})
+
+    assert list(services) == ["order", "item"]
+    assert "order_service" not in container.__dict__
+
+    assert services.get("order") is container.order_service
+    assert "admin_menu_service" not in container.__dict__
+    assert services.get("missing") is None
+
+
+def test_cli_entry_point_does_not_import_heavy_optional_modules():
+    """Tests that starting the CLI and logging in loads neither phonenumbers, requests, uvicorn nor FastAPI."""
+    code = (
+        "import sys, src.CLI.__main__, src.init_app\n"
+        "from unittest.mock import MagicMock\n"
+        "from src.DAO.DBConnector import DBConnector\n"
+        "src.init_app.container.__dict__['db_connector'] = MagicMock(spec=DBConnector)\n"
+        "src.init_app.services['auth'], src.init_app.services['driver']\n"
+        "print(sorted(m for m in ('phonenumbers', 'requests', 'uvicorn', 'fastapi') if m in sys.modules))"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert completed.stdout.strip() == "[]"
@@ -165,7 +165,7 @@ def test_create_and_assign_delivery_success(
 
     mock_created_delivery = MagicMock(spec=Delivery, id=1)
     mock_delivery_dao.add_delivery.return_value = mock_created_delivery
-    mock_order_dao.update_order.return_value = True
+    mock_order_dao.update_order_status.return_value = True
     mock_user_dao.update_user.return_value = True
 
     order_ids = [sample_order_pending.id]
@@ -177,7 +177,8 @@ def test_create_and_assign_delivery_success(
     mock_order_dao.find_order_by_id.assert_called_once_with(sample_order_pending.id)
 
     assert sample_order_pending.status == "in_progress"
-    mock_order_dao.update_order.assert_called_once_with(sample_order_pending)
+    mock_order_dao.update_order_status.assert_called_once_with([sample_order_pending.id], "in_progress")
+    mock_order_dao.update_order.assert_not_called()
 
     assert sample_driver_available.availability is False
     mock_user_dao.update_user.assert_called_once_with(sample_driver_available)
@@ -278,7 +279,10 @@ def test_complete_delivery_success(
 
     for order in sample_delivery_inprogress.orders:
         assert order.status == "delivered"
-        mock_order_dao.update_order.assert_called_with(order)
+    mock_order_dao.update_order_status.assert_called_once_with(
+        [order.id_order for order in sample_delivery_inprogress.orders], "delivered"
+    )
+    mock_order_dao.update_order.assert_not_called()
 
     mock_delivery_dao.update_delivery.assert_called_once_with(sample_delivery_inprogress)
     assert result == sample_delivery_inprogress
@@ -307,7 +311,7 @@ def test_complete_delivery_order_update_fails(
 ):
     mock_delivery_dao.find_delivery_by_id.return_value = sample_delivery_inprogress
     mock_delivery_dao.update_delivery.return_value = sample_delivery_inprogress
-    mock_order_dao.update_order.side_effect = Exception("DB Error")
+    mock_order_dao.update_order_status.side_effect = Exception("DB Error")
 
     service.complete_delivery(sample_delivery_inprogress.id)
 
@@ -364,19 +368,18 @@ def test_list_pending_orders_success(
     service: DriverService,
     mock_order_dao: MagicMock,
     sample_order_pending: Order,
-    sample_order_validated: Order,
 ):
-    all_orders = [sample_order_pending, sample_order_validated]
-    mock_order_dao.find_all_orders.return_value = all_orders
+    mock_order_dao.find_orders_by_status.return_value = [sample_order_pending]
 
     result = service.list_pending_orders()
 
     assert result == [sample_order_pending]
-    mock_order_dao.find_all_orders.assert_called_once()
+    mock_order_dao.find_orders_by_status.assert_called_once_with("pending", lazy=True)
+    mock_order_dao.find_all_orders.assert_not_called()
 
 
 def test_list_pending_orders_empty(service: DriverService, mock_order_dao: MagicMock):
-    mock_order_dao.find_all_orders.return_value = []
+    mock_order_dao.find_orders_by_status.return_value = []
 
     result = service.list_pending_orders()
 
@@ -390,7 +393,7 @@ def test_get_assigned_delivery_success(
 
     result = service.get_assigned_delivery(user_id=1)
 
-    mock_delivery_dao.find_in_progress_deliveries_by_driver.assert_called_once_with(1)
+    mock_delivery_dao.find_in_progress_deliveries_by_driver.assert_called_once_with(1, lazy=True)
     assert result == [sample_delivery_inprogress]
 
 
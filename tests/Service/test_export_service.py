@@ -0,0 +1,138 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.DAO.DBConnector import DBConnector
+from src.DAO.deliveryDAO import DeliveryDAO
+from src.DAO.orderDAO import OrderDAO
+from src.DAO.userDAO import UserDAO
+from src.Model.address import Address
+from src.Model.customer import Customer
+from src.Model.delivery import Delivery
+from src.Model.driver import Driver
+from src.Model.item import Item
+from src.Model.order import Order
+from src.Service.export_service import ExportService
+
+
+@pytest.fixture
+def customer():
+    return Customer(id_user=1, username="alice", name="Alice", phone_number="0601020304", sign_up_date=date(2025, 1, 2))
+
+
+@pytest.fixture
+def order(customer):
+    burger = Item(id_item=1, name="Burger", item_type="main", price=8.0, stock=10, availability=True)
+    cola = Item(id_item=2, name="Cola", item_type="drink", price=2.0, stock=10, availability=True)
+    return Order(
+        id_order=7,
+        customer=customer,
+        address=Address(id_address=3, city="Bourg", postal_code=1000, street_name="Rue Neuve", street_number="4"),
+        items=[burger, burger, cola],
+        price=18.0,
+        status="pending",
+        order_date=datetime(2025, 3, 1, 12, 30),
+    )
+
+
+@pytest.fixture
+def export_service():
+    """Provides an ExportService whose DAOs are mocks."""
+    service = ExportService(db_connector=MagicMock(spec=DBConnector))
+    service.order_dao = MagicMock(spec=OrderDAO)
+    service.delivery_dao = MagicMock(spec=DeliveryDAO)
+    service.user_dao = MagicMock(spec=UserDAO)
+    return service
+
+
+def test_export_orders_ndjson(export_service, order):
+    """Tests that orders are exported as one JSON document per line, with the date filters passed to the DAO."""
+    export_service.order_dao.iter_orders.return_value = iter([order, order])
+    since, until = datetime(2025, 3, 1), datetime(2025, 4, 1)
+
+    lines = "".join(export_service.export_orders("ndjson", since, until)).splitlines()
+
+    export_service.order_dao.iter_orders.assert_called_once_with(since=since, until=until)
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {
+        "id_order": 7,
+        "order_date": "2025-03-01T12:30:00",
+        "status": "pending",
+        "price": 18.0,
+        "id_customer": 1,
+        "customer_name": "Alice",
+        "address": "4 Rue Neuve, 01000 Bourg",
+        "items": "2x Burger; 1x Cola",
+    }
+
+
+def test_export_orders_csv_in_chunks(export_service, order):
+    """Tests that the CSV export starts with a header and is produced in chunks of rows."""
+    export_service.ROWS_PER_CHUNK = 2
+    export_service.order_dao.iter_orders.return_value = iter([order] * 5)
+
+    chunks = list(export_service.export_orders("csv"))
+
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert len(rows) == 5
+    assert rows[0]["items"] == "2x Burger; 1x Cola"
+
+
+def test_export_deliveries(export_service, order):
+    """Tests the rows of the deliveries export."""
+    driver = Driver(id_user=2, username="bob", name="Bob", vehicle_type="bike", availability=True)
+    delivery = Delivery(
+        id_delivery=5, driver=driver, orders=[order], status="delivered", delivery_time=datetime(2025, 3, 1, 13, 0)
+    )
+    export_service.delivery_dao.iter_deliveries.return_value = iter([delivery])
+
+    rows = list(csv.DictReader(io.StringIO("".join(export_service.export_deliveries("csv")))))
+
+    assert rows == [
+        {
+            "id_delivery": "5",
+            "status": "delivered",
+            "delivery_time": "2025-03-01T13:00:00",
+            "id_driver": "2",
+            "driver_name": "Bob",
+            "orders": "7",
+        }
+    ]
+
+
+def test_export_users(export_service, customer):
+    """Tests the rows of the users export."""
+    export_service.user_dao.iter_users.return_value = iter([customer])
+
+    lines = "".join(export_service.export_users("ndjson", since=date(2025, 1, 1))).splitlines()
+
+    export_service.user_dao.iter_users.assert_called_once_with(since=date(2025, 1, 1), until=None)
+    assert json.loads(lines[0])["user_type"] == "customer"
+    assert json.loads(lines[0])["sign_up_date"] == "2025-01-02"
+
+
+def test_export_empty(export_service):
+    """Tests that an empty NDJSON export is empty and an empty CSV export only has its header."""
+    export_service.order_dao.iter_orders.return_value = iter([])
+    assert list(export_service.export_orders("ndjson")) == []
+
+    export_service.order_dao.iter_orders.return_value = iter([])
+    assert "".join(export_service.export_orders("csv")).startswith("id_order,order_date")
+
+
+def test_export_unsupported_format(export_service):
+    """Tests that an unknown format is rejected."""
+    with pytest.raises(ValueError):
+        list(export_service.export_orders("xml"))
+
+
+def test_gzip_stream():
+    """Tests that the compressed stream is a valid gzip file of the text stream."""
+    chunks = ["a,b\n", "", "1,2\n" * 1000]
+    assert gzip.decompress(b"".join(ExportService.gzip(chunks))).decode() == "".join(chunks)
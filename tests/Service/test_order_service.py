@@ -1,5 +1,5 @@
 from datetime import datetime
-from unittest.mock import ANY, MagicMock
+from unittest.mock import ANY, MagicMock, call
 
 import pytest
 
@@ -125,6 +125,7 @@ def sample_bundle_1(sample_item_1, sample_item_2):
     bundle.composition = [sample_item_1, sample_item_2]
     bundle.compute_price.return_value = 7.0
     bundle.name = "Menu 1"
+    bundle.id_bundle = 1
     return bundle
 
 
@@ -135,6 +136,7 @@ def sample_bundle_2(sample_item_1):
     bundle.composition = [sample_item_1, sample_item_1]
     bundle.compute_price.return_value = 10.0
     bundle.name = "Double Burger"
+    bundle.id_bundle = None
     return bundle
 
 
@@ -157,6 +159,7 @@ def sample_order_pending(sample_customer, sample_address):
     order.address = sample_address
     order.status = "pending"
     order.items = []
+    order.item_quantities.return_value = {}
     order.price = 0.0
     return order
 
@@ -170,6 +173,7 @@ def sample_order_pending_with_items(sample_customer, sample_address, sample_item
     order.address = sample_address
     order.status = "pending"
     order.items = [sample_item_1, sample_item_2]
+    order.item_quantities.return_value = {1: 1, 2: 1}
     order.price = 7.0
     return order
 
@@ -183,6 +187,7 @@ def sample_order_validated(sample_customer, sample_address, sample_item_1):
     order.address = sample_address
     order.status = "validated"
     order.items = [sample_item_1]
+    order.item_quantities.return_value = {1: 1}
     return order
 
 
@@ -262,6 +267,84 @@ def test_create_order_dao_failure(
         service.create_order(customer_id=1, address_id=10)
 
 
+def test_checkout_success(
+    service: OrderService,
+    mock_user_dao: MagicMock,
+    mock_address_dao: MagicMock,
+    mock_item_dao: MagicMock,
+    mock_order_dao: MagicMock,
+    sample_customer: Customer,
+    sample_address: Address,
+    sample_bundle_1: AbstractBundle,
+    sample_bundle_2: AbstractBundle,
+    sample_item_1: Item,
+    sample_item_2: Item,
+):
+    """Tests that a whole cart is checked out with one availability query and one insert."""
+    mock_user_dao.find_user_by_id.return_value = sample_customer
+    mock_address_dao.find_address_by_id.return_value = sample_address
+    mock_item_dao.get_items_by_ids.return_value = [sample_item_1, sample_item_2]
+    mock_created_order = MagicMock(spec=Order, id_order=1)
+    mock_order_dao.add_order.return_value = mock_created_order
+
+    result = service.checkout(customer_id=1, address_id=10, cart=[sample_bundle_1, sample_bundle_2])
+
+    mock_item_dao.get_items_by_ids.assert_called_once()
+    assert sorted(mock_item_dao.get_items_by_ids.call_args[0][0]) == [1, 2]
+    mock_order_dao.add_order.assert_called_once_with(ANY, [(1, 7.0)])
+    called_order = mock_order_dao.add_order.call_args[0][0]
+    assert called_order.item_quantities() == {1: 3, 2: 1}
+    assert len(called_order.lines) == 2
+    assert called_order.price == 17.0
+    assert called_order.status == "pending"
+    mock_order_dao.update_order.assert_not_called()
+    mock_order_dao.find_order_by_id.assert_not_called()
+    assert result == mock_created_order
+
+
+def test_checkout_item_not_available(
+    service: OrderService,
+    mock_user_dao: MagicMock,
+    mock_address_dao: MagicMock,
+    mock_item_dao: MagicMock,
+    mock_order_dao: MagicMock,
+    sample_customer: Customer,
+    sample_address: Address,
+    sample_bundle_unavailable: AbstractBundle,
+    sample_item_1: Item,
+    sample_item_unavailable: Item,
+):
+    """Tests that nothing is inserted when one cart item is unavailable."""
+    mock_user_dao.find_user_by_id.return_value = sample_customer
+    mock_address_dao.find_address_by_id.return_value = sample_address
+    mock_item_dao.get_items_by_ids.return_value = [sample_item_1, sample_item_unavailable]
+
+    with pytest.raises(ValueError, match="items \\['Milkshake'\\] are not available"):
+        service.checkout(customer_id=1, address_id=10, cart=[sample_bundle_unavailable])
+
+    mock_order_dao.add_order.assert_not_called()
+
+
+def test_checkout_empty_cart(service: OrderService, mock_order_dao: MagicMock):
+    """Tests that an empty cart cannot be checked out."""
+    with pytest.raises(ValueError, match="Cannot checkout an empty cart."):
+        service.checkout(customer_id=1, address_id=10, cart=[])
+
+    mock_order_dao.add_order.assert_not_called()
+
+
+def test_checkout_customer_not_found(
+    service: OrderService, mock_user_dao: MagicMock, mock_order_dao: MagicMock, sample_bundle_1: AbstractBundle
+):
+    """Tests that a ValueError is raised if the customer is not found."""
+    mock_user_dao.find_user_by_id.return_value = None
+
+    with pytest.raises(ValueError, match="No valid customer found with ID 99"):
+        service.checkout(customer_id=99, address_id=10, cart=[sample_bundle_1])
+
+    mock_order_dao.add_order.assert_not_called()
+
+
 def test_cancel_order_success(service: OrderService, mock_order_dao: MagicMock, sample_order_pending: Order):
     """Tests successful cancellation (deletion) of an order."""
     mock_order_dao.find_order_by_id.return_value = sample_order_pending
@@ -310,16 +393,14 @@ def test_add_bundle_to_order_success(
     mock_order_dao.update_order.return_value = sample_order_pending
     mock_order_dao.find_order_by_id.side_effect = [sample_order_pending, sample_order_pending]
 
-    assert len(sample_order_pending.items) == 0
     assert sample_order_pending.price == 0.0
 
     result = service.add_bundle_to_order(order_id=501, bundle=sample_bundle_1)
 
-    assert len(sample_order_pending.items) == 2
-    assert sample_order_pending.items[0] == sample_item_1
-    assert sample_order_pending.items[1] == sample_item_2
+    assert sample_order_pending.add_item.call_args_list == [call(sample_item_1), call(sample_item_2)]
     assert sample_order_pending.price == 7.0
     mock_order_dao.update_order.assert_called_once_with(sample_order_pending)
+    mock_order_dao.record_bundle_sale.assert_called_once_with(501, 1, 7.0)
     assert result == sample_order_pending
 
 
@@ -338,7 +419,7 @@ def test_add_bundle_to_order_item_not_available(
         service.add_bundle_to_order(order_id=501, bundle=sample_bundle_unavailable)
 
     mock_order_dao.update_order.assert_not_called()
-    assert len(sample_order_pending.items) == 0
+    sample_order_pending.add_item.assert_not_called()
 
 
 def test_add_bundle_to_order_order_not_found(
@@ -374,8 +455,9 @@ def test_add_bundle_to_order_dao_failure(
     with pytest.raises(Exception, match="Failed to update the order."):
         service.add_bundle_to_order(order_id=501, bundle=sample_bundle_1)
 
-    assert len(sample_order_pending.items) == 2
+    assert sample_order_pending.add_item.call_count == 2
     mock_order_dao.update_order.assert_called_once()
+    mock_order_dao.record_bundle_sale.assert_not_called()
 
 
 def test_validate_order_success_simple(
@@ -383,27 +465,19 @@ def test_validate_order_success_simple(
     mock_order_dao: MagicMock,
     mock_item_dao: MagicMock,
     sample_order_pending_with_items: Order,
-    sample_item_1: Item,
-    sample_item_2: Item,
 ):
-    """Tests successful validation of an order, checking stock reduction."""
-    sample_item_1.stock = 10
-    sample_item_2.stock = 5
+    """Tests successful validation of an order, reserving the stock in one call."""
     sample_order_pending_with_items.status = "pending"
 
     mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
-
-    mock_item_dao.update_item.return_value = True
+    mock_item_dao.reserve_stock.return_value = []
     mock_order_dao.update_order.return_value = True
 
     result = service.validate_order(order_id=503)
 
-    assert sample_item_1.stock == 9
-    assert sample_item_2.stock == 4
-    assert mock_item_dao.update_item.call_count == 2
+    mock_item_dao.reserve_stock.assert_called_once_with({1: 1, 2: 1})
+    mock_item_dao.find_item_by_id.assert_not_called()
+    mock_item_dao.update_item.assert_not_called()
     assert sample_order_pending_with_items.status == "validated"
     mock_order_dao.update_order.assert_called_once_with(sample_order_pending_with_items)
     assert result == sample_order_pending_with_items
@@ -417,80 +491,40 @@ def test_validate_order_success_complex_stock(
     sample_item_2: Item,
 ):
     """Tests validation with multiple bundles and duplicate items."""
-    sample_item_1.stock = 10
-    sample_item_2.stock = 5
-
-    complex_order = MagicMock(
-        spec=Order, id=504, status="pending", items=[sample_item_1, sample_item_2, sample_item_1, sample_item_1]
-    )
+    complex_order = MagicMock(spec=Order, id=504, status="pending")
+    complex_order.item_quantities.return_value = {1: 3, 2: 1}
 
     mock_order_dao.find_order_by_id.return_value = complex_order
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
-    mock_item_dao.update_item.return_value = True
+    mock_item_dao.reserve_stock.return_value = []
     mock_order_dao.update_order.return_value = True
 
     service.validate_order(order_id=504)
 
-    assert sample_item_1.stock == 7
-    assert sample_item_2.stock == 4
+    mock_item_dao.reserve_stock.assert_called_once_with({1: 3, 2: 1})
     assert complex_order.status == "validated"
 
 
-def test_validate_order_stock_to_zero(
-    service: OrderService,
-    mock_order_dao: MagicMock,
-    mock_item_dao: MagicMock,
-    sample_order_pending_with_items: Order,
-    sample_item_1: Item,
-    sample_item_2: Item,
-):
-    """Tests that item availability is set to False when stock hits 0."""
-    sample_item_1.stock = 1
-    sample_item_1.availability = True
-    sample_item_2.stock = 1
-    sample_item_2.availability = True
-    sample_order_pending_with_items.status = "pending"
-
-    mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
-    mock_item_dao.update_item.return_value = True
-    mock_order_dao.update_order.return_value = True
-
-    service.validate_order(order_id=503)
-
-    assert sample_item_1.stock == 0
-    assert sample_item_1.availability is False
-    assert sample_item_2.stock == 0
-    assert sample_item_2.availability is False
-
-
 def test_validate_order_not_enough_stock(
     service: OrderService,
     mock_order_dao: MagicMock,
     mock_item_dao: MagicMock,
     sample_order_pending_with_items: Order,
-    sample_item_1: Item,
     sample_item_2: Item,
 ):
-    """Tests that a ValueError is raised if stock is insufficient."""
-    sample_item_1.stock = 10
+    """Tests that a ValueError is raised if the reservation fails for lack of stock."""
     sample_item_2.stock = 0
     sample_order_pending_with_items.status = "pending"
 
     mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
+    mock_item_dao.reserve_stock.return_value = [2]
+    mock_item_dao.get_items_by_ids.return_value = [sample_item_2]
 
     with pytest.raises(ValueError, match="Not enough stock for item 'Fries'. Needed: 1, Available: 0."):
         service.validate_order(order_id=503)
 
-    mock_item_dao.update_item.assert_not_called()
+    mock_item_dao.get_items_by_ids.assert_called_once_with([2])
     mock_order_dao.update_order.assert_not_called()
+    assert sample_order_pending_with_items.status == "pending"
 
 
 def test_validate_order_item_not_found_in_db(
@@ -498,17 +532,16 @@ def test_validate_order_item_not_found_in_db(
     mock_order_dao: MagicMock,
     mock_item_dao: MagicMock,
     sample_order_pending_with_items: Order,
-    sample_item_1: Item,
 ):
     """Tests that an Exception is raised if a required item no longer exists."""
     sample_order_pending_with_items.status = "pending"
     mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = lambda id: sample_item_1 if id == 1 else None
+    mock_item_dao.reserve_stock.return_value = [2]
+    mock_item_dao.get_items_by_ids.return_value = []
 
     with pytest.raises(Exception, match="Item ID 2 required for order no longer exists."):
         service.validate_order(order_id=503)
 
-    mock_item_dao.update_item.assert_not_called()
     mock_order_dao.update_order.assert_not_called()
 
 
@@ -533,53 +566,22 @@ def test_validate_order_empty_order(service: OrderService, mock_order_dao: Magic
         service.validate_order(order_id=501)
 
 
-def test_validate_order_item_update_fails(
-    service: OrderService,
-    mock_order_dao: MagicMock,
-    mock_item_dao: MagicMock,
-    sample_order_pending_with_items: Order,
-    sample_item_1: Item,
-    sample_item_2: Item,
-):
-    """Tests that an Exception is raised if item stock update fails."""
-    sample_item_1.stock = 10
-    sample_item_2.stock = 5
-    sample_order_pending_with_items.status = "pending"
-    mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
-    mock_item_dao.update_item.side_effect = [True, False]
-
-    with pytest.raises(Exception, match="Failed to update stock for item 2."):
-        service.validate_order(order_id=503)
-
-    mock_order_dao.update_order.assert_not_called()
-
-
 def test_validate_order_status_update_fails(
     service: OrderService,
     mock_order_dao: MagicMock,
     mock_item_dao: MagicMock,
     sample_order_pending_with_items: Order,
-    sample_item_1: Item,
-    sample_item_2: Item,
 ):
-    """Tests exception if stock updates but order status update fails."""
-    sample_item_1.stock = 10
-    sample_item_2.stock = 5
+    """Tests exception if stock is reserved but order status update fails."""
     sample_order_pending_with_items.status = "pending"
     mock_order_dao.find_order_by_id.return_value = sample_order_pending_with_items
-    mock_item_dao.find_item_by_id.side_effect = (
-        lambda id: sample_item_1 if id == 1 else (sample_item_2 if id == 2 else None)
-    )
-    mock_item_dao.update_item.return_value = True
+    mock_item_dao.reserve_stock.return_value = []
     mock_order_dao.update_order.return_value = None
 
     with pytest.raises(Exception, match="Stock was updated, but failed to validate the order status."):
         service.validate_order(order_id=503)
 
-    assert mock_item_dao.update_item.call_count == 2
+    mock_item_dao.reserve_stock.assert_called_once()
     assert sample_order_pending_with_items.status == "validated"
     mock_order_dao.update_order.assert_called_once()
 